@@ -0,0 +1,387 @@
+##############################################################################
+### Binary column output of LogProcessor [class ColumnWriter].
+### Writes processed log data to a directory of column files, which can be
+### loaded without parsing (memory-mapped NumPy arrays).
+###
+### Usage:
+###    from LogProcessor import *
+###    from ColumnWriter import *
+###
+###    logProcessor = LogProcessor()
+###    logProcessor.setOutputWriter(ColumnWriter)
+###    logProcessor.process(files, outputFile = "usage.cols")
+###
+###    columns, dictionaries = loadColumns("usage.cols")
+###    dataset = loadDataFrame("usage.cols")     # pandas DataFrame
+###
+### Directory format:
+###    license.i, version.i, toolbox.i    Codes (int32), index into the
+###                                       dictionary of the column
+###    start.q, end.q                     Start/end time (int64), minutes
+###                                       since 1970-01-01 00:00
+###    duration.f                         DeltaTime in hours (float32)
+###    window.q                           Start of the time window (int64,
+###                                       minutes), only for time windows
+###                                       with output "column"
+###    license.txt, version.txt,          Dictionaries: one value per line,
+###    toolbox.txt                        line k = value of code k
+###    rowgroups.q                        Number of rows of each row group
+###    format.txt                         Byte order and item sizes
+###
+### Rows are buffered and appended to the column files in row groups of
+### ColumnWriter.rowGroupSize rows. As for text output, output is appended to
+### an existing directory (the dictionaries are extended). Rows with and
+### without window column cannot be mixed in a directory (ValueError).
+###
+### Class ColumnWriter:
+### -------------------
+### Output writer for LogProcessor.setOutputWriter(). Writing only needs the
+### Python standard library (module array).
+###
+### Functions:
+### ----------
+###  - loadColumns(directory, [opt.] mmap = True)
+###    Returns the columns as NumPy arrays and the dictionaries.
+###  - loadDataFrame(directory)
+###    Returns a pandas DataFrame with columns 'License Number', 'Version',
+###    'Toolbox' (categorical), 'Start time', 'End time' (datetime64) and
+###    'Usage time' (hours) (and 'Window' (datetime64) if written with time
+###    windows).
+###
+################################################################################
+
+
+import os
+import shutil
+import sys
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Columns (name, array type code)
+COLUMNS = [('license', 'i'), ('version', 'i'), ('toolbox', 'i'),
+           ('start', 'q'), ('end', 'q'), ('duration', 'f')]
+
+# Optional column: start of the time window (LogProcessor.setTimeWindows())
+WINDOW_COLUMN = ('window', 'q')
+
+# Dictionary encoded columns
+DICTIONARY_COLUMNS = ['license', 'version', 'toolbox']
+
+# Default number of rows of a row group
+ROW_GROUP_SIZE = 65536
+
+
+class ColumnWriter:
+
+    rowGroupSize = ROW_GROUP_SIZE
+
+    # =================
+    # Constructor
+    # =================
+
+    # Input parameters:
+    #   - processor: LogProcessor instance (not used, see
+    #       LogProcessor.setOutputWriter()).
+    #   - directory: Output directory. Output is appended.
+
+    def __init__(self, processor, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok = True)
+
+        self.format = _checkFormat(directory)
+
+        # Dictionaries {value: code}; the first noSaved[name] values are saved.
+        self.dictionaries = {}
+        self.noSaved = {}
+        for name in DICTIONARY_COLUMNS:
+            values = _readDictionary(directory, name)
+            self.dictionaries[name] = {value: code for code, value in enumerate(values)}
+            self.noSaved[name] = len(values)
+
+        # Buffered rows of the current row group
+        self.columns = {name: array(typecode) for name, typecode in COLUMNS + [WINDOW_COLUMN]}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
+
+    # =====================
+    # write()
+    # =====================
+
+    # Writes the merged time stamps of a group of instances (see
+    # TextWriter.write() in module LogProcessor). The window start is
+    # written to the column 'window' if given.
+
+    def write(self, licenseNo, version, toolboxes, timeVectors, window = None):
+        columns = self.columns
+        licenseCode = self.__code('license', licenseNo)
+        versionCode = self.__code('version', version)
+
+        for toolbox, timeVector in zip(toolboxes, timeVectors):
+            toolboxCode = self.__code('toolbox', toolbox)
+            noIntervals = len(timeVector) // 2
+            startTimes = timeVector[0::2]
+            endTimes = timeVector[1::2]
+
+            columns['license'].extend([licenseCode] * noIntervals)
+            columns['version'].extend([versionCode] * noIntervals)
+            columns['toolbox'].extend([toolboxCode] * noIntervals)
+            columns['start'].extend(startTimes)
+            columns['end'].extend(endTimes)
+            columns['duration'].extend([(endTime - startTime) / 60
+                                        for startTime, endTime in zip(startTimes, endTimes)])
+            if window is not None:
+                columns['window'].extend([window] * noIntervals)
+
+        if len(columns['start']) >= self.rowGroupSize:
+            self.__writeRowGroup()
+
+    # =====================
+    # writeColumns()
+    # =====================
+
+    # Writes rows given as columns (used by appendOutput()).
+    #
+    # Input parameters:
+    #   - columns: {name: sequence of values} for all COLUMNS (and optionally
+    #       'window'). The values of dictionary columns are strings.
+
+    def writeColumns(self, columns):
+        for name in DICTIONARY_COLUMNS:
+            self.columns[name].extend([self.__code(name, value) for value in columns[name]])
+        for name in ['start', 'end', 'duration', 'window']:
+            if name in columns:
+                self.columns[name].extend(columns[name])
+
+        if len(self.columns['start']) >= self.rowGroupSize:
+            self.__writeRowGroup()
+
+    # =====================
+    # close()
+    # =====================
+
+    def close(self):
+        self.__writeRowGroup()
+
+    # =====================
+    # appendOutput()
+    # =====================
+
+    # Appends the (temporary) output directory tmpDirectory to directory
+    # outputDirectory and deletes tmpDirectory. Codes are converted to the
+    # dictionaries of outputDirectory.
+
+    @staticmethod
+    def appendOutput(tmpDirectory, outputDirectory):
+        columns, dictionaries = _readColumns(tmpDirectory)
+        for name in DICTIONARY_COLUMNS:
+            values = dictionaries[name]
+            columns[name] = [values[code] for code in columns[name]]
+
+        with ColumnWriter(None, outputDirectory) as writer:
+            writer.writeColumns(columns)
+
+        shutil.rmtree(tmpDirectory)
+
+    # =====================
+    # __code()
+    # =====================
+
+    # Returns the code of a value of a dictionary column (new values are
+    # added to the dictionary).
+
+    def __code(self, name, value):
+        dictionary = self.dictionaries[name]
+        code = dictionary.get(value)
+        if code is None:
+            code = len(dictionary)
+            dictionary[value] = code
+        return code
+
+    # =====================
+    # __writeRowGroup()
+    # =====================
+
+    # Appends new dictionary values and the buffered rows to the files.
+    # Raises ValueError if the rows have a window column and the directory
+    # has not, or vice versa (nothing is written).
+
+    def __writeRowGroup(self):
+        noRows = len(self.columns['start'])
+        if noRows == 0:
+            return
+
+        noWindows = len(self.columns['window'])
+        if noWindows not in (0, noRows):
+            raise ValueError("Rows with and without time window written to column directory " + self.directory)
+        startFile = os.path.join(self.directory, "start.q")
+        if os.path.exists(startFile) and os.path.getsize(startFile) > 0:
+            if os.path.exists(os.path.join(self.directory, "window.q")) != (noWindows > 0):
+                raise ValueError("Column directory " + self.directory + " was written "
+                                 + ("without" if noWindows else "with") + " time windows (window column).")
+
+        # Dictionaries first: all codes in the column files can be decoded.
+        for name in DICTIONARY_COLUMNS:
+            values = list(self.dictionaries[name])
+            if len(values) > self.noSaved[name]:
+                with open(os.path.join(self.directory, name + ".txt"), 'a', encoding = 'utf-8') as writeFile:
+                    for value in values[self.noSaved[name]:]:
+                        writeFile.write(value + "\n")
+                self.noSaved[name] = len(values)
+
+        for name, typecode in COLUMNS + [WINDOW_COLUMN]:
+            if name == 'window' and len(self.columns[name]) == 0:
+                continue
+            with open(os.path.join(self.directory, name + "." + typecode), 'ab') as writeFile:
+                self.columns[name].tofile(writeFile)
+            self.columns[name] = array(typecode)
+
+        with open(os.path.join(self.directory, "rowgroups.q"), 'ab') as writeFile:
+            array('q', [noRows]).tofile(writeFile)
+
+
+
+# ==========================
+# loadColumns()
+# ==========================
+
+# Loads a column directory written by ColumnWriter. Requires NumPy.
+#
+# Input parameters:
+#   - directory: Column directory.
+#   - mmap: If True (default), the column files are memory-mapped (read-only).
+#
+# Output parameters:
+#   - columns: {name: NumPy array} (see COLUMNS, and 'window' if the
+#       directory has a window column).
+#   - dictionaries: {name: list of values} for DICTIONARY_COLUMNS. The value
+#       of code k of column name is dictionaries[name][k].
+
+def loadColumns(directory, mmap = True):
+    if np is None:
+        raise ImportError("loadColumns() requires NumPy.")
+
+    fileFormat = _checkFormat(directory)
+    byteOrder = '<' if fileFormat['byteorder'] == 'little' else '>'
+
+    columns = {}
+    for name, typecode in COLUMNS + [WINDOW_COLUMN]:
+        kind = 'f' if typecode == 'f' else 'i'
+        dtype = np.dtype(byteOrder + kind + fileFormat[typecode])
+        fileName = os.path.join(directory, name + "." + typecode)
+        if name == 'window' and not os.path.exists(fileName):
+            continue
+        if not os.path.exists(fileName) or os.path.getsize(fileName) == 0:
+            columns[name] = np.zeros(0, dtype = dtype)
+        elif mmap:
+            columns[name] = np.memmap(fileName, dtype = dtype, mode = 'r')
+        else:
+            columns[name] = np.fromfile(fileName, dtype = dtype)
+
+    dictionaries = {name: _readDictionary(directory, name) for name in DICTIONARY_COLUMNS}
+
+    return columns, dictionaries
+
+
+# ==========================
+# loadDataFrame()
+# ==========================
+
+# Loads a column directory written by ColumnWriter as pandas DataFrame with
+# the columns 'License Number', 'Version', 'Toolbox' (categorical),
+# 'Start time', 'End time' (datetime64), 'Usage time' (in hours) and
+# 'Window' (datetime64, only if the directory has a window column).
+# Requires NumPy and pandas.
+
+def loadDataFrame(directory):
+    import pandas as pd
+
+    columns, dictionaries = loadColumns(directory)
+
+    dataset = pd.DataFrame({
+        'License Number': pd.Categorical.from_codes(columns['license'], dictionaries['license']),
+        'Version': pd.Categorical.from_codes(columns['version'], dictionaries['version']),
+        'Toolbox': pd.Categorical.from_codes(columns['toolbox'], dictionaries['toolbox']),
+        'Start time': columns['start'].view('datetime64[m]'),
+        'End time': columns['end'].view('datetime64[m]'),
+        'Usage time': columns['duration']})
+    if 'window' in columns:
+        dataset['Window'] = columns['window'].view('datetime64[m]')
+
+    return dataset
+
+
+
+# ==========================
+# _checkFormat()
+# ==========================
+
+# Reads format.txt of a column directory (creates it for a new directory).
+# Raises ValueError if an existing directory was written with a different
+# byte order or item sizes.
+
+def _checkFormat(directory):
+    fileFormat = {'byteorder': sys.byteorder}
+    for typecode in ['i', 'q', 'f']:
+        fileFormat[typecode] = str(array(typecode).itemsize)
+
+    fileName = os.path.join(directory, "format.txt")
+    if not os.path.exists(fileName):
+        if os.path.isdir(directory):
+            with open(fileName, 'w') as writeFile:
+                for key, value in fileFormat.items():
+                    writeFile.write(key + "=" + value + "\n")
+        return fileFormat
+
+    with open(fileName, 'r') as readFile:
+        savedFormat = dict(line.rstrip('\n').split('=', 1) for line in readFile if '=' in line)
+    if savedFormat != fileFormat and os.path.exists(os.path.join(directory, "start.q")):
+        raise ValueError("Column directory " + directory + " has a different format: " + str(savedFormat))
+    return savedFormat
+
+
+# ==========================
+# _readDictionary()
+# ==========================
+
+# Returns the values of the dictionary of a column (list).
+
+def _readDictionary(directory, name):
+    fileName = os.path.join(directory, name + ".txt")
+    if not os.path.exists(fileName):
+        return []
+    with open(fileName, 'r', encoding = 'utf-8') as readFile:
+        return [line.rstrip('\n') for line in readFile]
+
+
+# ==========================
+# _readColumns()
+# ==========================
+
+# Reads a column directory with module array (no NumPy needed). Returns
+# columns {name: array} and dictionaries {name: list of values}.
+
+def _readColumns(directory):
+    _checkFormat(directory)
+
+    columns = {}
+    for name, typecode in COLUMNS + [WINDOW_COLUMN]:
+        fileName = os.path.join(directory, name + "." + typecode)
+        if name == 'window' and not os.path.exists(fileName):
+            continue
+        columns[name] = array(typecode)
+        if os.path.exists(fileName):
+            with open(fileName, 'rb') as readFile:
+                columns[name].frombytes(readFile.read())
+
+    dictionaries = {name: _readDictionary(directory, name) for name in DICTIONARY_COLUMNS}
+
+    return columns, dictionaries
@@ -0,0 +1,253 @@
+##############################################################################
+### Bulk import of processed usage data into a pandas DataFrame.
+### Replaces appending file by file (dataImport.ipynb): all files are parsed
+### (optionally in parallel) and concatenated once, with compact dtypes.
+###
+### Usage:
+###    from DataImport import importData
+###
+###    dataset = importData("data")                          # data/*.csv
+###    dataset = importData("data", cacheDirectory = "data.cache", workers = 4)
+###    dataset = importData("out", ".txt", names = OUTPUT_COLUMNS)   # LogProcessor output
+###
+### DataFrame columns:
+###    'License Number', 'Version', 'Toolbox'   categorical
+###    'Start time', 'End time'                 datetime64
+###    (and 'Usage time' (float, hours) for OUTPUT_COLUMNS)
+###
+### Cache:
+### With cacheDirectory, the parsed DataFrame of each file is saved in the
+### cache directory (pickle). On the next import only new or changed files
+### (size or modification time) are parsed again. The cache is rebuilt if it
+### was written by a different CACHE_VERSION or with different import
+### parameters.
+###
+### Functions:
+### ----------
+###  - importData(directory, [opt.] fileExtension = ".csv",
+###               [opt.] names = DATA_COLUMNS, [opt.] dateFormat,
+###               [opt.] cacheDirectory = "", [opt.] workers = 1)
+###    Returns the data of all files with fileExtension in directory (sorted
+###    by file name) as one DataFrame.
+###  - readDataFile(fileName, [opt.] names, [opt.] dateFormat)
+###    Returns the data of one file as DataFrame.
+###
+################################################################################
+
+
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+
+# Column layout of the files in data/ (dataImport.ipynb)
+DATA_COLUMNS = ['License Number', 'Version', 'Start time', 'End time', 'Toolbox']
+
+# Column layout of LogProcessor text output (TextWriter)
+OUTPUT_COLUMNS = ['License Number', 'Version', 'Toolbox', 'Start time', 'End time', 'Usage time']
+
+# Categorical and time columns
+CATEGORY_COLUMNS = ['License Number', 'Version', 'Toolbox']
+TIME_COLUMNS = ['Start time', 'End time']
+
+# Version of the cache format (increment on changes of readDataFile())
+CACHE_VERSION = 1
+
+# Index file of a cache directory
+CACHE_INDEX = "index.pkl"
+
+
+# ==========================
+# importData()
+# ==========================
+
+# Imports all files with fileExtension in directory.
+#
+# Input parameters:
+#   - directory: Directory containing the data files.
+#   - fileExtension: File extension of the data files.
+#   - names: Column names of the files (DATA_COLUMNS or OUTPUT_COLUMNS).
+#   - dateFormat: Format of the time columns.
+#   - cacheDirectory: Directory of the file cache (see header). No cache if
+#       empty.
+#   - workers: Number of processes parsing files in parallel.
+#
+# Output parameters:
+#   - dataset: DataFrame of all files (sorted by file name, row order of
+#       the files is kept).
+
+def importData(directory, fileExtension = ".csv", names = DATA_COLUMNS, dateFormat = "%d.%m.%Y %H:%M",
+               cacheDirectory = "", workers = 1):
+    fileNames = sorted(os.path.join(directory, file) for file in os.listdir(directory)
+                       if file.endswith(fileExtension))
+
+    # Cache index {fileName: (size, mtime, cacheFile)}
+    options = (CACHE_VERSION, list(names), dateFormat)
+    index = {}
+    if cacheDirectory:
+        index = _readCacheIndex(cacheDirectory, options)
+
+    # Files to be parsed
+    stamps = {fileName: _fileStamp(fileName) for fileName in fileNames}
+    newFiles = [fileName for fileName in fileNames
+                if fileName not in index or index[fileName][:2] != stamps[fileName]]
+
+    frames = {}
+    if workers > 1 and len(newFiles) > 1:
+        with ProcessPoolExecutor(max_workers = workers) as executor:
+            jobs = [executor.submit(readDataFile, fileName, names, dateFormat) for fileName in newFiles]
+            for fileName, job in zip(newFiles, jobs):
+                frames[fileName] = job.result()
+    else:
+        for fileName in newFiles:
+            frames[fileName] = readDataFile(fileName, names, dateFormat)
+
+    if cacheDirectory:
+        _writeCache(cacheDirectory, options, index, stamps, frames)
+        for fileName in fileNames:
+            if fileName not in frames:
+                frames[fileName] = pd.read_pickle(os.path.join(cacheDirectory, index[fileName][2]))
+
+    return _concatFrames([frames[fileName] for fileName in fileNames], names)
+
+
+# ==========================
+# readDataFile()
+# ==========================
+
+# Reads one data file (see importData()) as DataFrame with categorical
+# license/version/toolbox and datetime64 time columns. An empty file (e.g.
+# output of a time filter without rows) returns an empty DataFrame.
+
+def readDataFile(fileName, names = DATA_COLUMNS, dateFormat = "%d.%m.%Y %H:%M"):
+    dtypes = {name: str for name in ['Version', 'Toolbox'] if name in names}
+    try:
+        data = pd.read_csv(fileName, names = names, header = None, dtype = dtypes,
+                           skipinitialspace = True)
+    except pd.errors.EmptyDataError:
+        return _emptyFrame(names)
+    if len(data) == 0:
+        return _emptyFrame(names)
+
+    for name in names:
+        if name in TIME_COLUMNS:
+            data[name] = pd.to_datetime(data[name], format = dateFormat)
+        elif name in CATEGORY_COLUMNS:
+            data[name] = data[name].astype('category')
+
+    return data
+
+
+
+# ==========================
+# _concatFrames()
+# ==========================
+
+# Concatenates DataFrames column by column (parts of a column are released
+# after it is combined). Categorical columns are combined with
+# union_categoricals (pd.concat would fall back to object columns); if the
+# categories of the parts have different dtypes (e.g. numeric license
+# numbers in one file, text in another), they are converted to strings
+# first. Parts without rows (empty files) are skipped.
+
+def _concatFrames(frames, names):
+    if not frames:
+        return _emptyFrame(names)
+
+    columns = {}
+    for name in names:
+        parts = [frame[name] for frame in frames]
+        if name in CATEGORY_COLUMNS:
+            parts = [part for part in parts if len(part)] or parts[:1]     # no rows: no categories
+            if len({str(part.cat.categories.dtype) for part in parts}) > 1:
+                parts = [part.cat.rename_categories(part.cat.categories.astype(str)) for part in parts]
+            columns[name] = pd.Series(union_categoricals(parts, ignore_order = True))
+        else:
+            columns[name] = pd.concat(parts, ignore_index = True)
+        del parts
+        for frame in frames:
+            del frame[name]
+
+    return pd.DataFrame(columns, columns = names)
+
+
+# ==========================
+# _emptyFrame()
+# ==========================
+
+# DataFrame without rows with the columns and dtypes of importData().
+
+def _emptyFrame(names):
+    dtypes = {name: 'datetime64[ns]' if name in TIME_COLUMNS else 'category' for name in names}
+    if 'Usage time' in dtypes:
+        dtypes['Usage time'] = float
+    return pd.DataFrame({name: pd.Series(dtype = dtypes[name]) for name in names}, columns = names)
+
+
+# ==========================
+# _fileStamp()
+# ==========================
+
+# Returns (size, modification time) of a file.
+
+def _fileStamp(fileName):
+    status = os.stat(fileName)
+    return (status.st_size, status.st_mtime_ns)
+
+
+# ==========================
+# _readCacheIndex()
+# ==========================
+
+# Returns the index of a cache directory, or an empty index if the cache
+# does not exist or was written with different options.
+
+def _readCacheIndex(cacheDirectory, options):
+    indexFile = os.path.join(cacheDirectory, CACHE_INDEX)
+    if not os.path.exists(indexFile):
+        return {}
+
+    with open(indexFile, 'rb') as readFile:
+        cache = pickle.load(readFile)
+    if cache.get('options') != options:
+        print("Cache " + cacheDirectory + " is outdated and is rebuilt.")
+        return {}
+    return cache['index']
+
+
+# ==========================
+# _writeCache()
+# ==========================
+
+# Saves the parsed DataFrames and the updated index in the cache directory.
+# Cache files of removed or changed data files are deleted.
+
+def _writeCache(cacheDirectory, options, index, stamps, frames):
+    os.makedirs(cacheDirectory, exist_ok = True)
+
+    newIndex = {}
+    for fileName, entry in index.items():
+        if fileName in stamps and fileName not in frames:
+            newIndex[fileName] = entry
+        else:
+            cacheFile = os.path.join(cacheDirectory, entry[2])
+            if os.path.exists(cacheFile):
+                os.remove(cacheFile)
+
+    usedNames = {entry[2] for entry in newIndex.values()}
+    for fileName, frame in frames.items():
+        cacheName = os.path.basename(fileName) + ".pkl"
+        number = 1
+        while cacheName in usedNames:
+            cacheName = os.path.basename(fileName) + "." + str(number) + ".pkl"
+            number = number + 1
+        usedNames.add(cacheName)
+
+        frame.to_pickle(os.path.join(cacheDirectory, cacheName))
+        newIndex[fileName] = stamps[fileName] + (cacheName,)
+
+    with open(os.path.join(cacheDirectory, CACHE_INDEX), 'wb') as writeFile:
+        pickle.dump({'options': options, 'index': newIndex}, writeFile, pickle.HIGHEST_PROTOCOL)
@@ -0,0 +1,139 @@
+##############################################################################
+### Generator of synthetic Matlab log files (format: see LogProcessor).
+### Deterministic for a given seed; used by benchmark.py.
+###
+### Usage:
+###    from LogGenerator import generateLog
+###    generateLog("synthetic.log", 1000000, seed = 1, concurrency = 16)
+###
+### Or from the command line:
+###    python LogGenerator.py synthetic.log 1000000 [--seed 1] [--concurrency 16] ...
+###
+### Parameters:
+###   - noLines: Number of lines (approx., up to 10^8; the file is written
+###     while generating).
+###   - seed: Seed of the random generator (same seed => same file).
+###   - concurrency: Mean number of open (simultaneous) processes.
+###   - noToolboxes: Number of toolbox names (each process uses 1..4).
+###   - orphanRate: Fraction of processes without END line.
+###   - noLicenses, noVersions: Number of license numbers/versions.
+###   - startTime: Time stamp of the first line ("Y-m-d H:M").
+###   - maxDuration: Maximum duration of a process in minutes.
+###   - meanGap: Mean time between two START lines in minutes.
+###
+### Functions:
+### ----------
+###  - generateLog(fileName, noLines, ...): Writes a log file, returns the
+###    number of lines.
+###  - logLines(noLines, ...): Generator of the lines of a log file.
+###
+################################################################################
+
+
+import argparse
+import heapq
+import random
+from datetime import datetime, timedelta
+
+
+_MINUTES_PER_DAY = 24 * 60
+
+
+# ==========================
+# logLines()
+# ==========================
+
+# Generates the lines of a log file (with '\n'). START/END lines are in
+# order of time. See header for the parameters.
+
+def logLines(noLines, seed = 0, concurrency = 8, noToolboxes = 8, orphanRate = 0.01, noLicenses = 100,
+             noVersions = 2, startTime = "2020-06-01 08:00", maxDuration = 240, meanGap = 2):
+    rng = random.Random(seed)
+
+    toolboxes = ["matlab"] + ["toolbox" + str(cc) for cc in range(1, noToolboxes)]
+    licenses = [str(40900000 + cc) for cc in range(noLicenses)]
+    versions = ["27 (R2020) Update " + str(cc) for cc in range(noVersions)]
+
+    # Time stamps: minutes since midnight of the first day
+    first = datetime.strptime(startTime, "%Y-%m-%d %H:%M")
+    start = first.replace(hour = 0, minute = 0)
+    now = first.hour * 60 + first.minute
+    days = {}    # {day number: "Y-m-d "}
+
+    def timeStamp(minutes):
+        day, minute = divmod(minutes, _MINUTES_PER_DAY)
+        dayString = days.get(day)
+        if dayString is None:
+            dayString = (start + timedelta(days = day)).strftime("%Y-%m-%d ")
+            days[day] = dayString
+        return dayString + "%02d:%02d" % divmod(minute, 60)
+
+    openProcesses = []     # Heap [(end time, processID, END line data), ...]
+    processID = 10000
+    lineNumber = 0
+
+    while lineNumber < noLines:
+        # Start a process if less than a random target (mean: concurrency)
+        # are open, otherwise end the process with the earliest end time.
+        # No new processes once the open processes fill the remaining lines.
+        if (len(openProcesses) < rng.randint(1, 2*concurrency - 1)
+                and lineNumber + len(openProcesses) + 2 <= noLines) or not openProcesses:
+            if meanGap > 0:
+                now = now + int(rng.expovariate(1 / meanGap))
+            processID = processID + 1
+            yield "$START," + str(processID) + "," + timeStamp(now) + "\n"
+            lineNumber = lineNumber + 1
+
+            if rng.random() >= orphanRate:
+                noUsed = min(rng.randint(1, 4), len(toolboxes))
+                used = [toolboxes[0]] + rng.sample(toolboxes[1:], noUsed - 1) if noUsed > 1 else [toolboxes[0]]
+                data = (rng.choice(licenses) + "," + rng.choice(versions), "[" + ":".join(used) + "]")
+                heapq.heappush(openProcesses, (now + rng.randint(0, maxDuration), processID, data))
+        else:
+            endTime, endID, data = heapq.heappop(openProcesses)
+            now = max(now, endTime)
+            yield "$END," + str(endID) + "," + data[0] + "," + timeStamp(now) + "," + data[1] + "\n"
+            lineNumber = lineNumber + 1
+
+
+# ==========================
+# generateLog()
+# ==========================
+
+# Writes a synthetic log file (see logLines() for the parameters).
+# Returns the number of lines written.
+
+def generateLog(fileName, noLines, **parameters):
+    noWritten = 0
+    with open(fileName, 'w') as writeFile:
+        buffer = []
+        for line in logLines(noLines, **parameters):
+            buffer.append(line)
+            if len(buffer) >= 65536:
+                writeFile.writelines(buffer)
+                noWritten = noWritten + len(buffer)
+                buffer = []
+        writeFile.writelines(buffer)
+        noWritten = noWritten + len(buffer)
+    return noWritten
+
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Generate a synthetic Matlab log file.")
+    parser.add_argument("fileName")
+    parser.add_argument("noLines", type = int)
+    parser.add_argument("--seed", type = int, default = 0)
+    parser.add_argument("--concurrency", type = int, default = 8)
+    parser.add_argument("--noToolboxes", type = int, default = 8)
+    parser.add_argument("--orphanRate", type = float, default = 0.01)
+    parser.add_argument("--noLicenses", type = int, default = 100)
+    parser.add_argument("--noVersions", type = int, default = 2)
+    parser.add_argument("--startTime", default = "2020-06-01 08:00")
+    parser.add_argument("--maxDuration", type = int, default = 240)
+    parser.add_argument("--meanGap", type = float, default = 2)
+    arguments = vars(parser.parse_args())
+
+    fileName = arguments.pop("fileName")
+    noLines = arguments.pop("noLines")
+    print("Lines written: " + str(generateLog(fileName, noLines, **arguments)))
@@ -1,7 +1,8 @@
 ##############################################################################
 ### A class to process Matlab Log files [class LogProcessor].
 ### Converts Log files to a format suitable for data evaluation. 
-### Overlapping processes/time stamps are merged.
+### Overlapping processes/time stamps of the same license and version are
+### merged.
 ###
 ### Log file format:
 ###    $Start,ProcessID,Time stamp (Y-m-d H:M)
@@ -11,19 +12,50 @@
 ###    License, Version, Toolbox, Start timestamp, End timestamp, DeltaTime (in hours).
 ###
 ### To modify output format:
-### Modify the write step in processData() - Tagged: "WRITING OUTPUT FILE".
+### Modify the write step in TextWriter.write() - Tagged: "WRITING OUTPUT FILE".
+### Or set a different output writer (setOutputWriter()), e.g. ColumnWriter
+### (module ColumnWriter, binary column files).
 ###
 ### Class LogProcessor:
 ### -------------------
 ### Public methods:
 ###   - process(fileName, [opt.] outputFile = "outFile.txt", 
-###             [opt.] outputDirectory = "./myFolder")
+###             [opt.] outputDirectory = "./myFolder",
+###             [opt.] singlePass = True, [opt.] workers = 1,
+###             [opt.] chunkSize = 0, [opt.] checkpointDirectory = "",
+###             [opt.] mergeFiles = False)
 ###     The main method to process data files. fileName can be a single
 ###     file or a list of files ["file1.csv", "file2.csv", ...]. If outputFile is
 ###     given, all outputs are appended to that file; otherwise an output file
 ###     p_[name] is created for each input file.
+###     By default each file is read once (class LogStream). singlePass = False
+###     selects the original two-pass processing. With workers = N > 1, files
+###     are processed in a pool of N processes (output order is unchanged).
+###     With chunkSize > 0, files larger than chunkSize bytes are split into
+###     parts which are processed in parallel.
+###     With checkpointDirectory, files are processed incrementally: each call
+###     continues where the last call stopped (for growing log files; without
+###     it, a file processed again is appended again). Use a maximum session
+###     age (setOrphanEviction()) for incremental processing.
+###     With mergeFiles = True, the files (e.g. logs of redundant license
+###     servers) are merged by time stamp into one input (mergeLogLines()).
+###     Compressed files (gzip, bz2, xz) are decompressed while reading (in a
+###     single pass, see openLogFile()).
 ###     WARNING: The output file is always written in append mode. If a file of the
 ###     same name already exists, the output is appended.
+###     Returns the statistics (class ProcessStats) of all files.
+###
+###   - processFile(inputFile, outputFile, [opt.] singlePass = True,
+###                 [opt.] offset = 0, [opt.] noLines = None,
+###                 [opt.] checkpointFile = None)
+###     Processes a single file (or noLines lines from byte offset, or
+###     incrementally from a checkpoint), the output is appended to outputFile.
+###     Returns the statistics of the file (ProcessStats).
+###
+###   - openStreamOutput(outputFile)
+###     Context manager for lines which are processed as they arrive (e.g.
+###     module LogService): provides a StreamOutput, whose LogStreams write
+###     their final groups to outputFile.
 ###  
 ###   - setTimeFilter(startTime, endTime)
 ###     with start/end time the start and end time of the filter.
@@ -34,16 +66,112 @@
 ###   - clearTimeFilter()
 ###     Delete time filter.
 ###
+###   - setTimeWindows(windows, [opt.] endTime, [opt.] step,
+###                    [opt.] output = "files")
+###     Several time filters in one pass: windows = [(startTime, endTime), ...]
+###     or consecutive windows of step hours, e.g.
+###     setTimeWindows("01.06.2020 00:00", "01.07.2020 00:00", step = 24).
+###     Output of each window to its own file (output = "files") or with the
+###     window start as additional column (output = "column").
+###
+###   - clearTimeWindows()
+###     Delete time windows.
+###
+###   - overlappingWindows(startTime, endTime)
+###     Indices of the time windows overlapping a time range (binary search).
+###
+###   - setOrphanEviction([opt.] maxSessionAge, [opt.] maxOpenProcesses,
+###                       [opt.] orphanFile, [opt.] callback)
+###     Evict non-terminated processes (START without END) which are older than
+###     maxSessionAge hours or exceed maxOpenProcesses open processes. Evicted
+###     processes are written to orphanFile and/or passed to callback.
+###
+###   - clearOrphanEviction()
+###     Deactivate eviction.
+###
+###   - setDeduplication([opt.] window = 24, [opt.] bloomKeys = None,
+###                      [opt.] falsePositiveRate = 1e-4)
+###     Drop duplicated sessions of overlapping (rotated) log files at parse
+###     time: the START/END lines of sessions that were already processed
+###     (keys (processID, time stamp, event type) of the last window hours, or
+###     a Bloom filter for bloomKeys keys) are skipped.
+###
+###   - clearDeduplication()
+###     Deactivate deduplication (the index is deleted).
+###
+###   - setResultCache(cacheDirectory, [opt.] maxSize = 1024,
+###                    [opt.] contentHash = False)
+###     Save the output of each file in cacheDirectory. Unchanged files
+###     (path/size/modification time, or content) processed with the same
+###     configuration are not processed again; the cached output is appended
+###     (again: saves processing time only, use a new output file for each
+###     call). Least recently used results are deleted above maxSize MB.
+###
+###   - clearResultCache()
+###     Deactivate the result cache.
+###
+###   - setQuiet([opt.] quiet = True)
+###     Quiet mode: no progress/line counts on stdout (see ProcessStats).
+###
+###   - setHooks([opt.] fileStart, [opt.] fileEnd)
+###     Functions fileStart(inputFile) and fileEnd(stats) called for each
+###     file, e.g. to attach a profiler or to export statistics.
+###
+###   - setConcurrency([opt.] bucketSize = 24, [opt.] origin)
+###     Compute the peak and time-weighted average number of simultaneous
+###     instances (seats) per license, version, toolbox and time bucket of
+###     bucketSize hours in the same pass. Written to
+###     concurrencyFileName(outputFile), one row per bucket and input file.
+###
+###   - clearConcurrency()
+###     Deactivate the concurrency output.
+###
+###   - setByteReader([opt.] enabled = True)
+###     Read input files with the byte reader (class LogScanner, requires
+###     NumPy) or as text (enabled = False).
+###
 ###   - setDateFormat( formatString )
 ###     Set format for output and filter time. 
 ###     Default: formatString =  "%d.%m.%Y %H:%M"
 ###
+###   - setOutputWriter( writer )
+###     Set writer of output files. Default: TextWriter.
+###
+###   - formatTime( minutes )
+###     Formats a time (minutes since EPOCH) with the date format (cached).
+###
 ### Private methods:
+###  - __streamData():
+###    Single-pass processing of a log file (uses class LogStream).
 ###  - __determineValidEntries():
 ###    Pre-Processing method, which marks all valid lines in log file, i.e.
 ###    lines corresponding to processes with START and END tag.
+###    (two-pass processing only)
 ###  - __processData():
 ###    Processes the data of a log file and writes output file.
+###    (two-pass processing only)
+###  - __processParallel():
+###    Processes files in a process pool (used by process()).
+###  - __findSplitPoints():
+###    Determines points at which a file can be split for parallel processing.
+###  - __tailData():
+###    Incremental processing of a growing log file with a checkpoint.
+###  - __processCached(), __cacheKey(), __cacheLookup(), __cacheStore(),
+###    __cacheEvict(), __cacheOutput():
+###    Result cache (see setResultCache()).
+###  - __readRecords(), __useByteReader():
+###    Records of the START/END lines of an input file (byte or text reader).
+###  - __orphanWriter():
+###    Reports evicted processes (orphan file, callback).
+###  - __writeOutput():
+###    Merges the time stamps of a group of overlapping instances and writes
+###    them to the output (output writer).
+###  - __countConcurrency(), __writeConcurrency():
+###    Sweep over the instances of a group: seats in use per time bucket
+###    (see setConcurrency()).
+###  - __openWriter(), __appendOutput():
+###    Open an output writer/append a temporary output (time windows: one
+###    output per window).
 ###  - __processTime():
 ###    Associates toolboxes with time stamps.
 ###    (used by __processData())
@@ -51,12 +179,374 @@
 ###    Merges overlapping time stamps of (partly) simultaneous processes.
 ###    (used by _processTime())
 ###
+### Functions:
+### ----------
+###  - parseLogTime(timeStamp): Log file time stamp -> minutes since EPOCH.
+###  - toMinutes(datetime), toDatetime(minutes): Conversion between datetime
+###    and minutes since EPOCH. Time stamps are processed internally as
+###    integer minutes; datetime is used for the time filter only.
+###  - windowFileName(fileName, windowStart): Output file of a time window.
+###  - concurrencyFileName(fileName): Concurrency output of an output file.
+###  - mergeLogLines(logFiles): Merges the lines of several log files in order
+###    of their time stamps (lazily, one line per file in memory).
+###  - openLogFile(fileName, [opt.] mode = 'r'): Opens a log file for reading;
+###    compressed files (gzip, bz2, xz) are decompressed while reading.
+###  - lineRecords(lines, position): Records of the $START/$END lines of
+###    text lines (input of LogStream.feedRecords()).
+###
+### Class TextWriter:
+### -----------------
+### Default output writer (text rows, see output format).
+###
+### Class WindowWriter:
+### -------------------
+### Writes the output of each time window to its own output file.
+###
+### Class ProcessStats:
+### -------------------
+### Statistics of processed files: line counts, errors, peak number of open
+### processes/buffered instances and the times of the processing stages
+### (scan, parse, merge, write).
+###
+### Class LogStream:
+### ----------------
+### Single-pass pairing of START/END lines. Lines are fed in order of the log
+### file; a group of overlapping instances is handed to a flush function as
+### soon as it is final, i.e. as soon as no process that was open at the end
+### of the group can still be terminated.
+###
+### Class StreamOutput:
+### -------------------
+### Output of LogStreams fed with lines as they arrive (see
+### LogProcessor.openStreamOutput()).
+###
+### Class LogPartition:
+### -------------------
+### Buffered instances of one license number and version (used by LogStream).
+### Instances of different licenses/versions are merged and flushed
+### independently. Instances are buffered in compact arrays.
+###
+### Class TimeWindowSet, BloomFilter:
+### ---------------------------------
+### Deduplication index of processed sessions (see setDeduplication()).
+###
+### Class ToolboxDictionary:
+### ------------------------
+### Interned toolbox lists of buffered instances (referred to by id).
+###
+### Class LogScanner:
+### -----------------
+### Byte-level reader: the log file is memory-mapped and its START/END lines
+### are parsed with vectorized (NumPy) operations on blocks of bytes. Used
+### instead of the text reader if possible (see setByteReader()).
+###
+### Class DecompressingReader:
+### --------------------------
+### Raw stream of the decompressed data of a compressed log file. The file is
+### decompressed in a background thread (bounded queue of blocks).
+###
 ### 2020-06-20 Andreas Albrecht
 ################################################################################
 
 
+import bz2
+import contextlib
+from bisect import bisect_left, bisect_right
+import copy
+import gzip
+import hashlib
+import heapq
+import io
+import locale
+import lzma
+import math
+import mmap
 import os   
-from datetime import date, datetime
+import pickle
+import queue
+import shutil
+import sys
+import tempfile
+import threading
+from array import array
+from collections import OrderedDict
+from itertools import chain, islice
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+from time import perf_counter
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Minimum number of time stamps for the NumPy version of __mergeTimeStamps()
+MERGE_NUMPY_MIN = 64
+
+# Time stamp format of log files
+LOG_TIME_FORMAT = "%Y-%m-%d %H:%M"
+
+# Time stamps are processed as integer minutes since EPOCH.
+EPOCH = datetime(1970, 1, 1)
+MINUTE = timedelta(minutes = 1)
+
+# Maximum number of cached formatted time stamps (LogProcessor.timeStrings)
+TIME_STRINGS_MAX = 100000
+
+# Number of bytes at the start of a log file used to detect log rotation
+# (checkpoint mode, see LogProcessor.__tailData())
+CHECKPOINT_HEAD_SIZE = 1024
+
+# Version of the result cache (see LogProcessor.setResultCache()). Increment
+# if the output for the same input and configuration changes.
+RESULT_CACHE_VERSION = 1
+
+# Version of the checkpoint format (see LogProcessor.__tailData())
+CHECKPOINT_VERSION = 1
+
+# Age (hours) of an open process in a checkpoint above which a warning is
+# printed if it blocks the output (no maxSessionAge, see __tailData())
+CHECKPOINT_BLOCKING_AGE = 24
+
+# Block size of the byte reader (class LogScanner)
+SCAN_BLOCK_SIZE = 1 << 22
+
+# Compressed log files (see openLogFile()): magic bytes of the formats and
+# their file extensions
+COMPRESSION_FORMATS = [(b'\x1f\x8b', gzip), (b'BZh', bz2), (b'\xfd7zXZ\x00', lzma)]
+COMPRESSED_EXTENSIONS = ['.gz', '.bz2', '.xz']
+
+# Size of the decompressed blocks and maximum number of blocks buffered by
+# the reader thread (class DecompressingReader)
+DECOMPRESS_BLOCK_SIZE = 1 << 20
+DECOMPRESS_QUEUE_SIZE = 16
+
+# Bucket size of the deduplication index in minutes (class TimeWindowSet)
+DEDUP_BUCKET = 60
+
+# Processing stages timed in ProcessStats.times
+STAGES = ['scan', 'parse', 'merge', 'write']
+
+
+# =====================
+# parseLogTime()
+# =====================
+
+# Converts a log file time stamp "Y-m-d H:M" to minutes since EPOCH.
+# Time stamps of the fixed format (e.g. "2020-06-16 16:22") are sliced, the
+# minutes of a day are cached. Other time stamps are parsed with
+# datetime.strptime(timeStamp, LOG_TIME_FORMAT).
+
+_dayMinutes = {}   # {"Y-m-d": minutes since EPOCH}
+
+def parseLogTime(timeStamp):
+    if len(timeStamp) == 16 and timeStamp[10] == ' ' and timeStamp[13] == ':':
+        hour = timeStamp[11:13]
+        minute = timeStamp[14:16]
+        if hour.isascii() and hour.isdigit() and minute.isascii() and minute.isdigit():
+            hour = int(hour)
+            minute = int(minute)
+            if hour < 24 and minute < 60:
+                day = _dayMinutes.get(timeStamp[:10])
+                if day is None:
+                    day = toMinutes(datetime.strptime(timeStamp[:10], "%Y-%m-%d"))
+                    _dayMinutes[timeStamp[:10]] = day
+                return day + 60*hour + minute
+
+    return toMinutes(datetime.strptime(timeStamp, LOG_TIME_FORMAT))
+
+
+# =====================
+# concurrencyFileName()
+# =====================
+
+# Concurrency output of an output file (see LogProcessor.setConcurrency()):
+# "<name>_concurrency[.ext]", e.g. "out_concurrency.csv".
+
+def concurrencyFileName(fileName):
+    name, extension = os.path.splitext(fileName)
+    return name + "_concurrency" + extension
+
+
+# =====================
+# mergeLogLines()
+# =====================
+
+# Merges the lines of several log files (e.g. of redundant license servers)
+# in order of their time stamps. The files are read lazily: only the next
+# line of each file is held in memory (heap, see heapq.merge()). The lines of
+# each file must be in order of time, as written by the license server.
+# The next line is the first line of all files with the smallest time stamp;
+# same time stamp: START lines before END lines, then in order of the files.
+# The order of the lines of a file is kept. Lines without time stamp keep
+# their position in their file.
+#
+# Input parameters:
+#   - logFiles: List of iterables of lines (e.g. files opened for reading).
+#
+# Output parameters:
+#   - Generator of the merged lines.
+
+def mergeLogLines(logFiles):
+    keyedFiles = [_keyedLines(lines, fileIndex) for fileIndex, lines in enumerate(logFiles)]
+    for key in heapq.merge(*keyedFiles):
+        yield key[4]
+
+
+# =====================
+# _keyedLines()
+# =====================
+
+# Yields the lines of a log file as (time, isEnd, fileIndex, lineNumber,
+# line) for mergeLogLines(). Lines without valid time stamp get the time of
+# the previous line of the file.
+
+def _keyedLines(lines, fileIndex):
+    time = -sys.maxsize
+    lineNumber = 0
+    for line in lines:
+        lineNumber = lineNumber + 1
+        isEnd = line.startswith("$END")
+        try:
+            if isEnd:
+                time = parseLogTime(line.split(',', 5)[4].rstrip('\n'))
+            elif line.startswith("$START"):
+                time = parseLogTime(line.split(',', 3)[2].rstrip('\n'))
+        except (IndexError, ValueError):
+            pass
+        yield (time, isEnd, fileIndex, lineNumber, line)
+
+
+# =====================
+# openLogFile()
+# =====================
+
+# Opens a log file for reading (mode 'r' or 'rb'). Compressed files (gzip,
+# bz2, xz; detected by their magic bytes, see COMPRESSION_FORMATS) are
+# decompressed while reading: the file is decompressed once, in a background
+# thread (class DecompressingReader), overlapping with the processing of the
+# lines. Compressed files cannot be seeked.
+
+def openLogFile(fileName, mode = 'r'):
+    compression = _compression(fileName)
+    if compression is None:
+        return open(fileName, mode)
+
+    readFile = io.BufferedReader(DecompressingReader(fileName, compression), DECOMPRESS_BLOCK_SIZE)
+    if mode == 'rb':
+        return readFile
+    return io.TextIOWrapper(readFile)
+
+
+# =====================
+# _compression()
+# =====================
+
+# Returns the module (gzip, bz2, lzma) to decompress a file, or None if the
+# file is not compressed (see COMPRESSION_FORMATS).
+
+def _compression(fileName):
+    if not isinstance(fileName, str):
+        return None
+    with open(fileName, 'rb') as readFile:
+        head = readFile.read(8)
+    for magic, module in COMPRESSION_FORMATS:
+        if head.startswith(magic):
+            return module
+    return None
+
+
+# =====================
+# _plainName()
+# =====================
+
+# File name without the extension of a compressed file, e.g. "log.csv.gz"
+# -> "log.csv" (name of output files, see LogProcessor.process()).
+
+def _plainName(fileName):
+    name, extension = os.path.splitext(fileName)
+    if name and extension.lower() in COMPRESSED_EXTENSIONS:
+        return name
+    return fileName
+
+
+# =====================
+# _openLog()
+# =====================
+
+# Opens the input of LogProcessor.processFile() for reading: a file name, or
+# a list of file names which are merged (see mergeLogLines()).
+
+def _openLog(inputFile):
+    if isinstance(inputFile, list):
+        return _mergedLog(inputFile)
+    return openLogFile(inputFile)
+
+
+@contextlib.contextmanager
+def _mergedLog(fileNames):
+    with contextlib.ExitStack() as stack:
+        readFiles = [stack.enter_context(openLogFile(fileName)) for fileName in fileNames]
+        yield mergeLogLines(readFiles)
+
+
+# =====================
+# _inputName()
+# =====================
+
+# Name of the input of LogProcessor.processFile() for messages.
+
+def _inputName(inputFile):
+    if isinstance(inputFile, list):
+        return " + ".join(inputFile)
+    return inputFile
+
+
+# =====================
+# _processKey()
+# =====================
+
+# Returns the key of a process ID in the maps of open processes: an int for
+# decimal IDs without leading zeros (less memory than a string), otherwise
+# the string. str(_processKey(processID)) == processID.
+
+def _processKey(processID):
+    if processID.isdigit() and processID.isascii() and (processID[0] != '0' or len(processID) == 1):
+        return int(processID)
+    return processID
+
+
+# =====================
+# toMinutes()
+# =====================
+
+# Converts a datetime to minutes since EPOCH (seconds are truncated).
+
+def toMinutes(time):
+    return (time - EPOCH) // MINUTE
+
+
+# =====================
+# toDatetime()
+# =====================
+
+# Converts minutes since EPOCH to datetime.
+
+def toDatetime(minutes):
+    return EPOCH + timedelta(minutes = minutes)
+
+
+# =====================
+# windowFileName()
+# =====================
+
+# Output file of a time window (see LogProcessor.setTimeWindows()):
+# "<name>_<window start (YmdHM)>[.ext]", e.g. "out_202006140000.csv".
+
+def windowFileName(fileName, windowStart):
+    name, extension = os.path.splitext(fileName)
+    return name + "_" + toDatetime(windowStart).strftime("%Y%m%d%H%M") + extension
+
 
 class LogProcessor:
 
@@ -67,6 +557,10 @@ class LogProcessor:
 
         # Format of output date (output + filter)
         self.dateFormat = "%d.%m.%Y %H:%M"
+        self.timeStrings = {}    # Cache {minutes since EPOCH: formatted time}
+
+        # Writer of output files (see setOutputWriter())
+        self.outputWriter = TextWriter
         
         # Date/time filter 
         # (Activate/deactivate in set/clearTimeFilter())
@@ -74,6 +568,46 @@ class LogProcessor:
         self.filterStart = None
         self.filterEnd   = None
 
+        # Time windows (several time filters in one pass)
+        # (Activate/deactivate in set/clearTimeWindows())
+        self.timeWindows = None         # [(start, end), ...] in minutes since EPOCH,
+                                        # sorted by start
+        self.windowOutput = "files"     # "files" or "column"
+        self.windowStarts = []          # Start of each window (for bisect)
+        self.windowMaxEnds = []         # Maximum end of windows[0..k] (for bisect)
+
+        # Eviction of non-terminated processes
+        # (Activate/deactivate in set/clearOrphanEviction())
+        self.maxSessionAge = None       # in hours
+        self.maxOpenProcesses = None
+        self.orphanFile = ""
+        self.orphanCallback = None
+
+        # Deduplication of sessions of overlapping log files
+        # (Activate/deactivate in set/clearDeduplication())
+        self.dedupIndex = None          # TimeWindowSet or BloomFilter
+
+        # Cache of processed files
+        # (Activate/deactivate in set/clearResultCache())
+        self.cacheDirectory = ""
+        self.cacheMaxSize = None        # in MB
+        self.cacheContentHash = False
+
+        # Concurrency (seats in use) per time bucket
+        # (Activate/deactivate in set/clearConcurrency())
+        self.concurrencyBucket = None   # Bucket size in minutes
+        self.concurrencyOrigin = 0      # Start of bucket 0 (minutes since EPOCH)
+        self.__concurrency = {}         # {(licenseNo, version, toolbox, bucket): [peak, seat minutes]}
+
+        # Reader of input files (see setByteReader())
+        self.byteReader = True          # True: byte reader (LogScanner) if possible
+
+        # Diagnostics (see setQuiet(), setHooks())
+        self.quiet = False              # True: no report on stdout
+        self.fileStartHook = None       # fileStart(inputFile)
+        self.fileEndHook = None         # fileEnd(stats)
+        self.__stats = ProcessStats()   # Statistics of the current file
+
     # =====================
     # setTimeFilter()
     # =====================
@@ -86,6 +620,7 @@ class LogProcessor:
     # self.dateFormat.
     #
     def setTimeFilter(self, filterStart, filterEnd):
+        self.clearTimeWindows()
         self.timeFilter = True
         self.filterStart = datetime.strptime(filterStart, self.dateFormat)
         self.filterEnd = datetime.strptime(filterEnd, self.dateFormat)
@@ -101,6 +636,324 @@ class LogProcessor:
         self.filterStart = None
         self.filterEnd = None
 
+    # =====================
+    # setTimeWindows()
+    # =====================
+
+    # Activate several time filters (windows), which are applied in one pass
+    # over the input. Each instance is clipped to every window it overlaps;
+    # the instances of each window are merged separately, i.e. the output of
+    # a window is the output of setTimeFilter() with that window.
+    #
+    # Input parameters:
+    #   - windows: List of windows [(startTime, endTime), ...], e.g.
+    #       [("14.06.2020 00:00", "15.06.2020 00:00"), ...].
+    #       Or: start time of the first window if endTime is given.
+    #   - endTime, step: Consecutive windows of step hours from windows (start
+    #       time) to endTime, e.g. setTimeWindows("01.06.2020 00:00",
+    #       "01.07.2020 00:00", step = 24) for the days of June.
+    #   - output: "files": The output of each window is written to its own
+    #       output file "<outputFile>_<window start (YmdHM)>[.ext]".
+    #       "column": All windows are written to the output file, with the
+    #       window start as additional column (see TextWriter).
+    # Important: The timestamp strings must be in the format defined by
+    # self.dateFormat. Overlapping windows are allowed; with output "files"
+    # the start times of the windows must differ.
+
+    def setTimeWindows(self, windows, endTime = None, step = None, output = "files"):
+        if output not in ("files", "column"):
+            print("ERROR: Unknown window output '" + str(output) + "' (\"files\" or \"column\").")
+            return
+
+        if endTime is not None:
+            startTime = toMinutes(datetime.strptime(windows, self.dateFormat))
+            endTime = toMinutes(datetime.strptime(endTime, self.dateFormat))
+            step = int(step * 60)     # hours => minutes
+            if step <= 0:
+                print("ERROR: The step of time windows must be at least one minute.")
+                return
+            windows = [(time, min(time + step, endTime)) for time in range(startTime, endTime, step)]
+        else:
+            windows = [(toMinutes(datetime.strptime(start, self.dateFormat)),
+                        toMinutes(datetime.strptime(end, self.dateFormat))) for start, end in windows]
+        windows = sorted(set(windows))
+
+        self.clearTimeFilter()
+        self.timeWindows = windows
+        self.windowOutput = output
+        self.windowStarts = [start for start, end in windows]
+        self.windowMaxEnds = []
+        maxEnd = None
+        for start, end in windows:
+            maxEnd = end if maxEnd is None else max(maxEnd, end)
+            self.windowMaxEnds.append(maxEnd)
+
+    # =====================
+    # clearTimeWindows()
+    # =====================
+
+    # Delete time windows.
+
+    def clearTimeWindows(self):
+        self.timeWindows = None
+        self.windowOutput = "files"
+        self.windowStarts = []
+        self.windowMaxEnds = []
+
+    # =====================
+    # overlappingWindows()
+    # =====================
+
+    # Returns the indices of the time windows overlapping the time range
+    # [startTime, endTime] (minutes since EPOCH), i.e. windows with
+    # start < endTime and end > startTime. Both bounds are found by binary
+    # search; only windows between them are checked.
+
+    def overlappingWindows(self, startTime, endTime):
+        windows = self.timeWindows
+        first = bisect_right(self.windowMaxEnds, startTime)
+        last = bisect_left(self.windowStarts, endTime)
+        return [cc for cc in range(first, last) if windows[cc][1] > startTime]
+
+    # ========================
+    # setOrphanEviction()
+    # ========================
+
+    # Limit the memory used for non-terminated processes (START without END,
+    # e.g. crashed processes). Open processes are evicted in order of their
+    # START lines (oldest first) if
+    #   - maxSessionAge: the process started more than maxSessionAge hours
+    #       before the time stamp of the current END line, or
+    #   - maxOpenProcesses: more than maxOpenProcesses processes are open.
+    # An END line of an evicted process is ignored. At the end of a file, the
+    # remaining open processes are reported as well (reason "end of input").
+    # Single-pass processing only: files are processed in a single pass
+    # (also with singlePass = False) and not split (chunkSize) if eviction
+    # or orphan reports are active.
+    #
+    # Input parameters:
+    #   - maxSessionAge: Maximum session duration in hours (None = no limit).
+    #   - maxOpenProcesses: Maximum number of open processes (None = no limit).
+    #   - orphanFile: If defined, evicted processes are appended to this file:
+    #       ProcessID, Start timestamp, Reason ("max age", "max open",
+    #       "end of input", "log rotated" (see checkpointDirectory)).
+    #   - callback: If defined, function callback(processID, startTime, reason)
+    #       called for each evicted process (startTime: datetime). Must be a
+    #       module-level function if workers > 1.
+
+    def setOrphanEviction(self, maxSessionAge = None, maxOpenProcesses = None, orphanFile = "",
+                          callback = None):
+        self.maxSessionAge = maxSessionAge
+        self.maxOpenProcesses = maxOpenProcesses
+        self.orphanFile = orphanFile
+        self.orphanCallback = callback
+
+    # ========================
+    # clearOrphanEviction()
+    # ========================
+
+    # Deactivate eviction of non-terminated processes.
+
+    def clearOrphanEviction(self):
+        self.maxSessionAge = None
+        self.maxOpenProcesses = None
+        self.orphanFile = ""
+        self.orphanCallback = None
+
+    # ========================
+    # setDeduplication()
+    # ========================
+
+    # Drop duplicated lines of overlapping log files (e.g. rotated logs whose
+    # tail is repeated at the head of the next file) at parse time. The keys
+    # (processID, time stamp, event type) of the START and END line of each
+    # session are added to an index when the session is complete (END line
+    # paired with its START line). Later START/END lines with a key in the
+    # index are skipped, i.e. a session is counted once, while a session
+    # that was not terminated in one file is still counted from the next
+    # file. The index is kept for all files processed until
+    # clearDeduplication(), in the order given to process() (files should be
+    # in order of time). Single-pass processing only: files are processed
+    # serially and not split (workers, chunkSize), the result cache is not
+    # used and the index is not saved in checkpoints.
+    #
+    # Input parameters:
+    #   - window: Keys of the last window hours of log time are kept (time
+    #       buckets, see TimeWindowSet); memory is proportional to the lines
+    #       of a window. Duplicates further apart are not detected.
+    #   - bloomKeys: If given, a Bloom filter for bloomKeys keys (2 per
+    #       session) is used instead (fixed memory, no time limit, see
+    #       BloomFilter). A line is dropped erroneously with probability
+    #       falsePositiveRate.
+    #   - falsePositiveRate: False positive rate of the Bloom filter.
+
+    def setDeduplication(self, window = 24, bloomKeys = None, falsePositiveRate = 1e-4):
+        if bloomKeys:
+            self.dedupIndex = BloomFilter(bloomKeys, falsePositiveRate)
+        else:
+            self.dedupIndex = TimeWindowSet(window)
+
+    # ========================
+    # clearDeduplication()
+    # ========================
+
+    def clearDeduplication(self):
+        self.dedupIndex = None
+
+    # ========================
+    # setResultCache()
+    # ========================
+
+    # Activate the result cache: The output of each processed file is saved
+    # in cacheDirectory. If a file is processed again with the same
+    # configuration (date format, time filter/windows, eviction limits,
+    # concurrency, output writer), the saved output is appended to the output file
+    # instead of processing the file. Files are identified by path, size and
+    # modification time, or by their content (contentHash = True, SHA-1; a
+    # file is read once to compute the hash). The least recently used
+    # results are deleted if the cache exceeds maxSize MB.
+    # The cache saves processing time only: the output is the same as
+    # without cache, i.e. the cached output is appended to the output file
+    # again on each call. Processing the same files into an existing output
+    # file duplicates its rows; use a new output file for each call (or
+    # incremental processing, checkpointDirectory, for growing files).
+    # Not used for incremental processing (checkpointDirectory) and if
+    # evicted processes are reported (orphanFile, callback).
+    #
+    # Input parameters:
+    #   - cacheDirectory: Directory of the cache.
+    #   - maxSize: Maximum size of the cache in MB (None = no limit).
+    #   - contentHash: Identify files by content instead of path/size/time.
+
+    def setResultCache(self, cacheDirectory, maxSize = 1024, contentHash = False):
+        os.makedirs(cacheDirectory, exist_ok = True)
+        self.cacheDirectory = cacheDirectory
+        self.cacheMaxSize = maxSize
+        self.cacheContentHash = contentHash
+        self.__cacheEvict(None)
+
+    # ========================
+    # clearResultCache()
+    # ========================
+
+    # Deactivate the result cache (the cache directory is kept).
+
+    def clearResultCache(self):
+        self.cacheDirectory = ""
+        self.cacheMaxSize = None
+        self.cacheContentHash = False
+
+    # ========================
+    # setConcurrency()
+    # ========================
+
+    # Activate the concurrency output: For each license number, version,
+    # toolbox and time bucket the peak number of simultaneous instances
+    # (seats in use) and the time-weighted average number (seat time /
+    # bucket size) are computed from the instances before they are merged
+    # (sweep over the start/end times of each group of overlapping
+    # instances, O(n log n)). The rows
+    #    License, Version, Toolbox, Bucket start, Peak, Average
+    # are written to concurrencyFileName(outputFile) after each input file,
+    # sorted by license, version, toolbox and bucket. Buckets without usage
+    # are omitted.
+    # The rows are written per input file (and per incremental call,
+    # checkpointDirectory): a bucket covered by several files has one row
+    # for each file, which are not combined. To combine them, sum Average;
+    # the maximum of Peak is the peak of the bucket only if the files do not
+    # overlap in time (otherwise it is a lower bound: instances of different
+    # files are not counted together). With overlapping time windows, an
+    # instance is counted once for each window. Files are not split
+    # (chunkSize) if the concurrency output is active.
+    #
+    # Input parameters:
+    #   - bucketSize: Size of the buckets in hours (e.g. 1, 24, 168).
+    #   - origin: Start of a bucket, e.g. "01.06.2020 00:00" (format
+    #       self.dateFormat). Default: 01.01.1970 00:00, i.e. buckets of
+    #       hours/days start at full hours/midnight.
+
+    def setConcurrency(self, bucketSize = 24, origin = None):
+        bucketSize = int(bucketSize * 60)     # hours => minutes
+        if bucketSize <= 0:
+            print("ERROR: The bucket size of the concurrency must be at least one minute.")
+            return
+
+        self.concurrencyBucket = bucketSize
+        self.concurrencyOrigin = 0
+        if origin is not None:
+            self.concurrencyOrigin = toMinutes(datetime.strptime(origin, self.dateFormat))
+
+    # ========================
+    # clearConcurrency()
+    # ========================
+
+    # Deactivate the concurrency output.
+
+    def clearConcurrency(self):
+        self.concurrencyBucket = None
+        self.concurrencyOrigin = 0
+
+    # ========================
+    # setQuiet()
+    # ========================
+
+    # Quiet mode: process() does not print progress and statistics (use the
+    # returned ProcessStats). Configuration errors are still printed.
+
+    def setQuiet(self, quiet = True):
+        self.quiet = quiet
+
+    # ========================
+    # setHooks()
+    # ========================
+
+    # Functions called by process() for each input file, e.g. to attach a
+    # profiler or to export the statistics:
+    #   - fileStart(inputFile): before the file is processed.
+    #   - fileEnd(stats): after the file is processed, with the ProcessStats
+    #       of the file.
+    # With workers > 1 the hooks are called in the main process: fileStart
+    # when the file is submitted, fileEnd when its output is appended.
+    # None = no hook.
+
+    def setHooks(self, fileStart = None, fileEnd = None):
+        self.fileStartHook = fileStart
+        self.fileEndHook = fileEnd
+
+    # ========================
+    # setByteReader()
+    # ========================
+
+    # Select the reader of input files. enabled = True (default): files are
+    # memory-mapped and parsed as bytes (class LogScanner) if NumPy is
+    # installed, otherwise and with enabled = False they are read as text.
+    # Both readers give the same output. Merged files (mergeFiles = True) and
+    # incremental processing (checkpointDirectory) always read text.
+
+    def setByteReader(self, enabled = True):
+        self.byteReader = enabled
+
+    # =====================
+    # setOutputWriter()
+    # =====================
+
+    # Set the writer of output files. A writer is a class (or function)
+    # writer(processor, outputFile) returning a context manager with methods
+    #   - write(licenseNo, version, toolboxes, timeVectors): Write the merged
+    #       time stamps of a group of instances (see __processTime(), times
+    #       are minutes since EPOCH).
+    #   - close()
+    # and a static method appendOutput(tmpOutput, outputFile), which appends
+    # a (temporary) output to outputFile and deletes it (used if workers > 1).
+    # Output is always appended to existing output.
+    # The default value (see __init__) is TextWriter (text file, one row per
+    # line). See also ColumnWriter (module ColumnWriter).
+
+    def setOutputWriter(self, writer = None):
+        if writer is None:
+            writer = TextWriter
+        self.outputWriter = writer
+
     # =====================
     # setDateFormat()
     # =====================
@@ -110,6 +963,23 @@ class LogProcessor:
 
     def setDateFormat(self, dateFormat):
         self.dateFormat = dateFormat
+        self.timeStrings = {}
+
+    # =====================
+    # formatTime()
+    # =====================
+
+    # Formats a time (minutes since EPOCH) with self.dateFormat. Formatted
+    # times are cached in self.timeStrings.
+
+    def formatTime(self, minutes):
+        timeString = self.timeStrings.get(minutes)
+        if timeString is None:
+            if len(self.timeStrings) >= TIME_STRINGS_MAX:
+                self.timeStrings.clear()
+            timeString = toDatetime(minutes).strftime(self.dateFormat)
+            self.timeStrings[minutes] = timeString
+        return timeString
 
 
     # =======================
@@ -118,15 +988,59 @@ class LogProcessor:
 
     # The main function to process datafile(s). 
     #
-    # Uses: __processData()
-    #       __determineValidEntries()
+    # Uses: __streamData()
+    #       __processData(), __determineValidEntries() (singlePass = False)
     #
     # Input parameters:
     #   - files: Name of log file to be processed, e.g. "myLog.txt".
     #        Or: list of log files ["myLog1.txt", "myLog2.txt", "myLog3.txt"].
+    #        Compressed files (gzip, bz2, xz, e.g. "myLog.txt.gz") are read
+    #        directly (see openLogFile()); they are always processed in a
+    #        single pass and not split (chunkSize) or processed incrementally
+    #        (checkpointDirectory).
     #   - outputFile: If defined ALL (!) processed data is appended to that
     #       file. 
     #   - outputDirectory: Directory of output file(s).
+    #   - singlePass: If True (default), each file is read once. If False,
+    #       valid lines are determined in a first pass over the file and
+    #       processed in a second pass. The output is identical. Ignored
+    #       (single pass) if eviction, orphan reports or deduplication are
+    #       active (see setOrphanEviction(), setDeduplication()).
+    #   - workers: Number of worker processes. If workers > 1, the files
+    #       are processed in a process pool (see __processParallel()).
+    #   - chunkSize: Only if workers > 1 and singlePass. Files larger than
+    #       chunkSize (in bytes) are split into parts of approx. chunkSize,
+    #       which are processed in parallel (see __findSplitPoints()).
+    #       Default: 0 = files are not split.
+    #   - checkpointDirectory: If defined, files are processed incrementally
+    #       (see __tailData()). A checkpoint "<inputFile>_<hash>.ckpt" is saved
+    #       for each input file; the next call of process() continues where
+    #       the last call stopped, i.e. lines are processed (and written) only
+    #       once. Without checkpointDirectory each call processes the whole
+    #       files: processing a file again appends its rows again (duplicate
+    #       rows in outputFile). Files are processed serially. An open process
+    #       (START without END line) blocks the output of all later instances
+    #       of its license until it is terminated or evicted; set a maximum
+    #       session age (setOrphanEviction()) for logs with crashed processes,
+    #       otherwise the checkpoint grows with each call (a warning is printed
+    #       if the blocking process is older than CHECKPOINT_BLOCKING_AGE hours).
+    #   - mergeFiles: If True, the files are merged by time stamp (see
+    #       mergeLogLines()) and processed as one input, i.e. START and END
+    #       lines of a process in different files are paired and overlapping
+    #       instances of different files are merged. The output file is
+    #       outputFile or "p_merged<extension of the first file>". Processed
+    #       serially; not with checkpointDirectory.
+    #
+    # The output file of a compressed file is named without the extension of
+    # the compression, e.g. "p_myLog.txt" for "myLog.txt.gz".
+    #
+    # If the result cache is active (see setResultCache()), the cached output
+    # of unchanged files is appended instead of processing them.
+    #
+    # Output parameters:
+    #   - stats: Statistics of all files (ProcessStats); stats.files are the
+    #       statistics of each file. The line counts of each file are also
+    #       printed unless in quiet mode (see setQuiet()).
     # 
     # Important:
     #   - If outputFile is not defined, an output file "p_<inputFile>" is
@@ -135,389 +1049,3110 @@ class LogProcessor:
     #     to that file.
     #   - Output data is always appended. That is, if a file of that name
     #     already exists, its content is not overwritten. 
+    #   - workers > 1: Scripts calling process() must be guarded by
+    #     if __name__ == "__main__": on platforms that spawn worker
+    #     processes (Windows, macOS).
     #
 
-    def process(self, files, outputFile = "", outputDirectory = "" ):
+    def process(self, files, outputFile = "", outputDirectory = "", singlePass = True, workers = 1,
+                chunkSize = 0, checkpointDirectory = "", mergeFiles = False ):
         if not isinstance(files, list):
             files = [files]
-            
+
+        totalStats = ProcessStats()
+        startTime = perf_counter()
+
+        # Merged files: one input [[file1, file2, ...]]
+        if mergeFiles and len(files) > 1:
+            if checkpointDirectory:
+                print("ERROR: Merged files cannot be processed incrementally (checkpointDirectory).")
+                return totalStats
+            files = [files]
+            workers = 1
+
+        # Determine output file names
+        outFiles = []
         for file in files:
-            print("---------------------------------")
-            print("Processing file " + file + "...")
-            print("---------------------------------")
-            
-            # Determine output file name
             if outputFile:       # Output of ALL input file will be added to the same output file
-                outFile = os.path.join(outputDirectory, outputFile)
+                outFiles.append(os.path.join(outputDirectory, outputFile))
+            elif isinstance(file, list):     # Merged files
+                outFiles.append(os.path.join(outputDirectory,
+                                             "p_merged" + os.path.splitext(_plainName(file[0]))[1]))
             else:                # One output file for each input file is generated
-                fileName = os.path.basename(file)
-                outFile = os.path.join(outputDirectory, "p_" + fileName)
+                fileName = _plainName(os.path.basename(file))
+                outFiles.append(os.path.join(outputDirectory, "p_" + fileName))
+
+        # Determine checkpoint file names
+        checkpointFiles = [None] * len(files)
+        if checkpointDirectory:
+            for cc in range(len(files)):
+                pathHash = hashlib.sha1(os.path.abspath(files[cc]).encode()).hexdigest()[:8]
+                checkpointFiles[cc] = os.path.join(checkpointDirectory,
+                                        os.path.basename(files[cc]) + "_" + pathHash + ".ckpt")
+
+        elif workers > 1 and self.dedupIndex is None:
+            # Eviction and orphan reports depend on all previous lines of a file
+            # (as the concurrency of a bucket)
+            if (self.maxSessionAge is not None or self.maxOpenProcesses is not None
+                    or self.orphanFile or self.orphanCallback is not None
+                    or self.concurrencyBucket is not None):
+                chunkSize = 0
+
+            if len(files) > 1 or (singlePass and chunkSize > 0):
+                self.__processParallel(files, outFiles, singlePass, workers, chunkSize, totalStats)
+                totalStats.wallTime = perf_counter() - startTime
+                return totalStats
+            
+        for file, outFile, checkpointFile in zip(files, outFiles, checkpointFiles):
+            self.__print("---------------------------------")
+            self.__print("Processing file " + _inputName(file) + "...")
+            self.__print("---------------------------------")
+
+            if self.fileStartHook is not None:
+                self.fileStartHook(file)
 
-            validLines, numberLines = self.__determineValidEntries(file) 
-            self.__processData(file, outFile, validLines, numberLines)
+            if self.cacheDirectory and checkpointFile is None:
+                stats = self.__processCached(file, outFile, singlePass)
+            else:
+                stats = self.processFile(file, outFile, singlePass, checkpointFile = checkpointFile)
                 
-            print("Output file: " + outFile)
+            self.__print("Output file: " + outFile)
+            self.__fileDone(stats, totalStats)
 
+        totalStats.wallTime = perf_counter() - startTime
+        return totalStats
 
 
-    # =============================
-    # determineValidEntries()
-    # =============================
+    # =======================
+    # processFile()
+    # =======================
 
-    # Checks for valid entries in log file. Valid entries correspond to processes,
-    # which have both a $START and $END entry in the log file.
-    # (Processes which e.g. are not properly terminated are sorted out)
+    # Processes a single log file. The output is appended to outputFile.
+    # Returns the statistics of the file (ProcessStats).
     #
-    # Input paramter:
-    #   fileName: Name of log file
-    # Output parameters:
-    #   validLines: Vector with line numbers of valid lines, e.g. [1, 2, 4, 5, 6]
-    #   numberLines: The total number of lines in input log file. 
+    # Input parameters:
+    #   - inputFile: Name of log file, or list of names of log files which
+    #       are merged (see mergeLogLines()).
+    #   - outputFile: Name of output file (including directory).
+    #   - singlePass: see process(). Compressed files are always processed
+    #       in a single pass (the file is decompressed once), as well as all
+    #       files if eviction, orphan reports (see setOrphanEviction()) or
+    #       deduplication are active.
+    #   - offset, noLines: Process noLines lines starting at byte offset
+    #       (a part of a split file, see __findSplitPoints()). 
+    #       Default: the whole file. Single-pass processing only.
+    #   - checkpointFile: If defined, the file is processed incrementally
+    #       starting at the checkpoint (see __tailData()).
 
-    def __determineValidEntries( self, fileName ):
+    def processFile(self, inputFile, outputFile, singlePass = True, offset = 0, noLines = None,
+                    checkpointFile = None):
+        stats = ProcessStats(inputFile, outputFile)
+        self.__stats = stats
+        self.__concurrency = {}
+        startTime = perf_counter()
 
-        openDict = {}    # Dictionary that contains <processID, lineNumber> for a start process.
-        validLines = []  # Lines numbers of valid lines in file
+        if checkpointFile:
+            self.__tailData(inputFile, outputFile, checkpointFile)
+        elif (singlePass or _compression(inputFile) is not None or self.dedupIndex is not None
+                or self.maxSessionAge is not None or self.maxOpenProcesses is not None
+                or self.orphanFile or self.orphanCallback is not None):
+            self.__streamData(inputFile, outputFile, offset, noLines)
+        else:
+            validLines, numberLines, licenses = self.__determineValidEntries(inputFile) 
+            self.__processData(inputFile, outputFile, validLines, numberLines, licenses)
 
+        if self.concurrencyBucket is not None:
+            self.__writeConcurrency(concurrencyFileName(outputFile))
 
-        with open(fileName, 'r') as readFile:
-            lineNumber = 0
-            for line in readFile:
-                # ------------------------------------------------------------
-                # START line found => add {processID: lineNumber} to openDict
-                # ------------------------------------------------------------
-                if line.startswith('$START'):
-                    # Get process ID
-                    processID = line.split(',')[1]
-                    # Add {processID: lineNumber} entry to openDict
-                    openDict[processID] = lineNumber
-
-                # ------------------------------------------------------    
-                # END line found:
-                #     - Check if start entry for processID exists
-                #     - Add line of START and END entry to 'validLines'
-                #     - Delete START entry from dict openDict
-                # ------------------------------------------------------
-                elif line.startswith("$END"):
-                    # Check if process ID for END process has a corresponding start time
-                    # i.e. check if processID entry exists in openDict
-                    processID = line.split(',')[1]
-                    if processID in openDict:
-                        validLines.append(openDict[processID])
-                        validLines.append(lineNumber)
-                        del openDict[processID]
+        stats.setWallTime(perf_counter() - startTime)
+        return stats
 
-                lineNumber = lineNumber + 1
 
-        numberLines = lineNumber
-        
-        print("\tLines (total, valid) = " + str(lineNumber) + ", " + str(len(validLines)))
-        print("\tNon-terminated processes = " + str(len(openDict))) 
-        
-        return validLines, numberLines
+    # =======================
+    # openStreamOutput()
+    # =======================
 
+    # Context manager for processing lines as they arrive, e.g. from a socket
+    # (see module LogService). Provides a StreamOutput: each source of lines
+    # gets its own LogStream (StreamOutput.newStream()), the final groups of
+    # all streams are written to outputFile with the output writer (time
+    # windows, evicted processes as in process()). The concurrency output
+    # (setConcurrency()) is written on exit. Streams must be finished
+    # (StreamOutput.finish()) before exit. No files must be processed with
+    # the processor while the output is open.
+    #
+    # Input parameters:
+    #   - outputFile: Name of output file (including directory).
 
-    # ==========================
-    # __processData()
-    # ==========================
+    @contextlib.contextmanager
+    def openStreamOutput(self, outputFile):
+        stats = ProcessStats("", outputFile)
+        self.__stats = stats
+        self.__concurrency = {}
+        startTime = perf_counter()
 
-    # Data porcessing of an input file. Combines start end times to
-    # time ranges and writes output file. The actual processing function
-    # for a given input file.
-    #
-    # Input paramters: 
-    #   - inputFile: name of input file.
-    #   - outputFile: name of output file
-    #   - valid lines: a vector with indices of valid lines in inputFile.
-    #       (output of _determineValidEntries)
-    #   - numberLines: number of lines in inputFile.
-    #       (output of _determineValidEntries)
+        with self.__openWriter(outputFile) as writer:
 
-    def __processData(self, inputFile, outputFile, validLines, numberLines):
+            def flush(timeVector, toolboxes, licenseNo, version):
+                self.__writeOutput(writer, timeVector, toolboxes, licenseNo, version)
 
-        # Create a list with each entry representing a line of input file
-        # and False = will not be processed, True = will be processed.
-        lineValid = [False] * numberLines
-        for idx in validLines:
-            lineValid[idx] = True
+            with self.__orphanWriter() as orphan:
+                yield StreamOutput(self, writer, flush, orphan, stats)
 
-        # Initialize variables
-        noInstances = 0      # Counts how many instances are open at the same time.    
-        timeMap = {}         # Map, saves {ProcessID: time}.
-        timeVector = []      # Vector to capture time stamps of an instance/ process.
-                             # Instance(k): start time = timeVector[2k], end time = timeVector[2k+1]
-        toolboxes = []       # Vector to capture toolboxes for instance/process.
-                             # Instance(k): toolboxes = toolboxes[k]
+        if self.concurrencyBucket is not None:
+            self.__writeConcurrency(concurrencyFileName(outputFile))
 
-        # Variables temporarily save data for overlapping instances. Once the last of 
-        # possibly several open instances is closed, the data is processed, written
-        # to output file and the variables are cleared.
+        stats.setWallTime(perf_counter() - startTime)
 
-        with open(inputFile, 'r') as readFile:
-            with open(outputFile, 'a') as writeFile:
-                lineNumber = 0
 
-                # Loop over input file lines
-                for line in readFile:
-                    # Only 'valid' lines are processed
-                    if lineValid[lineNumber]:
-
-                        # ------------------------------------------------------------
-                        # START line found:
-                        #     - add {processID: start time} to timeMap dict.
-                        # ------------------------------------------------------------
-                        if line.startswith('$START'):
-                            line = line.rstrip('\n')  # remove \n at end of line
-
-                            # Get process ID and time stamp
-                            substr = line.split(',')  # split in substrings
-                            processID = substr[1]     # get process ID
-                            timeStamp = substr[2]     # get time stamp and convert to datetime format
-                            timeStamp = datetime.strptime(timeStamp, "%Y-%m-%d %H:%M")
-
-                            # Add process ID and time stamp to dict
-                            timeMap[processID] = timeStamp
-
-                            # Increase number of active instances
-                            noInstances = noInstances + 1
-
-                        # -----------------------------------------------------
-                        # END line found:
-                        # If the last active instance:
-                        #    - Process time stamps and write output data
-                        # else
-                        #    - Add [start, end time] of process to timeVector
-                        #    - Add toolboxes of process to toolboxes
-                        #    Interpretation:
-                        #    timeVector[2n], timeVector[2n+1] is the start/end time
-                        #    of a process with toolboxes toolboxes[n].
-                        # -----------------------------------------------------
-
-                        elif line.startswith("$END"):
-
-                            # Get data
-                            line = line.rstrip('\n')  # remove \n at end of line
-                            substr = line.split(',')  # split in substrings
-
-                            processID = substr[1]    # Process ID
-                            licenseNo = substr[2]    # License Number
-                            version   = substr[3]    # Software Version
-                            endTime = substr[4]      # End time of process/instance
-                            endTime = datetime.strptime(endTime, "%Y-%m-%d %H:%M")
-                            tbox = substr[5].strip('][').split(':')
-
-                            # Get start time for process (from timeMap)
-                            if not processID in timeMap:
-                                print("ERROR: (line number = " + str(lineNumber) + ")" )
-                                print("No start time found for the end timestamp.")
-                                lineNumber = lineNumber + 1
-                                continue
-                            else:
-                                startTime = timeMap[processID]
-
-                            # Add start/end time and toolboxes    
-
-                            # If time filter active => add only processed that fall within
-                            # filter time. 
-                            if self.timeFilter:
-                                if startTime < self.filterEnd and endTime > self.filterStart:
-                                    # Time range lies within filter time range
-                                    startTime = max(startTime, self.filterStart)
-                                    endTime = min(endTime, self.filterEnd) 
-                                    
-                                    timeVector.append(startTime)
-                                    timeVector.append(endTime)
-                                    toolboxes.append(tbox)
-                                    
-                            # No time filter active => add all times        
-                            else: 
-                                timeVector.append(startTime)
-                                timeVector.append(endTime)
+    # ==========================
+    # __print()
+    # ==========================
 
-                                toolboxes.append(tbox)
-                            
-                            # Delete start time entry from dict
-                            del timeMap[processID]
+    # print() unless in quiet mode (see setQuiet()).
 
-                            # One instance closed by "END" => decrease active instance counter
-                            noInstances = noInstances - 1
+    def __print(self, *values, **options):
+        if not self.quiet:
+            print(*values, **options)
 
-                            # ---------------------------------------------------
-                            # If last active instance: process & output data
-                            # ---------------------------------------------------
-                            if noInstances == 0:
-                                
-                                toolboxes, timeVectors = self.__processTime(timeVector, toolboxes)
-
-                                # For all toolboxes, write the cooresponding time stamps to output
-                                # file.
-                                for cc in range(len(toolboxes)):
-                                    toolbox = toolboxes[cc]
-                                    noIntervals = int(len(timeVectors[cc])/2)
-
-                                    for cy in range(noIntervals):
-                                        startTime = timeVectors[cc][2*cy]
-                                        endTime = timeVectors[cc][2*cy+1]
-
-                                        dt = endTime - startTime
-                                        dt = dt.total_seconds() / (60*60)   # time dt in hours
-
-                                    #################################################
-                                    #### WRITING OUTPUT FILE                      ###
-                                    #################################################
-                                        writeFile.write( licenseNo + ", "    
-                                            + version + ", "
-                                            + toolbox + ", "
-                                            + startTime.strftime(self.dateFormat) + ", "
-                                            + endTime.strftime(self.dateFormat) + ", "
-                                            + '{:.2f}'.format(dt) + "\n" )
-
-                                    #################################################
-                                    
-                                # Clean temporary data vector    
-                                timeVector = []
-                                toolboxes = []
 
+    # ==========================
+    # __fileDone()
+    # ==========================
 
-                    lineNumber = lineNumber + 1
+    # Adds the statistics of a processed file to the statistics of process()
+    # and calls the fileEnd hook (see setHooks()).
 
+    def __fileDone(self, stats, totalStats):
+        totalStats.add(stats)
+        totalStats.files.append(stats)
+        if self.fileEndHook is not None:
+            self.fileEndHook(stats)
 
 
+    # ==========================
+    # __processParallel()
+    # ==========================
 
-    ####################
-    ## __processTime()
-    ####################
-    ##
-    ## Converts a list of time stamps and associated toolboxes
-    ## to a list of unique time stamps for each toolbox.
-    ##
-    ## Input parameters:
-    ##    - timeVector: Vector of start/end times. Time stamp k
-    ##        is formed by:
-    ##                  start_time(k) = timeVector[2k]
-    ##                  end_time(k) = timeVector[2k+1]
-    ##    - toolboxes: List of toolboxes associated with a time stamp.
-    ##      List of toolboxes associated with time stamp k:
-    ##      toolboxes[k]
-    ##
-    ## Output parameters:
-    ##    - uniqueToolboxes: List of unique toolbox names.
-    ##    - time_list: List of start/end times vectors. 
-    ##      time_list[k] is the start/end time vector for 
-    ##      toolbox uniqueToolboxes[k]. A vector can consist of multiple
-    ##      time stamps (multiple start/end time pairs).
-    ## 
-    ## Example:
-    ## Input
-    ##       timeVector = [datetime(2020,6,16,16,30),
-    ##                     datetime(2020,6,16,16,45),
-    ##                     datetime(2020,6,16,16,22),
-    ##                     datetime(2020,6,16,18,5)]
-    ##       toolboxes = [['matlab', 'simulink'],
-    ##                    ['matlab']]
-    ##
-    ## Output
-    ##       uniqueToolboxes = ['simulink', 'matlab']
-    ##       time_list = [[datetime(2020,6,16,16,30), datetime(2020,6,16,16,45)],
-    ##                    [datetime(2020,6,16,16,22), datetime(2020,6,16,18,5)]]
+    # Processes files in a pool of worker processes. Each worker writes
+    # the output of a file to a temporary directory next to the output file.
+    # The temporary outputs are appended to the output files in order of the
+    # input list, i.e. the output is identical to serial processing.
+    # The LogProcessor instance (date format, time filter) is passed to the
+    # workers (without hooks, see setHooks()).
+    # If chunkSize > 0, large files are split at points without open
+    # instances (see __findSplitPoints()), the parts are processed in
+    # parallel and their outputs are appended in order.
+    # Evicted processes (self.orphanFile) are written to temporary files as
+    # well and appended in order.
+    #
+    # Input parameters:
+    #   - files: List of log files.
+    #   - outFiles: List of output files (one for each log file).
+    #   - singlePass, workers, chunkSize: see process().
+    #   - totalStats: Statistics of process(); the statistics of each file
+    #       are added.
 
+    def __processParallel(self, files, outFiles, singlePass, workers, chunkSize, totalStats):
+        jobs = []   # [(file, outFile, splitStats, [(tmpDirectory, job), ...], cacheKey, cacheEntry), ...]
+        try:
+            with ProcessPoolExecutor(max_workers = workers) as executor:
+                for file, outFile in zip(files, outFiles):
+                    if self.fileStartHook is not None:
+                        self.fileStartHook(file)
 
-    def __processTime(self, timeVector, toolboxes):
-        
-        time_list = []
-        
-        # Determine unique toolbox names
-        tboxesFlat = [item for sublist in toolboxes for item in sublist]
-        uniqueToolboxes = list(set(tboxesFlat)) 
-        
-        # For each toolbox: Create an associated time stamp vector.
-        for toolbox in uniqueToolboxes:
-            timeTbx = []    
-                
-            cc = 0
-            
-            # Loop over all time stamps 
-            # (specifically: list of toolboxes for each time stamp)
-            for tbxList in toolboxes:
-                # If the time stamp included the current toolbox:
-                # add time stamp to toolbox time vector.
-                if toolbox in tbxList:
-                    timeTbx.append(timeVector[2*cc])   #start time
-                    timeTbx.append(timeVector[2*cc+1]) #end time
-                cc = cc + 1;
-            
-            # Detect and merge overlapping time stamps
-            timeTbx = self.__mergeTimeStamps(timeTbx)
-            
-            # Add to output vector
-            time_list.append(timeTbx)
-            
-        return uniqueToolboxes, time_list
-    
+                    # Cached result (see setResultCache())
+                    cacheKey = None
+                    if self.__useCache():
+                        cacheKey = self.__cacheKey(file)
+                        cacheEntry = self.__cacheLookup(cacheKey)
+                        if cacheEntry is not None:
+                            jobs.append((file, outFile, None, [], cacheKey, cacheEntry))
+                            continue
 
+                    # Split large files into parts [(offset, noLines), ...]
+                    splitStats = None
+                    parts = [(0, None)]
+                    if (singlePass and chunkSize > 0 and os.path.getsize(file) > chunkSize
+                            and _compression(file) is None):
+                        parts, splitStats = self.__findSplitPoints(file, chunkSize)
 
-    #######################
-    ## mergeTimeStamps()
-    #######################
-    ##
-    ## Detect and merge overlapping time stamps.
-    ##
-    ## Input:
-    ##    - timeStamps: List of time stamps. Time stamp k:
-    ##      start_time = timeStamps[2*k], end_time = timeStamps[2*k+1]
-    ##
-    ## Output:
-    ##    - mergedTimeArray: List of non-overlapping time stamps.
-    ##
-    ## Example: 
-    ##    timeStamps = [0, 4, 6, 9, 3, 7, 10, 11]
-    ##    => mergedTimeArray = [0, 9, 10, 11]
-    ##    (Works analogously if entries are of format datetime()).
+                    partJobs = []
+                    for offset, noLines in parts:
+                        tmpDirectory = tempfile.mkdtemp(prefix = ".tmp_", dir = os.path.dirname(outFile) or ".")
+                        worker = copy.copy(self)
+                        worker.setHooks()
+                        if self.orphanFile:
+                            worker.orphanFile = os.path.join(tmpDirectory, "orphans")
+                        partJobs.append((tmpDirectory,
+                                         executor.submit(_processFileWorker, worker, file,
+                                                         os.path.join(tmpDirectory, "output"),
+                                                         singlePass, offset, noLines)))
+                    jobs.append((file, outFile, splitStats, partJobs, cacheKey, None))
 
+                # Append outputs in order of input files
+                for file, outFile, splitStats, partJobs, cacheKey, cacheEntry in jobs:
+                    self.__print("---------------------------------")
+                    self.__print("Processing file " + _inputName(file) + "...")
+                    self.__print("---------------------------------")
 
-    def __mergeTimeStamps( self, timeStamps ):
-        mergedTimeArray = []   # If a non-overlapping time stamp found, it
-                            # will be added to this output array.
-        
-        if len(timeStamps) % 2 != 0:
-            print("[mergeTimeStamps] ERROR: Unexpected number of timestamp entries.")
+                    if cacheEntry is not None:
+                        report, stats = self.__cacheOutput(cacheEntry, file, outFile)
+                    else:
+                        # Output of a file to be cached is collected in a new
+                        # cache entry first
+                        destination = outFile
+                        if cacheKey is not None:
+                            tmpEntry = tempfile.mkdtemp(prefix = ".tmp_", dir = self.cacheDirectory)
+                            destination = os.path.join(tmpEntry, "output")
+
+                        stats = ProcessStats(file, outFile)
+                        for tmpDirectory, job in partJobs:
+                            report, partStats = job.result()
+                            stats.add(partStats)
+                            self.__appendOutput(os.path.join(tmpDirectory, "output"), destination)
+                            if self.orphanFile:
+                                _appendFile(os.path.join(tmpDirectory, "orphans"), self.orphanFile)
+                            shutil.rmtree(tmpDirectory)
+
+                        # Line counts of a split file from __findSplitPoints()
+                        if splitStats is not None:
+                            stats.lines = splitStats.lines
+                            stats.validLines = splitStats.validLines
+                            stats.nonTerminated = splitStats.nonTerminated
+                            stats.times['scan'] = stats.times['scan'] + splitStats.times['scan']
+                            stats.wallTime = stats.wallTime + splitStats.wallTime
+                            report = splitStats.report()
+                        if cacheKey is not None:
+                            self.__cacheOutput(self.__cacheStore(tmpEntry, cacheKey, report, stats), file, outFile)
+
+                    self.__print(report, end = "")
+                    self.__print("Output file: " + outFile)
+                    self.__fileDone(stats, totalStats)
+        finally:
+            for file, outFile, splitStats, partJobs, cacheKey, cacheEntry in jobs:
+                for tmpDirectory, job in partJobs:
+                    shutil.rmtree(tmpDirectory, ignore_errors = True)
+
+
+    # ==========================
+    # __processCached()
+    # ==========================
+
+    # Processes a file with the result cache (see setResultCache()): the
+    # cached output is appended to outputFile, or the file is processed, its
+    # output saved in the cache and appended to outputFile. Returns the
+    # statistics of the file.
+
+    def __processCached(self, inputFile, outputFile, singlePass):
+        if not self.__useCache():
+            return self.processFile(inputFile, outputFile, singlePass)
+
+        cacheKey = self.__cacheKey(inputFile)
+        cacheEntry = self.__cacheLookup(cacheKey)
+        if cacheEntry is None:
+            tmpEntry = tempfile.mkdtemp(prefix = ".tmp_", dir = self.cacheDirectory)
+            report, stats = _processFileWorker(self, inputFile, os.path.join(tmpEntry, "output"),
+                                               singlePass, 0, None)
+            stats.outputFile = outputFile
+            cacheEntry = self.__cacheStore(tmpEntry, cacheKey, report, stats)
+            self.__print(report, end = "")
+            self.__cacheOutput(cacheEntry, inputFile, outputFile)
+        else:
+            report, stats = self.__cacheOutput(cacheEntry, inputFile, outputFile)
+            self.__print(report, end = "")
+        return stats
+
+
+    # ==========================
+    # __useCache()
+    # ==========================
+
+    # True if the result cache is used: active, evicted processes are not
+    # reported (orphan reports cannot be replayed) and no deduplication (the
+    # output of a file depends on the previous files).
+
+    def __useCache(self):
+        return (bool(self.cacheDirectory) and not self.orphanFile and self.orphanCallback is None
+                and self.dedupIndex is None)
+
+
+    # ==========================
+    # __cacheKey()
+    # ==========================
+
+    # Returns the key of the cached result of an input file: hash of the
+    # file (path, size and modification time, or content; of each file for
+    # merged input) and the configuration of the processor.
+
+    def __cacheKey(self, inputFile):
+        writer = self.outputWriter
+        config = (RESULT_CACHE_VERSION, self.dateFormat,
+                  self.timeFilter, self.filterStart, self.filterEnd,
+                  self.timeWindows, self.windowOutput,
+                  self.maxSessionAge, self.maxOpenProcesses,
+                  self.concurrencyBucket, self.concurrencyOrigin,
+                  getattr(writer, '__module__', ""), getattr(writer, '__qualname__', repr(writer)))
+
+        fingerprint = []
+        for fileName in (inputFile if isinstance(inputFile, list) else [inputFile]):
+            if self.cacheContentHash:
+                fingerprint.append((os.path.getsize(fileName), _fileHash(fileName)))
+            else:
+                status = os.stat(fileName)
+                fingerprint.append((os.path.abspath(fileName), status.st_size, status.st_mtime_ns))
+
+        return hashlib.sha1(repr((fingerprint, config)).encode()).hexdigest()
+
+
+    # ==========================
+    # __cacheLookup()
+    # ==========================
+
+    # Returns the cache entry (directory) of a key, or None. The entry is
+    # marked as used (modification time, see __cacheEvict()).
+
+    def __cacheLookup(self, cacheKey):
+        cacheEntry = os.path.join(self.cacheDirectory, cacheKey)
+        if not os.path.exists(os.path.join(cacheEntry, "stats")):
+            return None
+        os.utime(cacheEntry)
+        return cacheEntry
+
+
+    # ==========================
+    # __cacheStore()
+    # ==========================
+
+    # Saves a new cache entry: tmpEntry (a directory in the cache directory
+    # with the output "output...") is renamed to the entry of cacheKey. The
+    # report and the statistics (ProcessStats) of the file are saved with
+    # the output. Returns the entry.
+
+    def __cacheStore(self, tmpEntry, cacheKey, report, stats):
+        with open(os.path.join(tmpEntry, "report"), 'w') as writeFile:
+            writeFile.write(report)
+        with open(os.path.join(tmpEntry, "stats"), 'wb') as writeFile:
+            pickle.dump(stats, writeFile)
+
+        cacheEntry = os.path.join(self.cacheDirectory, cacheKey)
+        shutil.rmtree(cacheEntry, ignore_errors = True)
+        os.replace(tmpEntry, cacheEntry)
+
+        self.__cacheEvict(cacheEntry)
+        return cacheEntry
+
+
+    # ==========================
+    # __cacheEvict()
+    # ==========================
+
+    # Deletes the least recently used cache entries while the size of the
+    # cache exceeds self.cacheMaxSize. The entry 'keep' (the new entry) is
+    # not deleted.
+
+    def __cacheEvict(self, keep):
+        if self.cacheMaxSize is None:
             return
+
+        entries = []
+        totalSize = 0
+        for name in os.listdir(self.cacheDirectory):
+            cacheEntry = os.path.join(self.cacheDirectory, name)
+            if name.startswith(".tmp_") or not os.path.isdir(cacheEntry):
+                continue
+            size = _directorySize(cacheEntry)
+            entries.append((os.path.getmtime(cacheEntry), cacheEntry, size))
+            totalSize = totalSize + size
+
+        maxSize = self.cacheMaxSize * 1024 * 1024
+        for usedTime, cacheEntry, size in sorted(entries):
+            if totalSize <= maxSize:
+                break
+            if cacheEntry != keep:
+                shutil.rmtree(cacheEntry, ignore_errors = True)
+                totalSize = totalSize - size
+
+
+    # ==========================
+    # __cacheOutput()
+    # ==========================
+
+    # Appends the output of a cache entry to outputFile (via a temporary
+    # copy, see __appendOutput()). Returns the saved report and statistics;
+    # the times of the statistics are replaced by the time of the copy.
+
+    def __cacheOutput(self, cacheEntry, inputFile, outputFile):
+        startTime = perf_counter()
+        tmpDirectory = tempfile.mkdtemp(prefix = ".tmp_", dir = os.path.dirname(outputFile) or ".")
+        try:
+            for name in os.listdir(cacheEntry):
+                if name.startswith("output"):
+                    if os.path.isdir(os.path.join(cacheEntry, name)):
+                        shutil.copytree(os.path.join(cacheEntry, name), os.path.join(tmpDirectory, name))
+                    else:
+                        shutil.copyfile(os.path.join(cacheEntry, name), os.path.join(tmpDirectory, name))
+            self.__appendOutput(os.path.join(tmpDirectory, "output"), outputFile)
+        finally:
+            shutil.rmtree(tmpDirectory, ignore_errors = True)
+
+        with open(os.path.join(cacheEntry, "report"), 'r') as readFile:
+            report = readFile.read() + "\tResult from cache.\n"
+        with open(os.path.join(cacheEntry, "stats"), 'rb') as readFile:
+            stats = pickle.load(readFile)
+
+        stats.inputFile = inputFile
+        stats.outputFile = outputFile
+        stats.cached = 1
+        stats.times = dict.fromkeys(STAGES, 0.0)
+        stats.times['write'] = perf_counter() - startTime
+        stats.wallTime = stats.times['write']
+        return report, stats
+
+
+    # ==========================
+    # __findSplitPoints()
+    # ==========================
+
+    # Scans a log file for points where a file can be split, i.e. END lines
+    # after which no valid process is open (noInstances == 0 in
+    # __processData()). The parts between split points can be processed
+    # independently and their outputs concatenated. Split points are found
+    # as in class LogStream: Each END line is a candidate, a candidate is void
+    # if a process open at the candidate is terminated later, and final if all
+    # processes open at the candidate are resolved. Lines are only split at
+    # ',' (no time stamps are parsed).
+    #
+    # Input parameters:
+    #   - inputFile: Name of log file.
+    #   - chunkSize: Minimum size of a part (in bytes).
+    #
+    # Output parameters:
+    #   - parts: List of parts [(byte offset, number of lines), ...]. The
+    #       number of lines of the last part is None (= until end of file).
+    #   - stats: Line counts of the file and scan time (ProcessStats).
+
+    def __findSplitPoints(self, inputFile, chunkSize):
+
+        startTime = perf_counter()
+        openMap = OrderedDict()   # {processID: offset of START line}, oldest first.
+        candidates = []           # Candidate split points [offset, lineNumber]
+        splits = [(0, 0)]         # Final split points (offset, lineNumber)
+        candidateGap = max(chunkSize // 16, 1)    # Minimum distance of candidates
+        offset = 0
+        lineNumber = 0
+        validLines = 0
+
+        with open(inputFile, 'rb') as readFile:
+            for line in readFile:
+                lineOffset = offset
+                offset = offset + len(line)
+                lineNumber = lineNumber + 1
+
+                if line.startswith(b'$START'):
+                    substr = line.split(b',', 3)
+                    if len(substr) < 3:        # missing fields (as in lineRecords())
+                        continue
+                    processID = substr[1]
+                    if processID in openMap:
+                        del openMap[processID]
+                    openMap[processID] = lineOffset
+
+                elif line.startswith(b'$END'):
+                    substr = line.split(b',', 6)
+                    if len(substr) < 6:
+                        continue
+                    startOffset = openMap.pop(substr[1], None)
+                    if startOffset is None:
+                        continue
+                    validLines = validLines + 2
+
+                    while candidates and candidates[-1][0] > startOffset:
+                        candidates.pop()
+                    lastOffset = candidates[-1][0] if candidates else splits[-1][0]
+                    if offset - lastOffset >= candidateGap:
+                        candidates.append((offset, lineNumber))
+
+                    # Final candidates: before the START of the oldest open process
+                    horizon = next(iter(openMap.values())) if openMap else offset + 1
+                    noFinal = 0
+                    for candidate in candidates:
+                        if candidate[0] >= horizon:
+                            break
+                        if candidate[0] - splits[-1][0] >= chunkSize:
+                            splits.append(candidate)
+                        noFinal = noFinal + 1
+                    del candidates[:noFinal]
+
+        # End of file: all remaining candidates are final
+        for candidate in candidates:
+            if candidate[0] - splits[-1][0] >= chunkSize:
+                splits.append(candidate)
+        if len(splits) > 1 and splits[-1][0] == offset:
+            splits.pop()
+
+        parts = []
+        for cc in range(len(splits)):
+            if cc + 1 < len(splits):
+                parts.append((splits[cc][0], splits[cc+1][1] - splits[cc][1]))
+            else:
+                parts.append((splits[cc][0], None))
+
+        stats = ProcessStats(inputFile)
+        stats.lines = lineNumber
+        stats.validLines = validLines
+        stats.nonTerminated = len(openMap)
+        stats.times['scan'] = perf_counter() - startTime
+        stats.wallTime = stats.times['scan']
+
+        return parts, stats
+
+
+    # ==========================
+    # __streamData()
+    # ==========================
+
+    # Single-pass data processing of an input file. START/END lines are
+    # paired while reading (see class LogStream), groups of overlapping
+    # instances are written to the output file as soon as they are final.
+    #
+    # Input parameters:
+    #   - inputFile: name of input file.
+    #   - outputFile: name of output file.
+    #   - offset, noLines: see processFile().
+
+    def __streamData(self, inputFile, outputFile, offset = 0, noLines = None):
+
+        position = [0]
+        with self.__readRecords(inputFile, position, offset = offset, noLines = noLines) as records:
+            with self.__openWriter(outputFile) as writer:
+
+                def flush(timeVector, toolboxes, licenseNo, version):
+                    self.__writeOutput(writer, timeVector, toolboxes, licenseNo, version)
+
+                with self.__orphanWriter() as orphan:
+                    stream = LogStream(self, flush, orphan)
+                    stream.feedRecords(records, position)
+                    noOpen = len(stream.openMap)
+                    stream.finish()
+
+        stats = self.__stats
+        stats.lines = stream.lineNumber
+        stats.validLines = stream.validLines
+        stats.nonTerminated = noOpen + stream.noEvicted
+        stats.evicted = stream.noEvicted
+        stats.duplicates = stream.noDuplicates
+        stats.maxOpen = stream.maxOpen
+        stats.maxBuffered = stream.maxBuffered
+        self.__print(stats.report(), end = "")
+
+
+    # ==========================
+    # __tailData()
+    # ==========================
+
+    # Incremental processing of a growing log file. The state of the
+    # processing (byte offset, open processes and buffered instances, see
+    # LogStream.getState()) is saved to checkpointFile after each call and
+    # restored by the next call. Only complete lines are processed. Groups
+    # of instances that are not final yet are kept in the checkpoint, i.e.
+    # the output of all calls is the output of processing the whole file at
+    # once (except for groups blocked by non-terminated processes).
+    #
+    # Log rotation/truncation is detected if the file (device, inode)
+    # changed, the file is smaller than the checkpoint offset, or the first
+    # bytes of the file changed. In that case the stream of the checkpoint
+    # is finished (buffered instances are written, open processes are
+    # non-terminated and reported as orphans, reason "log rotated") and the
+    # file is read from the start by a new stream.
+    #
+    # Input parameters:
+    #   - inputFile: name of input file.
+    #   - outputFile: name of output file.
+    #   - checkpointFile: name of checkpoint file.
+
+    def __tailData(self, inputFile, outputFile, checkpointFile):
+
+        config = (CHECKPOINT_VERSION, self.dateFormat, self.timeFilter, self.filterStart, self.filterEnd,
+                  self.timeWindows, self.windowOutput, self.concurrencyBucket, self.concurrencyOrigin)
+
+        if _compression(inputFile) is not None:
+            self.__stats.errors = self.__stats.errors + 1
+            print("ERROR: Compressed file " + inputFile + " cannot be processed incrementally (checkpointDirectory).")
+            return
+
+        checkpoint = None
+        if os.path.exists(checkpointFile):
+            with open(checkpointFile, 'rb') as readFile:
+                checkpoint = pickle.load(readFile)
+            if checkpoint['config'] != config:
+                self.__stats.errors = self.__stats.errors + 1
+                print("ERROR: Checkpoint " + checkpointFile + " was saved with a different version,")
+                print("date format, time filter/windows or concurrency. Delete the checkpoint to reprocess the file.")
+                return
+
+        with open(inputFile, 'rb') as readFile:
+            with self.__openWriter(outputFile) as writer:
+
+                def flush(timeVector, toolboxes, licenseNo, version):
+                    self.__writeOutput(writer, timeVector, toolboxes, licenseNo, version)
+
+                with self.__orphanWriter() as orphan:
+                    fileInfo = os.fstat(readFile.fileno())
+                    stream = LogStream(self, flush, orphan)
+                    offset = 0
+                    noRotated = 0
+
+                    if checkpoint:
+                        stream.setState(checkpoint['stream'])
+                        offset = checkpoint['offset']
+                        if (checkpoint['inode'] != (fileInfo.st_dev, fileInfo.st_ino)
+                                or fileInfo.st_size < offset
+                                or _fileHead(readFile, checkpoint['headSize']) != checkpoint['head']):
+                            self.__print("\tLog file rotated or truncated. Reading from start.")
+                            noRotated = len(stream.openMap)
+                            stream.finish("log rotated")
+                            stream = LogStream(self, flush, orphan)
+                            offset = 0
+
+                    lineNumber = stream.lineNumber
+                    validLines = stream.validLines
+
+                    readFile.seek(offset)
+                    position = [offset]
+                    noEvicted = stream.noEvicted
+                    noDuplicates = stream.noDuplicates
+                    stream.feed(_completeLines(readFile, position))
+                    offset = position[0]
+
+                headSize = min(offset, CHECKPOINT_HEAD_SIZE)
+                head = _fileHead(readFile, headSize)
+
+        # Save checkpoint (after the output file is closed)
+        checkpoint = {'file': os.path.abspath(inputFile),
+                      'inode': (fileInfo.st_dev, fileInfo.st_ino),
+                      'offset': offset,
+                      'headSize': headSize,
+                      'head': head,
+                      'config': config,
+                      'stream': stream.getState()}
+        with open(checkpointFile + ".tmp", 'wb') as saveFile:
+            pickle.dump(checkpoint, saveFile)
+        os.replace(checkpointFile + ".tmp", checkpointFile)
+
+        stats = self.__stats
+        stats.incremental = True
+        stats.lines = stream.lineNumber - lineNumber
+        stats.validLines = stream.validLines - validLines
+        stats.openProcesses = len(stream.openMap)
+        stats.nonTerminated = noRotated + stream.noEvicted - noEvicted
+        stats.evicted = stream.noEvicted - noEvicted
+        stats.duplicates = stream.noDuplicates - noDuplicates
+        stats.maxOpen = stream.maxOpen
+        stats.maxBuffered = stream.maxBuffered
+        self.__print(stats.report(), end = "")
+
+        # Without maximum session age, an open process blocks the output of
+        # all later instances (kept in the checkpoint)
+        if self.maxSessionAge is None and stream.openMap and stream.noBuffered:
+            processID, (startLine, startTime) = next(iter(stream.openMap.items()))
+            newestTime = max([partition.timeVector[-1] for partition in stream.partitions.values()
+                              if partition.timeVector], default = startTime)
+            if newestTime - startTime > CHECKPOINT_BLOCKING_AGE * 60:
+                print("WARNING: Process " + str(processID) + " (START " + self.formatTime(startTime)
+                      + ") is open and blocks the output of " + str(stream.noBuffered)
+                      + " instances in checkpoint " + checkpointFile + ".")
+                print("Set a maximum session age (setOrphanEviction()) to evict non-terminated processes.")
+
+
+    # ==========================
+    # __readRecords()
+    # ==========================
+
+    # Context manager providing the records of the $START/$END lines of an
+    # input file (see lineRecords()): read by LogScanner (byte reader) if
+    # possible (see setByteReader()), otherwise as text.
+    #
+    # Input parameters:
+    #   - inputFile: name of input file (or list of files, see processFile()).
+    #   - position: see lineRecords().
+    #   - lineValid: If given, only records of lines with
+    #       lineValid[line number] != 0 (bytearray).
+    #   - offset, noLines: see processFile().
+
+    @contextlib.contextmanager
+    def __readRecords(self, inputFile, position, lineValid = None, offset = 0, noLines = None):
+        if self.__useByteReader(inputFile):
+            yield LogScanner(inputFile, offset, noLines).records(position, lineValid)
+            return
+
+        with _openLog(inputFile) as readFile:
+            if offset:
+                readFile.seek(offset)
+            if noLines is not None:
+                readFile = islice(readFile, noLines)
+            yield lineRecords(readFile, position, lineValid)
+
+
+    # ==========================
+    # __useByteReader()
+    # ==========================
+
+    # True if inputFile is read by the byte reader (class LogScanner).
+
+    def __useByteReader(self, inputFile):
+        return self.byteReader and LogScanner.supports(inputFile)
+
+
+    # ==========================
+    # __orphanWriter()
+    # ==========================
+
+    # Context manager providing the function orphan(processID, startTime,
+    # reason) passed to LogStream: evicted processes are appended to
+    # self.orphanFile and/or passed to self.orphanCallback. Provides None if
+    # neither is defined.
+
+    @contextlib.contextmanager
+    def __orphanWriter(self):
+        if not self.orphanFile and self.orphanCallback is None:
+            yield None
+            return
+
+        with contextlib.ExitStack() as stack:
+            writeFile = None
+            if self.orphanFile:
+                writeFile = stack.enter_context(open(self.orphanFile, 'a'))
+
+            def orphan(processID, startTime, reason):
+                if writeFile is not None:
+                    writeFile.write(processID + ", " + self.formatTime(startTime) + ", " + reason + "\n")
+                if self.orphanCallback is not None:
+                    self.orphanCallback(processID, toDatetime(startTime), reason)
+
+            yield orphan
+
+
+    # =============================
+    # determineValidEntries()
+    # =============================
+
+    # Checks for valid entries in log file. Valid entries correspond to processes,
+    # which have both a $START and $END entry in the log file.
+    # (Processes which e.g. are not properly terminated are sorted out)
+    # The file is read by LogScanner.validEntries() if possible.
+    #
+    # Input paramter:
+    #   fileName: Name of log file
+    # Output parameters:
+    #   validLines: Vector (array) with line numbers of valid lines, e.g. [1, 2, 4, 5, 6]
+    #   numberLines: The total number of lines in input log file. 
+    #   licenses: Dict {line number of valid START line: (licenseNo, version)}
+    #       with license number and version of the process (from its END line).
+
+    def __determineValidEntries( self, fileName ):
+
+        startTime = perf_counter()
+        openDict = {}    # Dictionary that contains <processID, lineNumber> for a start process.
+        validLines = array('q')  # Lines numbers of valid lines in file
+        licenses = {}    # License number and version for valid START lines
+        licenseKeys = {} # Interned (licenseNo, version) tuples, shared by all lines
+
+
+        if self.__useByteReader(fileName):
+            validLines, lineNumber, licenses, noOpen = LogScanner(fileName).validEntries()
+        else:
+            with _openLog(fileName) as readFile:
+                lineNumber = 0
+                for line in readFile:
+                    # ------------------------------------------------------------
+                    # START line found => add {processID: lineNumber} to openDict
+                    # ------------------------------------------------------------
+                    if line.startswith('$START'):
+                        # Get process ID (lines with missing fields are skipped)
+                        substr = line.split(',', 3)
+                        # Add {processID: lineNumber} entry to openDict
+                        if len(substr) > 2:
+                            openDict[substr[1]] = lineNumber
+
+                    # ------------------------------------------------------    
+                    # END line found:
+                    #     - Check if start entry for processID exists
+                    #     - Add line of START and END entry to 'validLines'
+                    #     - Delete START entry from dict openDict
+                    # ------------------------------------------------------
+                    elif line.startswith("$END"):
+                        # Check if process ID for END process has a corresponding start time
+                        # i.e. check if processID entry exists in openDict
+                        substr = line.rstrip('\n').split(',')
+                        processID = substr[1] if len(substr) > 5 else None
+                        if processID in openDict:
+                            validLines.append(openDict[processID])
+                            validLines.append(lineNumber)
+                            licenseKey = (substr[2], substr[3])
+                            licenses[openDict[processID]] = licenseKeys.setdefault(licenseKey, licenseKey)
+                            del openDict[processID]
+
+                    lineNumber = lineNumber + 1
+            noOpen = len(openDict)
+
+        numberLines = lineNumber
         
-        noElements = int(len(timeStamps)/2)   # Total number of timestamps
-        indices = range(0, noElements)        # Indices for loop over timestamps
-        activeElements = [True] * noElements  # Indicates, which timestamp elements are yet unprocessed
-        
-        # Select first element to be processed
-        element = [timeStamps[0], timeStamps[1]]
-        activeElements[0] = False              
-        
-        # While there are still unprocessed elements in timeStamps vector
-        while any(activeElements):   
-            afterMerge = False 
-            
-            # Check timeStamp 'element' for overlap with all other (active)
-            # elements of timeStamp vector.
-            for n in [idx for idx in indices if activeElements[idx]]:
-                
-                timePair = [timeStamps[2*n], timeStamps[2*n + 1]]
-                
-                # If overlap found => merge time stamps
-                if not (timePair[0] > element[1] or timePair[1] < element[0]):
-                    element = [min(element[0], timePair[0]), max(element[1], timePair[1])]
-                    activeElements[n] = False
-                    afterMerge = True
-                    break            # The test will start over with the new merged element
-            
-            # If no overlap with any other time interval found:
-            # Add element to output array, and set the next unprocessed timeStamp as the
-            # element to be processed.
-            if not afterMerge:
-                mergedTimeArray = mergedTimeArray + element
-                
-                idx = activeElements.index(True)
-                element = [timeStamps[2*idx], timeStamps[2*idx+1]]
-        
-        # All elements have been processed, add last element to output array.
-        mergedTimeArray = mergedTimeArray + element
+        stats = self.__stats
+        stats.lines = lineNumber
+        stats.validLines = len(validLines)
+        stats.nonTerminated = noOpen
+        stats.times['scan'] = stats.times['scan'] + perf_counter() - startTime
+        self.__print(stats.report(), end = "")
         
-        return mergedTimeArray
\ No newline at end of file
+        return validLines, numberLines, licenses
+
+
+    # ==========================
+    # __processData()
+    # ==========================
+
+    # Data porcessing of an input file. Combines start end times to
+    # time ranges and writes output file. The actual processing function
+    # for a given input file.
+    #
+    # Input paramters: 
+    #   - inputFile: name of input file.
+    #   - outputFile: name of output file
+    #   - valid lines: a vector with indices of valid lines in inputFile.
+    #       (output of _determineValidEntries)
+    #   - numberLines: number of lines in inputFile.
+    #       (output of _determineValidEntries)
+    #   - licenses: license number and version of valid START lines.
+    #       (output of _determineValidEntries)
+    #
+    # Instances are partitioned by license number and version. Each
+    # partition is processed and written when its last open instance is
+    # closed.
+
+    def __processData(self, inputFile, outputFile, validLines, numberLines, licenses):
+
+        # Create a byte array with each entry representing a line of input file
+        # and 0 = will not be processed, 1 = will be processed.
+        lineValid = bytearray(numberLines)
+        for idx in validLines:
+            lineValid[idx] = 1
+
+        if self.timeFilter:
+            filterStart = toMinutes(self.filterStart)
+            filterEnd = toMinutes(self.filterEnd)
+
+        # Initialize variables
+        timeMap = {}         # Map, saves {ProcessID: time}.
+                             # Process IDs see _processKey(),
+                             # times are minutes since EPOCH (see parseLogTime()).
+        partitions = {}      # Map, saves {(licenseNo, version): [noInstances, timeVector, toolboxIds, windows]}
+                             # noInstances: Counts how many instances are open at the same time.
+                             # timeVector: Vector (array) to capture time stamps of an instance/ process.
+                             # Instance(k): start time = timeVector[2k], end time = timeVector[2k+1]
+                             # toolboxIds: Vector (array) to capture toolboxes for instance/process.
+                             # Instance(k): toolbox field = toolboxDictionary.fields[toolboxIds[k]]
+                             # windows: Time window of each instance (time windows only, else None)
+        toolboxDictionary = ToolboxDictionary()
+        toolboxIds = toolboxDictionary.ids
+
+        # Partitions temporarily save data for overlapping instances. Once the last of 
+        # possibly several open instances of a partition is closed, the data is processed,
+        # written to output file and the partition is deleted.
+
+        stats = self.__stats
+        maxOpen = 0          # Peak size of timeMap
+        noBuffered = 0       # Number of instances in partitions
+        maxBuffered = 0
+
+        position = [0]
+        with self.__readRecords(inputFile, position, lineValid) as records:
+            with self.__openWriter(outputFile) as writer:
+
+                # Loop over the records of the valid lines (see lineRecords())
+                for lineNumber, processID, timeStamp, licenseKey, toolboxField in records:
+
+                    # ------------------------------------------------------------
+                    # START line found:
+                    #     - add {processID: start time} to timeMap dict.
+                    # ------------------------------------------------------------
+                    if licenseKey is None:
+
+                        # Add process ID and time stamp to dict
+                        timeMap[processID] = timeStamp
+                        if len(timeMap) > maxOpen:
+                            maxOpen = len(timeMap)
+
+                        # Increase number of active instances of the partition
+                        partition = partitions.get(licenses[lineNumber])
+                        if partition is None:
+                            partition = [0, array('q'), array('i'), array('i') if self.timeWindows else None]
+                            partitions[licenses[lineNumber]] = partition
+                        partition[0] = partition[0] + 1
+
+                    # -----------------------------------------------------
+                    # END line found:
+                    #    - Add [start, end time] of process to timeVector
+                    #    - Add toolboxes of process to toolboxes
+                    #    Interpretation:
+                    #    timeVector[2n], timeVector[2n+1] is the start/end time
+                    #    of a process with toolboxes toolboxes[n].
+                    # If the last active instance of the partition:
+                    #    - Process time stamps and write output data
+                    # -----------------------------------------------------
+
+                    else:
+
+                        # Get data
+                        licenseNo, version = licenseKey      # License Number, Software Version
+                        endTime = timeStamp                  # End time of process/instance
+                        if endTime is None:
+                            raise ValueError("Invalid time stamp of END line (line number = " + str(lineNumber) + ")")
+                        tbox = toolboxIds.get(toolboxField)  # Id of toolboxes
+                        if tbox is None:
+                            tbox = toolboxDictionary.add(toolboxField)
+
+                        # Get start time for process (from timeMap)
+                        if not processID in timeMap:
+                            stats.errors = stats.errors + 1
+                            self.__print("ERROR: (line number = " + str(lineNumber) + ")" )
+                            self.__print("No start time found for the end timestamp.")
+                            continue
+                        else:
+                            startTime = timeMap[processID]
+
+                        partition = partitions[(licenseNo, version)]
+                        timeVector = partition[1]
+                        toolboxes = partition[2]
+                        noInstances = len(toolboxes)
+
+                        # Add start/end time and toolboxes    
+
+                        # Time windows => add the part of the process within
+                        # each overlapping window
+                        if self.timeWindows:
+                            for window in self.overlappingWindows(startTime, endTime):
+                                windowStart, windowEnd = self.timeWindows[window]
+                                timeVector.append(max(startTime, windowStart))
+                                timeVector.append(min(endTime, windowEnd))
+                                toolboxes.append(tbox)
+                                partition[3].append(window)
+
+                        # If time filter active => add only processed that fall within
+                        # filter time. 
+                        elif self.timeFilter:
+                            if startTime < filterEnd and endTime > filterStart:
+                                # Time range lies within filter time range
+                                startTime = max(startTime, filterStart)
+                                endTime = min(endTime, filterEnd) 
+                                
+                                timeVector.append(startTime)
+                                timeVector.append(endTime)
+                                toolboxes.append(tbox)
+                                
+                        # No time filter active => add all times        
+                        else: 
+                            timeVector.append(startTime)
+                            timeVector.append(endTime)
+
+                            toolboxes.append(tbox)
+                        
+                        # Delete start time entry from dict
+                        del timeMap[processID]
+
+                        noBuffered = noBuffered + len(toolboxes) - noInstances
+                        if noBuffered > maxBuffered:
+                            maxBuffered = noBuffered
+
+                        # One instance closed by "END" => decrease active instance counter
+                        partition[0] = partition[0] - 1
+
+                        # ---------------------------------------------------
+                        # If last active instance: process & output data
+                        # ---------------------------------------------------
+                        if partition[0] == 0:
+                            
+                            self.__writeOutput(writer, timeVector, toolboxDictionary.decode(toolboxes, partition[3]),
+                                               licenseNo, version)
+                                
+                            # Clean temporary data
+                            noBuffered = noBuffered - len(toolboxes)
+                            del partitions[(licenseNo, version)]
+
+        stats.maxOpen = maxOpen
+        stats.maxBuffered = maxBuffered
+
+
+
+    # ==========================
+    # __writeOutput()
+    # ==========================
+
+    # Processes the time stamps of a group of overlapping instances and
+    # writes the resulting rows to the output.
+    #
+    # Input parameters:
+    #   - writer: output writer (see setOutputWriter()).
+    #   - timeVector, toolboxes: start/end times (minutes since EPOCH) and
+    #       toolboxes of the instances (see __processTime()).
+    #   - licenseNo, version: License number and version written to output.
+
+    def __writeOutput(self, writer, timeVector, toolboxes, licenseNo, version):
+        times = self.__stats.times
+
+        if self.timeWindows:
+            # Time windows: toolboxes[k] = (window, toolboxes of instance k).
+            # The instances of each window are merged separately.
+            windowInstances = {}    # {window: [timeVector, toolboxes]}
+            for cc in range(len(toolboxes)):
+                window, tbox = toolboxes[cc]
+                instances = windowInstances.get(window)
+                if instances is None:
+                    instances = [[], []]
+                    windowInstances[window] = instances
+                instances[0].append(timeVector[2*cc])
+                instances[0].append(timeVector[2*cc+1])
+                instances[1].append(tbox)
+
+            for window in sorted(windowInstances):
+                startTime = perf_counter()
+                if self.concurrencyBucket is not None:
+                    self.__countConcurrency(*windowInstances[window], licenseNo, version)
+                windowToolboxes, timeVectors = self.__processTime(*windowInstances[window])
+                mergeTime = perf_counter()
+                writer.write(licenseNo, version, windowToolboxes, timeVectors,
+                             window = self.timeWindows[window][0])
+                times['merge'] = times['merge'] + mergeTime - startTime
+                times['write'] = times['write'] + perf_counter() - mergeTime
+            return
+
+        startTime = perf_counter()
+        if self.concurrencyBucket is not None:
+            self.__countConcurrency(timeVector, toolboxes, licenseNo, version)
+        toolboxes, timeVectors = self.__processTime(timeVector, toolboxes)
+        mergeTime = perf_counter()
+        writer.write(licenseNo, version, toolboxes, timeVectors)
+        times['merge'] = times['merge'] + mergeTime - startTime
+        times['write'] = times['write'] + perf_counter() - mergeTime
+
+
+    # ==========================
+    # __openWriter()
+    # ==========================
+
+    # Opens the output writer of an output file (self.outputWriter, or a
+    # WindowWriter for time windows with output "files").
+
+    def __openWriter(self, outputFile):
+        if self.timeWindows and self.windowOutput == "files":
+            return WindowWriter(self, outputFile)
+        return self.outputWriter(self, outputFile)
+
+
+    # ==========================
+    # __appendOutput()
+    # ==========================
+
+    # Appends a temporary output to outputFile (see __processParallel()).
+    # For time windows with output "files", the output of each window is
+    # appended to the output file of the window. The concurrency output (see
+    # setConcurrency()) is appended to the concurrency file of outputFile.
+
+    def __appendOutput(self, tmpOutput, outputFile):
+        if self.timeWindows and self.windowOutput == "files":
+            for windowStart in self.windowStarts:
+                tmpWindowOutput = windowFileName(tmpOutput, windowStart)
+                if os.path.exists(tmpWindowOutput):
+                    self.outputWriter.appendOutput(tmpWindowOutput, windowFileName(outputFile, windowStart))
+        else:
+            self.outputWriter.appendOutput(tmpOutput, outputFile)
+
+        if self.concurrencyBucket is not None:
+            _appendFile(concurrencyFileName(tmpOutput), concurrencyFileName(outputFile))
+
+
+    # ==========================
+    # __countConcurrency()
+    # ==========================
+
+    # Adds the concurrency of a group of overlapping instances to
+    # self.__concurrency (see setConcurrency()). For each toolbox, the
+    # start (+1) and end (-1) events of its instances are sorted; between
+    # two events the number of seats in use is constant. Each such segment
+    # adds its seat time to the buckets it overlaps and raises their peak.
+    # Instances are half-open [start, end): an instance ending when another
+    # one starts does not overlap it. Groups of different flushes do not
+    # overlap in time (log lines are in order of time), i.e. the peak of a
+    # bucket is the maximum over its groups.
+    #
+    # Input parameters:
+    #   - timeVector, toolboxes: see __processTime().
+    #   - licenseNo, version: License number and version of the group.
+
+    def __countConcurrency(self, timeVector, toolboxes, licenseNo, version):
+        bucketSize = self.concurrencyBucket
+        origin = self.concurrencyOrigin
+        concurrency = self.__concurrency
+
+        # Events {toolbox: [(time, +1/-1), ...]}
+        events = {}
+        for cc in range(len(toolboxes)):
+            startTime = timeVector[2*cc]
+            endTime = timeVector[2*cc+1]
+            if endTime <= startTime:
+                continue
+            for toolbox in set(toolboxes[cc]):
+                toolboxEvents = events.get(toolbox)
+                if toolboxEvents is None:
+                    toolboxEvents = []
+                    events[toolbox] = toolboxEvents
+                toolboxEvents.append((startTime, 1))
+                toolboxEvents.append((endTime, -1))
+
+        for toolbox, toolboxEvents in events.items():
+            toolboxEvents.sort()     # End (-1) before start (+1) at the same time
+            seats = 0
+            for cc in range(len(toolboxEvents) - 1):
+                time, step = toolboxEvents[cc]
+                seats = seats + step
+                nextTime = toolboxEvents[cc+1][0]
+                if seats == 0 or nextTime == time:
+                    continue
+
+                # Segment [time, nextTime) with 'seats' seats in use
+                bucket = (time - origin) // bucketSize
+                while time < nextTime:
+                    endTime = min(nextTime, origin + (bucket + 1) * bucketSize)
+                    key = (licenseNo, version, toolbox, bucket)
+                    count = concurrency.get(key)
+                    if count is None:
+                        concurrency[key] = [seats, seats * (endTime - time)]
+                    else:
+                        if seats > count[0]:
+                            count[0] = seats
+                        count[1] = count[1] + seats * (endTime - time)
+                    time = endTime
+                    bucket = bucket + 1
+
+
+    # ==========================
+    # __writeConcurrency()
+    # ==========================
+
+    # Appends the concurrency of the processed file (self.__concurrency) to
+    # fileName:
+    #    License, Version, Toolbox, Bucket start, Peak, Average
+    # Average is the seat time in the bucket divided by the bucket size.
+
+    def __writeConcurrency(self, fileName):
+        concurrency = self.__concurrency
+        if not concurrency:
+            return
+
+        bucketSize = self.concurrencyBucket
+        with open(fileName, 'a') as writeFile:
+            for key in sorted(concurrency):
+                licenseNo, version, toolbox, bucket = key
+                peak, seatTime = concurrency[key]
+                writeFile.write(licenseNo + ", " + version + ", " + toolbox + ", "
+                                + self.formatTime(self.concurrencyOrigin + bucket * bucketSize) + ", "
+                                + str(peak) + ", " + '{:.4f}'.format(seatTime / bucketSize) + "\n")
+        self.__concurrency = {}
+
+
+    ####################
+    ## __processTime()
+    ####################
+    ##
+    ## Converts a list of time stamps and associated toolboxes
+    ## to a list of unique time stamps for each toolbox.
+    ##
+    ## Input parameters:
+    ##    - timeVector: Vector of start/end times. Time stamp k
+    ##        is formed by:
+    ##                  start_time(k) = timeVector[2k]
+    ##                  end_time(k) = timeVector[2k+1]
+    ##    - toolboxes: List of toolboxes associated with a time stamp.
+    ##      List of toolboxes associated with time stamp k:
+    ##      toolboxes[k]
+    ##
+    ## Output parameters:
+    ##    - uniqueToolboxes: List of unique toolbox names (in order of first
+    ##      occurrence in toolboxes).
+    ##    - time_list: List of start/end times vectors. 
+    ##      time_list[k] is the start/end time vector for 
+    ##      toolbox uniqueToolboxes[k]. A vector can consist of multiple
+    ##      time stamps (multiple start/end time pairs).
+    ## 
+    ## Example:
+    ## Input
+    ##       timeVector = [datetime(2020,6,16,16,30),
+    ##                     datetime(2020,6,16,16,45),
+    ##                     datetime(2020,6,16,16,22),
+    ##                     datetime(2020,6,16,18,5)]
+    ##       toolboxes = [['matlab', 'simulink'],
+    ##                    ['matlab']]
+    ##
+    ## Output
+    ##       uniqueToolboxes = ['matlab', 'simulink']
+    ##       time_list = [[datetime(2020,6,16,16,22), datetime(2020,6,16,18,5)],
+    ##                    [datetime(2020,6,16,16,30), datetime(2020,6,16,16,45)]]
+
+
+    def __processTime(self, timeVector, toolboxes):
+        
+        # Inverted index {toolbox: start/end time vector}, built in one pass
+        # over all time stamps. Toolboxes are ordered by first occurrence.
+        timeMap = {}
+        
+        cc = 0
+        for tbxList in toolboxes:
+            startTime = timeVector[2*cc]
+            endTime = timeVector[2*cc+1]
+            for toolbox in tbxList:
+                timeTbx = timeMap.get(toolbox)
+                if timeTbx is None:
+                    timeMap[toolbox] = [startTime, endTime]
+                else:
+                    timeTbx.append(startTime)   #start time
+                    timeTbx.append(endTime)     #end time
+            cc = cc + 1
+        
+        # Detect and merge overlapping time stamps
+        uniqueToolboxes = list(timeMap)
+        time_list = [self.__mergeTimeStamps(timeTbx) for timeTbx in timeMap.values()]
+            
+        return uniqueToolboxes, time_list
+    
+
+
+    #######################
+    ## mergeTimeStamps()
+    #######################
+    ##
+    ## Detect and merge overlapping time stamps.
+    ##
+    ## Input:
+    ##    - timeStamps: List of time stamps. Time stamp k:
+    ##      start_time = timeStamps[2*k], end_time = timeStamps[2*k+1]
+    ##
+    ## Output:
+    ##    - mergedTimeArray: List of non-overlapping time stamps.
+    ##
+    ## Example: 
+    ##    timeStamps = [0, 4, 6, 9, 3, 7, 10, 11]
+    ##    => mergedTimeArray = [0, 9, 10, 11]
+    ##    (Works analogously if entries are of format datetime()).
+    ##
+    ## Time stamps are sorted by start time and merged in one sweep
+    ## (O(n log n)). Touching time stamps (end == start) are merged. Merged
+    ## time stamps are returned in the order of their first time stamp in
+    ## the input (as in processTime.m).
+    ## Integer time stamps are merged with NumPy (if installed) for
+    ## more than MERGE_NUMPY_MIN time stamps.
+
+
+    def __mergeTimeStamps( self, timeStamps ):
+        
+        if len(timeStamps) % 2 != 0:
+            print("[mergeTimeStamps] ERROR: Unexpected number of timestamp entries.")
+            return
+        
+        noElements = len(timeStamps) // 2    # Total number of timestamps
+        if noElements == 0:
+            return []
+
+        if np is not None and noElements > MERGE_NUMPY_MIN and isinstance(timeStamps[0], int):
+            return self.__mergeTimeStampsNumpy(timeStamps)
+
+        startTimes = timeStamps[0::2]
+        endTimes = timeStamps[1::2]
+        order = sorted(range(noElements), key = startTimes.__getitem__)
+
+        # Sweep over time stamps sorted by start time. 
+        # merged: [index of first time stamp, start time, end time]
+        merged = []
+        idx = order[0]
+        element = [idx, startTimes[idx], endTimes[idx]]
+        for idx in order:
+            if startTimes[idx] > element[2]:
+                merged.append(element)
+                element = [idx, startTimes[idx], endTimes[idx]]
+            else:
+                if endTimes[idx] > element[2]:
+                    element[2] = endTimes[idx]
+                if idx < element[0]:
+                    element[0] = idx
+        merged.append(element)
+
+        merged.sort()
+        mergedTimeArray = []
+        for element in merged:
+            mergedTimeArray.append(element[1])
+            mergedTimeArray.append(element[2])
+        
+        return mergedTimeArray
+
+
+    ##############################
+    ## mergeTimeStampsNumpy()
+    ##############################
+    ##
+    ## Vectorized version of __mergeTimeStamps() for integer time stamps.
+
+    def __mergeTimeStampsNumpy( self, timeStamps ):
+        timeArray = np.asarray(timeStamps, dtype = np.int64)
+        startTimes = timeArray[0::2]
+        endTimes = timeArray[1::2]
+
+        order = np.argsort(startTimes, kind = 'stable')
+        startTimes = startTimes[order]
+        endTimes = endTimes[order]
+
+        # A new merged time stamp begins where the start time lies after
+        # all previous end times.
+        maxEnd = np.maximum.accumulate(endTimes)
+        first = np.empty(len(startTimes), dtype = bool)
+        first[0] = True
+        first[1:] = startTimes[1:] > maxEnd[:-1]
+        first = np.flatnonzero(first)
+
+        mergedTimes = np.empty((len(first), 2), dtype = np.int64)
+        mergedTimes[:, 0] = startTimes[first]
+        mergedTimes[:, 1] = np.maximum.reduceat(endTimes, first)
+
+        # Order of first time stamp in input
+        mergedTimes = mergedTimes[np.argsort(np.minimum.reduceat(order, first))]
+
+        return mergedTimes.ravel().tolist()
+
+
+
+# ==========================
+# _processFileWorker()
+# ==========================
+
+# Worker function of LogProcessor.__processParallel(). Processes inputFile
+# (or a part of it) and returns the printed report and the statistics
+# (ProcessStats).
+
+def _processFileWorker(processor, inputFile, outputFile, singlePass, offset, noLines):
+    report = io.StringIO()
+    quiet = processor.quiet
+    processor.quiet = False     # the report is captured (and saved in the result cache)
+    try:
+        with contextlib.redirect_stdout(report):
+            stats = processor.processFile(inputFile, outputFile, singlePass, offset, noLines)
+    finally:
+        processor.quiet = quiet
+    return report.getvalue(), stats
+
+
+
+# ==========================
+# _appendFile()
+# ==========================
+
+# Appends the content of (temporary) file tmpFile to file outFile and
+# deletes tmpFile. A missing tmpFile is ignored.
+
+def _appendFile(tmpFile, outFile):
+    if not os.path.exists(tmpFile):
+        return
+    with open(tmpFile, 'rb') as readFile:
+        with open(outFile, 'ab') as writeFile:
+            shutil.copyfileobj(readFile, writeFile)
+    os.remove(tmpFile)
+
+
+# ==========================
+# _fileHash()
+# ==========================
+
+# SHA-1 of the content of a file (result cache).
+
+def _fileHash(fileName):
+    sha = hashlib.sha1()
+    with open(fileName, 'rb') as readFile:
+        for block in iter(lambda: readFile.read(1 << 20), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+# ==========================
+# _directorySize()
+# ==========================
+
+# Size of all files in a directory (recursive), in bytes.
+
+def _directorySize(directory):
+    size = 0
+    for path, directories, fileNames in os.walk(directory):
+        for fileName in fileNames:
+            size = size + os.path.getsize(os.path.join(path, fileName))
+    return size
+
+
+# ==========================
+# _completeLines()
+# ==========================
+
+# Yields the complete lines (terminated by '\n') of a file opened in binary
+# mode as strings (as in text mode). position[0] is the byte offset after
+# the last yielded line.
+
+def _completeLines(readFile, position):
+    encoding = locale.getpreferredencoding(False)
+    for line in readFile:
+        if not line.endswith(b'\n'):
+            break
+        position[0] = position[0] + len(line)
+        if line.endswith(b'\r\n'):
+            line = line[:-2] + b'\n'
+        yield line.decode(encoding)
+
+
+# ==========================
+# _mappedBlocks(), _lineBlocks()
+# ==========================
+
+# Generators of blocks of complete lines (bytes, see LogScanner): of a
+# memory-mapped file from byte offset start, or of a file opened in binary
+# mode. A block is cut at the last '\n' after SCAN_BLOCK_SIZE bytes.
+
+def _mappedBlocks(mapped, start, size):
+    while start < size:
+        end = min(start + SCAN_BLOCK_SIZE, size)
+        if end < size:
+            cut = mapped.rfind(b'\n', start, end)
+            if cut < 0:     # Line longer than a block
+                cut = mapped.find(b'\n', end)
+            end = size if cut < 0 else cut + 1
+        yield mapped[start:end]
+        start = end
+
+
+def _lineBlocks(readFile):
+    rest = b''
+    while True:
+        block = readFile.read(SCAN_BLOCK_SIZE)
+        if not block:
+            if rest:
+                yield rest
+            return
+        block = rest + block
+        cut = block.rfind(b'\n') + 1
+        if cut == 0:        # Line longer than a block
+            rest = block
+        else:
+            rest = block[cut:]
+            yield block[:cut]
+
+
+# ==========================
+# lineRecords()
+# ==========================
+
+# Generator of the records of the $START/$END lines of a text log file
+# (text reader, see also LogScanner.records()). A record is
+#    (lineNumber, processID, time, None, None)                   START line
+#    (lineNumber, processID, time, (licenseNo, version), toolboxes)  END line
+# with process IDs as in _processKey(), times in minutes since EPOCH and the
+# toolbox field of the END line (e.g. "[MATLAB:Simulink]"). The time of an
+# END line is None if its time stamp is invalid (invalid START time stamps
+# raise ValueError). Lines with missing fields are skipped.
+#
+# Input parameters:
+#   - lines: Iterable of lines.
+#   - position: position[0] is the line number of the first line; it is set
+#       to the line number after the last line when the generator is
+#       exhausted.
+#   - lineValid: If given, only lines with lineValid[line number] != 0 are
+#       returned.
+
+def lineRecords(lines, position, lineValid = None):
+    lineNumber = position[0]
+    licenseKeys = {}     # Interned (licenseNo, version) tuples
+
+    for line in lines:
+        if lineValid is None or lineValid[lineNumber]:
+            if line.startswith('$START'):
+                substr = line.rstrip('\n').split(',')
+                if len(substr) > 2:
+                    yield (lineNumber, _processKey(substr[1]), parseLogTime(substr[2]), None, None)
+
+            elif line.startswith('$END'):
+                substr = line.rstrip('\n').split(',')
+                if len(substr) > 5:
+                    try:
+                        endTime = parseLogTime(substr[4])
+                    except ValueError:
+                        endTime = None
+                    licenseKey = (substr[2], substr[3])
+                    yield (lineNumber, _processKey(substr[1]), endTime,
+                           licenseKeys.setdefault(licenseKey, licenseKey), substr[5])
+
+        lineNumber = lineNumber + 1
+
+    position[0] = lineNumber
+
+
+# ==========================
+# _fileHead()
+# ==========================
+
+# Returns the SHA-1 hash of the first 'size' bytes of a file opened in
+# binary mode.
+
+def _fileHead(readFile, size):
+    readFile.seek(0)
+    return hashlib.sha1(readFile.read(size)).hexdigest()
+
+
+
+##############################################################################
+### class TextWriter
+##############################################################################
+###
+### Default output writer of LogProcessor (see LogProcessor.setOutputWriter()).
+### Appends one text row per merged time stamp:
+###    License, Version, Toolbox, Start timestamp, End timestamp, DeltaTime (in hours).
+### Time stamps are formatted with the date format of the processor.
+##############################################################################
+
+class TextWriter:
+
+    # =================
+    # Constructor
+    # =================
+
+    # Input parameters:
+    #   - processor: LogProcessor instance (provides the date format).
+    #   - fileName: Output file. Output is appended.
+
+    def __init__(self, processor, fileName):
+        self.processor = processor
+        self.writeFile = open(fileName, 'a')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
+
+    # =====================
+    # write()
+    # =====================
+
+    # Writes the merged time stamps of a group of instances.
+    #
+    # Input parameters:
+    #   - licenseNo, version: License number and version.
+    #   - toolboxes: List of toolboxes.
+    #   - timeVectors: List of start/end time vectors (minutes since EPOCH),
+    #       timeVectors[k] for toolbox toolboxes[k].
+    #   - window: Start of the time window (minutes since EPOCH), only for
+    #       time windows with output "column": written as additional column.
+
+    def write(self, licenseNo, version, toolboxes, timeVectors, window = None):
+        writeFile = self.writeFile
+        formatTime = self.processor.formatTime
+        windowColumn = ""
+        if window is not None:
+            windowColumn = ", " + formatTime(window)
+
+        # For all toolboxes, write the cooresponding time stamps to output
+        # file.
+        for cc in range(len(toolboxes)):
+            toolbox = toolboxes[cc]
+            noIntervals = int(len(timeVectors[cc])/2)
+
+            for cy in range(noIntervals):
+                startTime = timeVectors[cc][2*cy]
+                endTime = timeVectors[cc][2*cy+1]
+
+                dt = (endTime - startTime) * 60 / (60*60)   # time dt in hours
+
+            #################################################
+            #### WRITING OUTPUT FILE                      ###
+            #################################################
+                writeFile.write( licenseNo + ", "    
+                    + version + ", "
+                    + toolbox + ", "
+                    + formatTime(startTime) + ", "
+                    + formatTime(endTime) + ", "
+                    + '{:.2f}'.format(dt) + windowColumn + "\n" )
+
+            #################################################
+
+    # =====================
+    # flush(), close()
+    # =====================
+
+    def flush(self):
+        self.writeFile.flush()
+
+    def close(self):
+        self.writeFile.close()
+
+    # =====================
+    # appendOutput()
+    # =====================
+
+    # Appends the (temporary) output file tmpFile to outputFile and deletes
+    # tmpFile.
+
+    @staticmethod
+    def appendOutput(tmpFile, outputFile):
+        _appendFile(tmpFile, outputFile)
+
+
+
+##############################################################################
+### class WindowWriter
+##############################################################################
+###
+### Output writer for time windows with output "files" (see
+### LogProcessor.setTimeWindows()). Writes the output of each window with the
+### output writer of the processor to windowFileName(fileName, window start).
+### The writer of a window is opened when its first rows are written.
+##############################################################################
+
+class WindowWriter:
+
+    # =================
+    # Constructor
+    # =================
+
+    # Input parameters:
+    #   - processor: LogProcessor instance (provides the output writer).
+    #   - fileName: Output file; the window start is added to the name.
+
+    def __init__(self, processor, fileName):
+        self.processor = processor
+        self.fileName = fileName
+        self.writers = {}    # {window start: writer}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
+
+    # =====================
+    # write()
+    # =====================
+
+    # Writes the merged time stamps of a group of instances of the window
+    # starting at 'window' (see TextWriter.write()).
+
+    def write(self, licenseNo, version, toolboxes, timeVectors, window):
+        writer = self.writers.get(window)
+        if writer is None:
+            writer = self.processor.outputWriter(self.processor, windowFileName(self.fileName, window))
+            self.writers[window] = writer
+        writer.write(licenseNo, version, toolboxes, timeVectors)
+
+    # =====================
+    # flush(), close()
+    # =====================
+
+    def flush(self):
+        for writer in self.writers.values():
+            if hasattr(writer, 'flush'):
+                writer.flush()
+
+    def close(self):
+        for writer in self.writers.values():
+            writer.close()
+        self.writers = {}
+
+
+
+##############################################################################
+### class ProcessStats
+##############################################################################
+###
+### Statistics of processing a log file (returned by
+### LogProcessor.processFile()), or of a call of LogProcessor.process():
+### the sum over all files, the statistics of each file in 'files'.
+###
+### Counters:
+###   lines, validLines   Number of lines/valid lines (START and END)
+###   nonTerminated       Processes without END line (incl. evicted)
+###   openProcesses       Processes open after an incremental call
+###                       (checkpointDirectory, incremental = True)
+###   evicted             Evicted processes (see setOrphanEviction())
+###   duplicates          Skipped duplicated lines (see setDeduplication())
+###   errors              Errors, e.g. END lines without start time
+###   cached              Number of files read from the result cache
+### Peaks (aggregate: maximum of all files):
+###   maxOpen             Maximum number of open processes (size of timeMap
+###                       or LogStream.openMap)
+###   maxBuffered         Maximum number of buffered instances (terminated,
+###                       not yet written)
+### Times (seconds):
+###   times['scan']       Pre-pass over the file (two-pass processing,
+###                       split points)
+###   times['parse']      Reading and pairing lines (wall time - other stages)
+###   times['merge']      Merging time stamps (__processTime())
+###   times['write']      Output writer
+###   wallTime            Wall time. With workers > 1 the stage times of
+###                       process() are the sum over all processes.
+##############################################################################
+
+class ProcessStats:
+
+    # =================
+    # Constructor
+    # =================
+
+    def __init__(self, inputFile = "", outputFile = ""):
+        self.inputFile = inputFile
+        self.outputFile = outputFile
+        self.incremental = False
+
+        self.lines = 0
+        self.validLines = 0
+        self.nonTerminated = 0
+        self.openProcesses = 0
+        self.evicted = 0
+        self.duplicates = 0
+        self.errors = 0
+        self.cached = 0
+
+        self.maxOpen = 0
+        self.maxBuffered = 0
+
+        self.times = dict.fromkeys(STAGES, 0.0)
+        self.wallTime = 0.0
+
+        self.files = []       # Statistics of each file (process())
+
+    # =====================
+    # add()
+    # =====================
+
+    # Adds the counters and times of the statistics 'stats' (peaks: maximum).
+
+    def add(self, stats):
+        self.lines = self.lines + stats.lines
+        self.validLines = self.validLines + stats.validLines
+        self.nonTerminated = self.nonTerminated + stats.nonTerminated
+        self.openProcesses = self.openProcesses + stats.openProcesses
+        self.evicted = self.evicted + stats.evicted
+        self.duplicates = self.duplicates + stats.duplicates
+        self.errors = self.errors + stats.errors
+        self.cached = self.cached + stats.cached
+
+        self.maxOpen = max(self.maxOpen, stats.maxOpen)
+        self.maxBuffered = max(self.maxBuffered, stats.maxBuffered)
+
+        for stage in STAGES:
+            self.times[stage] = self.times[stage] + stats.times[stage]
+        self.wallTime = self.wallTime + stats.wallTime
+
+    # =====================
+    # setWallTime()
+    # =====================
+
+    # Sets the wall time; the parse time is the wall time not spent in the
+    # other stages.
+
+    def setWallTime(self, wallTime):
+        self.wallTime = wallTime
+        self.times['parse'] = max(wallTime - self.times['scan'] - self.times['merge']
+                                  - self.times['write'], 0.0)
+
+    # =====================
+    # report()
+    # =====================
+
+    # Returns the line counts as printed by LogProcessor.process().
+
+    def report(self):
+        report = "\tLines (total, valid) = " + str(self.lines) + ", " + str(self.validLines) + "\n"
+        if self.incremental:
+            report = report + "\tOpen processes = " + str(self.openProcesses) + "\n"
+            if self.nonTerminated:
+                report = report + "\tNon-terminated processes = " + str(self.nonTerminated) + "\n"
+        else:
+            report = report + "\tNon-terminated processes = " + str(self.nonTerminated) + "\n"
+        if self.evicted:
+            report = report + "\tEvicted processes = " + str(self.evicted) + "\n"
+        if self.duplicates:
+            report = report + "\tDuplicate lines = " + str(self.duplicates) + "\n"
+        return report
+
+    # =====================
+    # asDict()
+    # =====================
+
+    # Returns the counters, peaks and times as dict (e.g. for export as JSON).
+    # The statistics of the files are not included.
+
+    def asDict(self):
+        return {'inputFile': self.inputFile, 'outputFile': self.outputFile,
+                'lines': self.lines, 'validLines': self.validLines,
+                'nonTerminated': self.nonTerminated, 'openProcesses': self.openProcesses,
+                'evicted': self.evicted, 'duplicates': self.duplicates, 'errors': self.errors, 'cached': self.cached,
+                'maxOpen': self.maxOpen, 'maxBuffered': self.maxBuffered,
+                'times': dict(self.times), 'wallTime': self.wallTime}
+
+    def __repr__(self):
+        return "ProcessStats(" + repr(self.asDict()) + ")"
+
+
+
+##############################################################################
+### class LogStream
+##############################################################################
+###
+### Single-pass pairing of $START/$END lines.
+###
+### Instances are partitioned by (license number, version). Each partition
+### has its own buffer of terminated instances. A group of overlapping
+### instances of a partition ends at an END line after which no valid
+### process of that partition is open. The license of a process is only
+### known from its END line, and whether a process which is still open is
+### valid (i.e. will be terminated) is not known while reading. Therefore,
+### each END line is saved as a candidate flush point of its partition:
+###   - A candidate is void if a process of the partition that was open at
+###     the candidate is terminated later (all candidates of the partition
+###     after its START line are removed).
+###   - A candidate is final if all processes open at the candidate are
+###     resolved, i.e. the oldest open process started after the candidate.
+### Final groups are flushed in order of their candidate lines. At the end
+### of the input, all remaining open processes are non-terminated and all
+### remaining candidates are final.
+###
+### Usage:
+###    stream = LogStream(processor, flush)
+###    stream.feed(lines)      # can be called repeatedly
+###    stream.finish()
+### The state can be saved (getState()) and restored (setState()) to
+### continue the stream later.
+###
+### flush(timeVector, toolboxes, licenseNo, version) is called for each final
+### group of instances (see LogProcessor.__processTime() for the format of
+### timeVector and toolboxes; times are minutes since EPOCH).
+###
+### Open processes are evicted according to the limits of the processor
+### (see LogProcessor.setOrphanEviction()). An evicted process is resolved
+### as non-terminated, i.e. it no longer blocks flushing.
+##############################################################################
+
+class LogStream:
+
+    # =================
+    # Constructor
+    # =================
+
+    # Input parameters:
+    #   - processor: LogProcessor instance (provides time filter and
+    #       eviction limits).
+    #   - flush: Function called for each final group of instances.
+    #   - orphan: Function orphan(processID, startTime, reason) called for
+    #       each evicted process (startTime in minutes since EPOCH), or None.
+
+    def __init__(self, processor, flush, orphan = None):
+        self.processor = processor
+        self.flush = flush
+        self.orphan = orphan
+
+        self.lineNumber = 0          # Number of lines read
+        self.validLines = 0          # Number of valid lines (START and END)
+        self.noEvicted = 0           # Number of evicted processes
+        self.noDuplicates = 0        # Number of duplicated lines (see
+                                     # LogProcessor.setDeduplication())
+        self.noBuffered = 0          # Number of buffered instances (not flushed)
+        self.maxBuffered = 0         # Maximum of noBuffered
+        self.maxOpen = 0             # Maximum number of open processes
+        self.openMap = OrderedDict() # {processID: (lineNumber, start time)} of open
+                                     # processes, oldest first (process IDs see
+                                     # _processKey(), minutes since EPOCH).
+        self.partitions = {}         # {(licenseNo, version): LogPartition}
+        self.candidates = []         # Queue (heap) of partitions with candidates
+                                     # [(line number, partition), ...] ordered by
+                                     # the line of the first candidate of each
+                                     # partition (see __flushFinal()).
+        self.toolboxes = ToolboxDictionary()   # Toolboxes of buffered instances
+
+    # =====================
+    # feed()
+    # =====================
+
+    # Processes lines of the log file.
+    #
+    # Input parameters:
+    #   - lines: Iterable of lines (e.g. an open file).
+
+    def feed(self, lines):
+        position = [self.lineNumber]
+        self.feedRecords(lineRecords(lines, position), position)
+
+    # =====================
+    # feedRecords()
+    # =====================
+
+    # Processes the records of the $START/$END lines of the log file (see
+    # lineRecords(), LogScanner.records()). An END line of an open process
+    # with invalid time stamp raises ValueError; the stream is unchanged by
+    # that line (the process stays open), i.e. feedRecords() can be called
+    # again with the remaining records.
+    #
+    # Input parameters:
+    #   - records: Iterable of records, line numbers continue at
+    #       self.lineNumber.
+    #   - position: position[0] is the line number after the last line
+    #       once records is exhausted.
+
+    def feedRecords(self, records, position):
+        processor = self.processor
+        timeWindows = processor.timeWindows
+        if processor.timeFilter:
+            filterStart = toMinutes(processor.filterStart)
+            filterEnd = toMinutes(processor.filterEnd)
+        openMap = self.openMap
+        partitions = self.partitions
+        candidates = self.candidates
+        toolboxIds = self.toolboxes.ids
+        addToolboxes = self.toolboxes.add
+        dedup = processor.dedupIndex
+
+        peakOpen = self.maxOpen
+        maxOpen = processor.maxOpenProcesses
+        maxAge = processor.maxSessionAge
+        if maxAge is not None:
+            maxAge = maxAge * 60      # hours => minutes
+
+        for lineNumber, processID, time, licenseKey, toolboxField in records:
+            # ------------------------------------------------------------
+            # START line found => add {processID: (lineNumber, time)}
+            # ------------------------------------------------------------
+            if licenseKey is None:
+                # START of a session that was already processed (overlapping
+                # log files)
+                if dedup is not None and dedup.seen((processID, time, False), time):
+                    self.noDuplicates = self.noDuplicates + 1
+                    continue
+
+                # A previous START of the same process is never terminated
+                if processID in openMap:
+                    del openMap[processID]
+                openMap[processID] = (lineNumber, time)
+
+                if maxOpen is not None and len(openMap) > maxOpen:
+                    self.__evict("max open")
+                    self.__flushFinal(next(iter(openMap.values()))[0])
+                if len(openMap) > peakOpen:
+                    peakOpen = len(openMap)
+
+            # ------------------------------------------------------------
+            # END line found:
+            #     - Pair with START entry and add the instance to the
+            #       partition of its license and version
+            #     - Void candidates of the partition after the START line
+            #     - Add new candidate and flush final groups
+            # ------------------------------------------------------------
+            else:
+                if dedup is not None and dedup.seen((processID, time, True), time):
+                    self.noDuplicates = self.noDuplicates + 1
+                    continue
+                if processID not in openMap:
+                    continue
+                # Invalid END time stamp: the process stays open
+                # (non-terminated if no valid END line follows)
+                if time is None:
+                    raise ValueError("Invalid time stamp of END line (line number = " + str(lineNumber) + ")")
+                startLine, startTime = openMap.pop(processID)
+                self.validLines = self.validLines + 2
+
+                partition = partitions.get(licenseKey)
+                if partition is None:
+                    partition = LogPartition(sys.intern(licenseKey[0]), sys.intern(licenseKey[1]), bool(timeWindows))
+                    partitions[(partition.licenseNo, partition.version)] = partition
+
+                endTime = time
+                if dedup is not None:
+                    dedup.add((processID, startTime, False), startTime)
+                    dedup.add((processID, endTime, True), endTime)
+                tbox = toolboxIds.get(toolboxField)
+                if tbox is None:
+                    tbox = addToolboxes(toolboxField)
+
+                # Time windows => add the part of the process within each
+                # overlapping window. If time filter active => add only
+                # processes that fall within filter time.
+                noAdded = partition.noAdded
+                if timeWindows:
+                    for window in processor.overlappingWindows(startTime, endTime):
+                        windowStart, windowEnd = timeWindows[window]
+                        partition.add(max(startTime, windowStart), min(endTime, windowEnd), tbox, window)
+                elif processor.timeFilter:
+                    if startTime < filterEnd and endTime > filterStart:
+                        partition.add(max(startTime, filterStart), min(endTime, filterEnd), tbox)
+                else:
+                    partition.add(startTime, endTime, tbox)
+
+                self.noBuffered = self.noBuffered + partition.noAdded - noAdded
+                if self.noBuffered > self.maxBuffered:
+                    self.maxBuffered = self.noBuffered
+
+                if partition.addCandidate(lineNumber, startLine):
+                    heapq.heappush(candidates, (lineNumber, partition))
+
+                # Evict processes started more than maxAge before this END
+                if maxAge is not None:
+                    while openMap and next(iter(openMap.values()))[1] < endTime - maxAge:
+                        self.__evict("max age")
+
+                if openMap:
+                    self.__flushFinal(next(iter(openMap.values()))[0])
+                else:
+                    self.__flushFinal(lineNumber + 1)
+
+        self.lineNumber = position[0]
+        self.maxOpen = peakOpen
+
+    # =====================
+    # getState()
+    # =====================
+
+    # Returns the state of the stream (open processes, buffered instances,
+    # counters) as a dict, e.g. to save a checkpoint. The stream continues
+    # after setState(state).
+
+    def getState(self):
+        return {'lineNumber': self.lineNumber,
+                'validLines': self.validLines,
+                'openMap': self.openMap,
+                'partitions': self.partitions,
+                'candidates': self.candidates,
+                'toolboxes': self.toolboxes}
+
+    # =====================
+    # setState()
+    # =====================
+
+    # Restores a state returned by getState(). The maxima of buffered
+    # instances and open processes start at the restored state.
+
+    def setState(self, state):
+        self.lineNumber = state['lineNumber']
+        self.validLines = state['validLines']
+        self.openMap = state['openMap']
+        self.partitions = state['partitions']
+        self.candidates = state['candidates']
+        self.toolboxes = state['toolboxes']
+        self.noBuffered = sum(len(partition.toolboxIds) for partition in self.partitions.values())
+        self.maxBuffered = self.noBuffered
+        self.maxOpen = len(self.openMap)
+
+    # =====================
+    # finish()
+    # =====================
+
+    # End of input: All open processes are non-terminated, all remaining
+    # groups are flushed. If an orphan function is defined, the open
+    # processes are reported (reason, default "end of input").
+
+    def finish(self, reason = "end of input"):
+        self.__flushFinal(self.lineNumber)
+        if self.orphan is not None:
+            for processID, (startLine, startTime) in self.openMap.items():
+                self.orphan(str(processID), startTime, reason)
+
+    # =====================
+    # __evict()
+    # =====================
+
+    # Evicts the oldest open process.
+
+    def __evict(self, reason):
+        processID, (startLine, startTime) = self.openMap.popitem(last = False)
+        self.noEvicted = self.noEvicted + 1
+        if self.orphan is not None:
+            self.orphan(str(processID), startTime, reason)
+
+    # =====================
+    # __flushFinal()
+    # =====================
+
+    # Flushes all groups with a candidate before line 'horizon' (the START
+    # line of the oldest open process), in order of the candidate lines.
+    # The queue holds one entry per partition with candidates; the line of
+    # an entry is the first candidate of the partition when it was queued.
+    # If that candidate was void in the meantime, the partition is queued
+    # again with its current first candidate (a later line). Line numbers
+    # of candidates are unique, i.e. partitions are never compared.
+
+    def __flushFinal(self, horizon):
+        candidates = self.candidates
+
+        while candidates and candidates[0][0] < horizon:
+            lineNumber, partition = heapq.heappop(candidates)
+            nextLine = partition.nextCandidate()
+            if nextLine != lineNumber:      # void candidate
+                heapq.heappush(candidates, (nextLine, partition))
+                continue
+
+            timeVector, toolboxIds, windows = partition.flush()
+            self.noBuffered = self.noBuffered - len(toolboxIds)
+            if toolboxIds:
+                self.flush(timeVector, self.toolboxes.decode(toolboxIds, windows),
+                           partition.licenseNo, partition.version)
+            if partition.isEmpty():
+                partition.queued = False
+                del self.partitions[(partition.licenseNo, partition.version)]
+            else:
+                heapq.heappush(candidates, (partition.nextCandidate(), partition))
+
+
+
+##############################################################################
+### class StreamOutput
+##############################################################################
+###
+### Output of LogStreams fed with lines as they arrive (provided by
+### LogProcessor.openStreamOutput()). The final groups of all streams are
+### written with the same output writer.
+###
+### Usage:
+###    with processor.openStreamOutput(outputFile) as output:
+###        stream = output.newStream()       # one stream per source of lines
+###        stream.feed(lines)                # as lines arrive
+###        output.flushOutput()              # e.g. after a batch of lines
+###        output.finish(stream)             # end of the lines of the source
+###
+### output.stats: Statistics (ProcessStats) of the finished streams.
+##############################################################################
+
+class StreamOutput:
+
+    # =================
+    # Constructor
+    # =================
+
+    # Input parameters:
+    #   - processor: LogProcessor instance.
+    #   - writer: Output writer (see LogProcessor.setOutputWriter()).
+    #   - flush, orphan: Functions passed to each LogStream.
+    #   - stats: Statistics (ProcessStats).
+
+    def __init__(self, processor, writer, flush, orphan, stats):
+        self.processor = processor
+        self.writer = writer
+        self.flush = flush
+        self.orphan = orphan
+        self.stats = stats
+
+    # =====================
+    # newStream()
+    # =====================
+
+    def newStream(self):
+        return LogStream(self.processor, self.flush, self.orphan)
+
+    # =====================
+    # finish()
+    # =====================
+
+    # Finishes a stream (all remaining groups are written, open processes
+    # are non-terminated) and adds its counters to self.stats.
+
+    def finish(self, stream):
+        noOpen = len(stream.openMap)
+        stream.finish()
+
+        stats = self.stats
+        stats.lines = stats.lines + stream.lineNumber
+        stats.validLines = stats.validLines + stream.validLines
+        stats.nonTerminated = stats.nonTerminated + noOpen + stream.noEvicted
+        stats.evicted = stats.evicted + stream.noEvicted
+        stats.duplicates = stats.duplicates + stream.noDuplicates
+        stats.maxOpen = max(stats.maxOpen, stream.maxOpen)
+        stats.maxBuffered = max(stats.maxBuffered, stream.maxBuffered)
+
+    # =====================
+    # flushOutput()
+    # =====================
+
+    # Flushes the buffered output of the writer (if it has a method flush()).
+
+    def flushOutput(self):
+        if hasattr(self.writer, 'flush'):
+            self.writer.flush()
+
+
+
+##############################################################################
+### class LogPartition
+##############################################################################
+###
+### Buffered instances and candidate flush points of one (license number,
+### version) partition of a LogStream.
+###
+### A candidate is a line number and the number of instances added before
+### it: the group of the candidate consists of all instances added before
+### the candidate. Void candidates are removed from the partition.
+###
+### Instances and candidates are buffered in arrays (8 bytes per time stamp
+### and candidate field, 4 bytes per toolbox id) instead of lists of
+### objects.
+##############################################################################
+
+class LogPartition:
+
+    # =================
+    # Constructor
+    # =================
+
+    # Input parameters:
+    #   - licenseNo, version: License number and version.
+    #   - windows: True if the instances are tagged with a time window.
+
+    def __init__(self, licenseNo, version, windows = False):
+        self.licenseNo = licenseNo
+        self.version = version
+
+        self.timeVector = array('q') # Start/end times of buffered instances
+        self.toolboxIds = array('i') # Toolboxes of buffered instances (see ToolboxDictionary)
+        self.windows = array('i') if windows else None   # Time windows of buffered instances
+        self.noAdded = 0             # Number of instances added
+        self.noFlushed = 0           # Number of instances flushed
+
+        # Candidates of this partition, in order of lines. Candidates before
+        # index firstCandidate are flushed.
+        self.candidateLines = array('q')    # Line numbers
+        self.candidateCounts = array('q')   # Number of instances added before the candidate
+        self.firstCandidate = 0
+        self.queued = False          # True if in the candidate queue of the LogStream
+
+    # =====================
+    # add()
+    # =====================
+
+    # Adds an instance (start/end time, id of its toolboxes and the index of
+    # its time window if the partition has windows).
+
+    def add(self, startTime, endTime, toolboxId, window = None):
+        self.timeVector.append(startTime)
+        self.timeVector.append(endTime)
+        self.toolboxIds.append(toolboxId)
+        if window is not None:
+            self.windows.append(window)
+        self.noAdded = self.noAdded + 1
+
+    # =====================
+    # addCandidate()
+    # =====================
+
+    # Adds a candidate flush point after END line 'lineNumber' of a process
+    # started in line 'startLine'. Candidates after startLine are void.
+    # Returns True if the partition has to be added to the candidate queue
+    # of the LogStream (it is marked as queued).
+
+    def addCandidate(self, lineNumber, startLine):
+        candidateLines = self.candidateLines
+        while len(candidateLines) > self.firstCandidate and candidateLines[-1] > startLine:
+            candidateLines.pop()
+            self.candidateCounts.pop()
+
+        candidateLines.append(lineNumber)
+        self.candidateCounts.append(self.noAdded)
+
+        if self.queued:
+            return False
+        self.queued = True
+        return True
+
+    # =====================
+    # nextCandidate()
+    # =====================
+
+    # Returns the line number of the first candidate (None if none).
+
+    def nextCandidate(self):
+        if self.firstCandidate < len(self.candidateLines):
+            return self.candidateLines[self.firstCandidate]
+        return None
+
+    # =====================
+    # flush()
+    # =====================
+
+    # Removes the group of the first candidate (final) and returns its time
+    # vector, toolbox ids and windows (None if the partition has no
+    # windows).
+
+    def flush(self):
+        first = self.firstCandidate
+        noAdded = self.candidateCounts[first]
+
+        noInstances = noAdded - self.noFlushed
+        timeVector = self.timeVector[:2*noInstances]
+        toolboxIds = self.toolboxIds[:noInstances]
+        del self.timeVector[:2*noInstances]
+        del self.toolboxIds[:noInstances]
+        windows = None
+        if self.windows is not None:
+            windows = self.windows[:noInstances]
+            del self.windows[:noInstances]
+        self.noFlushed = noAdded
+
+        # Flushed candidates are deleted once they are the larger part
+        first = first + 1
+        if 2*first >= len(self.candidateLines):
+            del self.candidateLines[:first]
+            del self.candidateCounts[:first]
+            first = 0
+        self.firstCandidate = first
+
+        return timeVector, toolboxIds, windows
+
+    # =====================
+    # isEmpty()
+    # =====================
+
+    # True if no instances and candidates are buffered.
+
+    def isEmpty(self):
+        return self.firstCandidate == len(self.candidateLines)
+
+
+
+##############################################################################
+### class ToolboxDictionary
+##############################################################################
+###
+### Interned toolbox lists. The toolbox field of an END line (e.g.
+### "[MATLAB:Simulink]") is stored once; buffered instances refer to it by
+### its id (index in 'fields'). A field is split into its list of toolboxes
+### when an instance with the field is flushed (decode()). The lists are
+### shared by all instances and must not be modified.
+##############################################################################
+
+class ToolboxDictionary:
+
+    # =================
+    # Constructor
+    # =================
+
+    def __init__(self):
+        self.ids = {}        # {toolbox field: id}
+        self.fields = []     # fields[id] = toolbox field
+        self.lists = []      # lists[id] = list of toolboxes (fields decoded so far)
+
+    # =====================
+    # add()
+    # =====================
+
+    # Returns the id of a toolbox field (a new field is added).
+
+    def add(self, field):
+        toolboxId = self.ids.get(field)
+        if toolboxId is None:
+            toolboxId = len(self.fields)
+            self.fields.append(field)
+            self.ids[field] = toolboxId
+        return toolboxId
+
+    # =====================
+    # decode()
+    # =====================
+
+    # Returns the toolboxes of instances (see LogProcessor.__processTime()):
+    # the lists of toolboxIds, or (window, list) if windows are given.
+
+    def decode(self, toolboxIds, windows = None):
+        lists = self.lists
+        if len(lists) < len(self.fields):
+            lists.extend(field.strip('][').split(':') for field in self.fields[len(lists):])
+        if windows is None:
+            return [lists[toolboxId] for toolboxId in toolboxIds]
+        return [(window, lists[toolboxId]) for window, toolboxId in zip(windows, toolboxIds)]
+
+
+
+##############################################################################
+### class TimeWindowSet
+##############################################################################
+###
+### Deduplication index (see LogProcessor.setDeduplication()): keys of the
+### last 'window' hours of log time. The keys are kept in buckets of
+### DEDUP_BUCKET minutes of their time stamp; buckets older than the window
+### (relative to the newest key) are deleted when a new bucket is started,
+### i.e. memory is bounded by the keys of a window.
+##############################################################################
+
+class TimeWindowSet:
+
+    # =================
+    # Constructor
+    # =================
+
+    # Input parameters:
+    #   - window: Time window in hours.
+
+    def __init__(self, window):
+        self.window = window * 60    # hours => minutes
+        self.buckets = {}            # {time // DEDUP_BUCKET: set of keys}
+        self.newest = None           # Newest bucket
+
+    # =====================
+    # seen()
+    # =====================
+
+    # True if key (time stamp time in minutes since EPOCH) was added.
+
+    def seen(self, key, time):
+        if time is None:
+            return False
+        bucket = self.buckets.get(time // DEDUP_BUCKET)
+        return bucket is not None and key in bucket
+
+    # =====================
+    # add()
+    # =====================
+
+    # Adds a key. Keys older than the window are ignored.
+
+    def add(self, key, time):
+        if time is None:
+            return
+        bucketNo = time // DEDUP_BUCKET
+        bucket = self.buckets.get(bucketNo)
+        if bucket is None:
+            if self.newest is not None and bucketNo < self.newest - self.window // DEDUP_BUCKET:
+                return
+            bucket = self.buckets[bucketNo] = set()
+            if self.newest is None or bucketNo > self.newest:
+                self.newest = bucketNo
+                oldest = bucketNo - self.window // DEDUP_BUCKET
+                for expired in [cc for cc in self.buckets if cc < oldest]:
+                    del self.buckets[expired]
+        bucket.add(key)
+
+    def __len__(self):
+        return sum(len(bucket) for bucket in self.buckets.values())
+
+
+
+##############################################################################
+### class BloomFilter
+##############################################################################
+###
+### Deduplication index (see LogProcessor.setDeduplication()) of fixed size
+### without time limit: a Bloom filter for noKeys keys. seen() is True for
+### all added keys and for other keys with probability falsePositiveRate
+### (if at most noKeys keys were added).
+###
+### Size m = -noKeys * ln(p) / ln(2)^2 bits and k = m / noKeys * ln(2) hash
+### functions (double hashing of the 64-bit hash of the key).
+##############################################################################
+
+class BloomFilter:
+
+    # =================
+    # Constructor
+    # =================
+
+    # Input parameters:
+    #   - noKeys: Expected number of keys.
+    #   - falsePositiveRate: False positive rate at noKeys keys.
+
+    def __init__(self, noKeys, falsePositiveRate):
+        self.noBits = max(int(math.ceil(-noKeys * math.log(falsePositiveRate) / math.log(2) ** 2)), 8)
+        self.noHashes = max(int(round(self.noBits / noKeys * math.log(2))), 1)
+        self.bits = bytearray((self.noBits + 7) // 8)
+
+    # =====================
+    # __positions()
+    # =====================
+
+    # Bit positions of a key.
+
+    def __positions(self, key):
+        value = hash(key) & 0xFFFFFFFFFFFFFFFF
+        first = value & 0xFFFFFFFF
+        step = (value >> 32) | 1
+        noBits = self.noBits
+        return [(first + cc * step) % noBits for cc in range(self.noHashes)]
+
+    # =====================
+    # seen()
+    # =====================
+
+    def seen(self, key, time):
+        bits = self.bits
+        for position in self.__positions(key):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    # =====================
+    # add()
+    # =====================
+
+    def add(self, key, time):
+        bits = self.bits
+        for position in self.__positions(key):
+            bits[position >> 3] |= 1 << (position & 7)
+
+
+
+##############################################################################
+### class LogScanner
+##############################################################################
+###
+### Byte-level reader of log files (requires NumPy). The file is
+### memory-mapped and read in blocks of SCAN_BLOCK_SIZE bytes (compressed
+### files: read from a DecompressingReader, see openLogFile()). Line
+### boundaries, $START/$END lines and field boundaries are found with
+### vectorized operations on the bytes of a block; only the fields needed
+### by a stage are converted:
+###   - validEntries(): process IDs and licenses (two-pass scan, the START
+###     and END lines are paired vectorized).
+###   - records(): process IDs, time stamps, licenses and toolbox fields of
+###     $START/$END lines (see lineRecords() for the format of a record).
+###   - blockRecords(): the same for a block of lines in memory.
+### Distinct license and toolbox fields are decoded once; toolbox lists are
+### split when a group is flushed (see ToolboxDictionary).
+###
+### Fields that do not fit the vectorized format (non-numeric process IDs,
+### other time formats) are converted like text fields and line breaks are
+### translated as in text mode ('\r\n' and '\r' -> '\n'), i.e. the results
+### equal those of the text reader.
+##############################################################################
+
+class LogScanner:
+
+    # =================
+    # Constructor
+    # =================
+
+    # Input parameters:
+    #   - fileName: Name of log file.
+    #   - offset, noLines: Read noLines lines starting at byte offset
+    #       (see LogProcessor.processFile()). Default: the whole file.
+    #       Compressed files are read from the start.
+
+    def __init__(self, fileName, offset = 0, noLines = None):
+        self.fileName = fileName
+        self.offset = offset
+        self.noLines = noLines
+        self.compression = _compression(fileName)
+        self.numberLines = 0            # Number of lines read
+        self.encoding = locale.getpreferredencoding(False)
+        self.processCodes = {}          # {process ID: code < 0} of non-numeric process IDs
+        self.processIDs = []            # processIDs[-code - 1] = process ID (see _processKey())
+        self.licenseKeys = {}           # {b"licenseNo,version": (licenseNo, version)}
+        self.toolboxFields = {}         # {toolbox field (bytes): toolbox field}
+
+    # =====================
+    # supports()
+    # =====================
+
+    # True if a file can be read by LogScanner: NumPy is installed and the
+    # file is not empty.
+
+    @staticmethod
+    def supports(fileName):
+        if np is None or not isinstance(fileName, str):
+            return False
+        return os.path.getsize(fileName) > 0
+
+    # =====================
+    # validEntries()
+    # =====================
+
+    # Determines the valid lines of the file (see
+    # LogProcessor.__determineValidEntries()). A START line and an END line
+    # of a process are paired if the START line is the last line of the
+    # process before the END line.
+    #
+    # Output parameters:
+    #   - validLines, numberLines, licenses: see
+    #       LogProcessor.__determineValidEntries().
+    #   - noOpen: Number of processes without END line.
+
+    def validEntries(self):
+        lines = []
+        isEnd = []
+        codes = []
+        licenses = []
+
+        for data, buffer, lineStarts, lineEnds, firstLine in self.__blocks():
+            lineIndex, ends, commas, blockEnd = self.__eventLines(buffer, lineStarts, lineEnds)
+            lines.append(firstLine + lineIndex)
+            isEnd.append(blockEnd)
+            codes.append(self.__processCodes(data, buffer, commas[:, 0] + 1, np.minimum(commas[:, 1], ends)))
+
+            blockLicenses = np.full(len(lineIndex), None, dtype = object)
+            blockLicenses[blockEnd] = self.__fieldValues(data, commas[blockEnd, 1] + 1, commas[blockEnd, 3],
+                                                         self.licenseKeys, self.__licenseKey)
+            licenses.append(blockLicenses)
+
+        if not lines:
+            return array('q'), self.numberLines, {}, 0
+        lines = np.concatenate(lines)
+        isEnd = np.concatenate(isEnd)
+        codes = np.concatenate(codes)
+        licenses = np.concatenate(licenses)
+
+        # Lines of each process in order: an END line is valid if the
+        # previous line of the process is a START line (lines are in order,
+        # the stable sort keeps the order of the lines of a process).
+        order = np.argsort(codes, kind = 'stable')
+        codes = codes[order]
+        isEnd = isEnd[order]
+        sameProcess = codes[1:] == codes[:-1]
+        paired = np.zeros(len(order), dtype = bool)
+        paired[1:] = isEnd[1:] & ~isEnd[:-1] & sameProcess
+        endIndex = np.flatnonzero(paired)
+        startLines = lines[order[endIndex - 1]]
+        endLines = lines[order[endIndex]]
+
+        # Processes whose last line is a START line are not terminated
+        last = np.ones(len(order), dtype = bool)
+        last[:-1] = ~sameProcess
+        noOpen = int(np.count_nonzero(last & ~isEnd))
+
+        # Pairs in order of their END lines (as in the text reader)
+        pairOrder = np.argsort(endLines, kind = 'stable')
+        pairs = np.empty((len(pairOrder), 2), dtype = np.int64)
+        pairs[:, 0] = startLines[pairOrder]
+        pairs[:, 1] = endLines[pairOrder]
+        validLines = array('q')
+        validLines.frombytes(pairs.tobytes())
+
+        licenses = dict(zip(pairs[:, 0].tolist(), licenses[order[endIndex]][pairOrder].tolist()))
+
+        return validLines, self.numberLines, licenses, noOpen
+
+    # =====================
+    # records()
+    # =====================
+
+    # Returns an iterator of the records of the $START/$END lines (see
+    # lineRecords()).
+    #
+    # Input parameters:
+    #   - position: position[0] is the line number of the first line; it is
+    #       set to the line number after the last line when the iterator
+    #       is exhausted.
+    #   - lineValid: If given, only lines with lineValid[line number] != 0
+    #       are returned (bytes-like, one byte per line).
+
+    def records(self, position, lineValid = None):
+        return chain.from_iterable(self.__blockRecords(position, lineValid))
+
+    # =====================
+    # blockRecords()
+    # =====================
+
+    # Returns an iterator of the records of the $START/$END lines of a block
+    # of lines (bytes, e.g. received from a socket, see module LogService),
+    # independent of the file of the scanner. The fields are converted
+    # before the iterator is returned (invalid START time stamps raise
+    # ValueError).
+    #
+    # Input parameters:
+    #   - data: Block of complete lines.
+    #   - position: position[0] is the line number of the first line; it is
+    #       set to the line number after the last line.
+
+    def blockRecords(self, data, position):
+        if not data:
+            return iter(())
+        data, buffer, lineStarts, lineEnds = self.__splitLines(data)
+        records = self.__recordsOf(data, buffer, lineStarts, lineEnds, position[0])
+        position[0] = position[0] + len(lineEnds)
+        return records
+
+    # =====================
+    # __blockRecords()
+    # =====================
+
+    # Generator of the records of each block of the file (see records()).
+
+    def __blockRecords(self, position, lineValid):
+        first = position[0]
+        if lineValid is not None:
+            lineValid = np.frombuffer(lineValid, dtype = np.uint8)
+
+        for data, buffer, lineStarts, lineEnds, firstLine in self.__blocks():
+            yield self.__recordsOf(data, buffer, lineStarts, lineEnds, first + firstLine, lineValid)
+
+        position[0] = first + self.numberLines
+
+    # =====================
+    # __recordsOf()
+    # =====================
+
+    # Returns an iterator of the records of a block (see __blocks());
+    # firstLine is the line number of the first line of the block. If
+    # lineValid is given (NumPy array), only lines with lineValid[line
+    # number] != 0.
+
+    def __recordsOf(self, data, buffer, lineStarts, lineEnds, firstLine, lineValid = None):
+        lineIndex, ends, commas, isEnd = self.__eventLines(buffer, lineStarts, lineEnds)
+        if lineValid is not None:
+            selected = lineValid[firstLine + lineIndex] != 0
+            lineIndex = lineIndex[selected]
+            ends = ends[selected]
+            commas = commas[selected]
+            isEnd = isEnd[selected]
+        if len(lineIndex) == 0:
+            return iter(())
+
+        codes = self.__processCodes(data, buffer, commas[:, 0] + 1, np.minimum(commas[:, 1], ends))
+        processIDs = codes.tolist()
+        for index in np.flatnonzero(codes < 0).tolist():
+            processIDs[index] = self.processIDs[-processIDs[index] - 1]
+
+        # Time stamp: field 2 of START lines, field 4 of END lines
+        timeStarts = np.where(isEnd, commas[:, 3], commas[:, 1]) + 1
+        timeEnds = np.minimum(np.where(isEnd, commas[:, 4], commas[:, 2]), ends)
+        times, invalid = self.__times(data, buffer, timeStarts, timeEnds)
+        times = times.tolist()
+        for index in invalid:
+            if not isEnd[index]:
+                parseLogTime(data[timeStarts[index]:timeEnds[index]].decode(self.encoding))   # raises
+            times[index] = None
+
+        licenses = np.full(len(lineIndex), None, dtype = object)
+        licenses[isEnd] = self.__fieldValues(data, commas[isEnd, 1] + 1, commas[isEnd, 3],
+                                             self.licenseKeys, self.__licenseKey)
+        toolboxes = np.full(len(lineIndex), None, dtype = object)
+        toolboxes[isEnd] = self.__fieldValues(data, commas[isEnd, 4] + 1, np.minimum(commas[isEnd, 5], ends[isEnd]),
+                                              self.toolboxFields, self.__decode)
+
+        return zip((firstLine + lineIndex).tolist(), processIDs, times, licenses.tolist(), toolboxes.tolist())
+
+    # =====================
+    # __blocks()
+    # =====================
+
+    # Yields the blocks of complete lines of the file as (data (bytes),
+    # buffer, line starts, line ends (see __splitLines()), line number of
+    # the first line in the file). Counts the lines in self.numberLines.
+
+    def __blocks(self):
+        self.numberLines = 0
+        remaining = self.noLines
+        with self.__lineBlocks() as lineBlocks:
+            for data in lineBlocks:
+                data, buffer, lineStarts, lineEnds = self.__splitLines(data, remaining)
+                if remaining is not None:
+                    remaining = remaining - len(lineEnds)
+
+                firstLine = self.numberLines
+                self.numberLines = self.numberLines + len(lineEnds)
+                yield data, buffer, lineStarts, lineEnds, firstLine
+                if remaining is not None and remaining <= 0:
+                    break
+
+    # =====================
+    # __splitLines()
+    # =====================
+
+    # Splits a block of lines (bytes, not empty). Returns data (line breaks
+    # translated as in text mode), buffer (NumPy array of the bytes, padded),
+    # start and end of each line in buffer (end without '\n'). At most
+    # maxLines lines if given.
+
+    def __splitLines(self, data, maxLines = None):
+        if b'\r' in data:
+            data = data.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+
+        # The buffer is padded: the fixed-length fields (process IDs up to 18,
+        # time stamps 16 bytes) are read without bounds checks.
+        buffer = np.frombuffer(data + bytes(32), dtype = np.uint8)
+        lineEnds = np.flatnonzero(buffer[:len(data)] == 10)
+        if data[-1] != 10:
+            lineEnds = np.append(lineEnds, len(data))
+        if maxLines is not None:
+            lineEnds = lineEnds[:maxLines]
+        lineStarts = np.empty(len(lineEnds), dtype = np.int64)
+        lineStarts[0] = 0
+        lineStarts[1:] = lineEnds[:-1] + 1
+        return data, buffer, lineStarts, lineEnds
+
+    # =====================
+    # __lineBlocks()
+    # =====================
+
+    # Context manager providing an iterator of the blocks (bytes) of the
+    # file, starting at self.offset. Each block ends at the end of a line
+    # (or the end of the file) and is at least SCAN_BLOCK_SIZE bytes long
+    # (except the last block).
+
+    @contextlib.contextmanager
+    def __lineBlocks(self):
+        if self.compression is not None:
+            with openLogFile(self.fileName, 'rb') as readFile:
+                yield _lineBlocks(readFile)
+            return
+
+        with open(self.fileName, 'rb') as readFile:
+            size = os.fstat(readFile.fileno()).st_size
+            if size <= self.offset:
+                yield iter(())
+                return
+            with mmap.mmap(readFile.fileno(), 0, access = mmap.ACCESS_READ) as mapped:
+                yield _mappedBlocks(mapped, self.offset, size)
+
+    # =====================
+    # __eventLines()
+    # =====================
+
+    # Finds the $START/$END lines of a block with all fields (START: 3,
+    # END: 6 fields). Lines with missing fields are skipped.
+    #
+    # Output parameters:
+    #   - lineIndex: Index of each line in the block.
+    #   - ends: End of each line in buffer.
+    #   - commas: Positions of the first 6 commas of each line (a position
+    #       after the end of the line if missing).
+    #   - isEnd: True for END lines.
+
+    def __eventLines(self, buffer, lineStarts, lineEnds):
+        lineIndex = np.flatnonzero(buffer[lineStarts] == 36)     # '$'
+        starts = lineStarts[lineIndex]
+        isStart = ((buffer[starts + 1] == 83) & (buffer[starts + 2] == 84) & (buffer[starts + 3] == 65)
+                   & (buffer[starts + 4] == 82) & (buffer[starts + 5] == 84))            # 'START'
+        isEnd = ~isStart & (buffer[starts + 1] == 69) & (buffer[starts + 2] == 78) & (buffer[starts + 3] == 68)
+        selected = isStart | isEnd
+        lineIndex = lineIndex[selected]
+        starts = starts[selected]
+        isEnd = isEnd[selected]
+        ends = lineEnds[lineIndex]
+
+        positions = np.flatnonzero(buffer == 44)                 # ','
+        positions = np.append(positions, np.full(6, len(buffer), dtype = positions.dtype))
+        first = np.searchsorted(positions, starts)
+        commas = positions[first[:, None] + np.arange(6)]
+
+        complete = np.where(isEnd, commas[:, 4] < ends, commas[:, 1] < ends)
+        return lineIndex[complete], ends[complete], commas[complete], isEnd[complete]
+
+    # =====================
+    # __processCodes()
+    # =====================
+
+    # Returns the process IDs of the fields data[fieldStarts:fieldEnds] as
+    # int64 codes: decimal IDs without leading zeros (up to 18 digits) are
+    # their value, other IDs a code < 0 (see self.processIDs).
+
+    def __processCodes(self, data, buffer, fieldStarts, fieldEnds):
+        lengths = fieldEnds - fieldStarts
+        codes = np.zeros(len(fieldStarts), dtype = np.int64)
+        numeric = (lengths >= 1) & (lengths <= 18)
+        maxLength = int(lengths[numeric].max()) if numeric.any() else 0
+        for cc in range(maxLength):
+            digits = buffer[fieldStarts + cc].astype(np.int64) - 48
+            inField = cc < lengths
+            numeric = numeric & (~inField | ((digits >= 0) & (digits <= 9)))
+            codes = np.where(inField, codes * 10 + digits, codes)
+        numeric = numeric & ((buffer[fieldStarts] != 48) | (lengths == 1))
+
+        for index in np.flatnonzero(~numeric).tolist():
+            processID = data[fieldStarts[index]:fieldEnds[index]].decode(self.encoding)
+            code = self.processCodes.get(processID)
+            if code is None:
+                self.processIDs.append(_processKey(processID))
+                code = -len(self.processIDs)
+                self.processCodes[processID] = code
+            codes[index] = code
+        return codes
+
+    # =====================
+    # __times()
+    # =====================
+
+    # Converts the time stamps data[fieldStarts:fieldEnds] to minutes since
+    # EPOCH. Time stamps of the fixed format "Y-m-d H:M" are converted
+    # vectorized, others with parseLogTime().
+    #
+    # Output parameters:
+    #   - times: Minutes since EPOCH (int64).
+    #   - invalid: Indices of invalid time stamps (list).
+
+    def __times(self, data, buffer, fieldStarts, fieldEnds):
+        chars = buffer[fieldStarts + np.arange(16)[:, None]]      # chars[k] = k-th character of each field
+        digits = chars.astype(np.int32) - 48
+
+        year = ((digits[0] * 10 + digits[1]) * 10 + digits[2]) * 10 + digits[3]
+        month = digits[5] * 10 + digits[6]
+        day = digits[8] * 10 + digits[9]
+        hour = digits[11] * 10 + digits[12]
+        minute = digits[14] * 10 + digits[15]
+
+        leapYear = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+        monthDays = np.array([31, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])[np.clip(month, 0, 12)]
+        regular = ((fieldEnds - fieldStarts == 16)
+                   & (chars[4] == 45) & (chars[7] == 45) & (chars[10] == 32) & (chars[13] == 58)
+                   & ((chars[[0, 1, 2, 3, 5, 6, 8, 9, 11, 12, 14, 15]] - np.uint8(48)) <= 9).all(0)
+                   & (year >= 1) & (month >= 1) & (month <= 12)
+                   & (day >= 1) & (day <= monthDays + (leapYear & (month == 2)))
+                   & (hour < 24) & (minute < 60))
+
+        # Days since 1970-01-01 (proleptic Gregorian calendar)
+        year = year - (month <= 2)
+        era = year // 400
+        yearOfEra = year - era * 400
+        dayOfYear = (153 * ((month + 9) % 12) + 2) // 5 + day - 1
+        days = era.astype(np.int64) * 146097 + yearOfEra * 365 + yearOfEra // 4 - yearOfEra // 100 + dayOfYear - 719468
+        times = days * 1440 + hour * 60 + minute
+
+        invalid = []
+        for index in np.flatnonzero(~regular).tolist():
+            try:
+                times[index] = parseLogTime(data[fieldStarts[index]:fieldEnds[index]].decode(self.encoding))
+            except ValueError:
+                invalid.append(index)
+        return times, invalid
+
+    # =====================
+    # __fieldValues()
+    # =====================
+
+    # Returns the values of the fields data[fieldStarts:fieldEnds] (object
+    # array). Each distinct field is converted once: values = {field (bytes):
+    # value}, convert(field) for new fields.
+
+    def __fieldValues(self, data, fieldStarts, fieldEnds, values, convert):
+        fields = list(map(data.__getitem__, map(slice, fieldStarts.tolist(), fieldEnds.tolist())))
+        distinct = dict.fromkeys(fields)
+        table = np.empty(len(distinct), dtype = object)
+        for index, field in enumerate(distinct):
+            value = values.get(field)
+            if value is None:
+                value = convert(field)
+                values[field] = value
+            table[index] = value
+            distinct[field] = index
+        return table[np.fromiter(map(distinct.__getitem__, fields), dtype = np.intp, count = len(fields))]
+
+    # =====================
+    # __licenseKey(), __decode()
+    # =====================
+
+    # Conversion of license ("licenseNo,version") and toolbox fields.
+
+    def __licenseKey(self, field):
+        licenseNo, version = field.decode(self.encoding).split(',')
+        return (sys.intern(licenseNo), sys.intern(version))
+
+    def __decode(self, field):
+        return field.decode(self.encoding)
+
+
+
+##############################################################################
+### class DecompressingReader
+##############################################################################
+###
+### Raw binary stream (io.RawIOBase) of the decompressed data of a compressed
+### log file (see openLogFile()). A background thread decompresses the file
+### in blocks of DECOMPRESS_BLOCK_SIZE bytes into a queue of at most
+### DECOMPRESS_QUEUE_SIZE blocks, i.e. decompression overlaps with the
+### processing of the data (gzip, bz2 and lzma release the GIL) and the
+### memory is bounded. Errors of the decompression (e.g. a truncated file)
+### are raised by the reading thread. close() stops the background thread.
+##############################################################################
+
+class DecompressingReader(io.RawIOBase):
+
+    # =================
+    # Constructor
+    # =================
+
+    # Input parameters:
+    #   - fileName: Name of the compressed file.
+    #   - compression: Module of the compression format (gzip, bz2, lzma).
+
+    def __init__(self, fileName, compression):
+        super().__init__()
+        self.name = fileName
+        self.blocks = queue.Queue(DECOMPRESS_QUEUE_SIZE)
+        self.block = memoryview(b'')     # Current block
+        self.position = 0                # Read position in the current block
+        self.finished = False            # End of the data reached
+        self.stopping = threading.Event()
+        self.thread = threading.Thread(target = self.__decompress, args = (compression,), daemon = True)
+        self.thread.start()
+
+    # =====================
+    # readinto()
+    # =====================
+
+    # Reads decompressed data into a buffer. Returns the number of bytes
+    # read (0: end of the data).
+
+    def readinto(self, buffer):
+        if self.position == len(self.block):
+            if self.finished:
+                return 0
+            block = self.blocks.get()
+            if isinstance(block, Exception):
+                self.finished = True
+                raise block
+            if not block:
+                self.finished = True
+                return 0
+            self.block = memoryview(block)
+            self.position = 0
+
+        size = min(len(buffer), len(self.block) - self.position)
+        buffer[:size] = self.block[self.position:self.position + size]
+        self.position = self.position + size
+        return size
+
+    def readable(self):
+        return True
+
+    # =====================
+    # close()
+    # =====================
+
+    # Stops the background thread (the remaining data is not decompressed).
+
+    def close(self):
+        if not self.closed:
+            self.stopping.set()
+            while self.thread.is_alive():
+                try:
+                    self.blocks.get(timeout = 0.1)
+                except queue.Empty:
+                    pass
+            self.thread.join()
+        super().close()
+
+    # =====================
+    # __decompress()
+    # =====================
+
+    # Background thread: decompresses the file into the queue. The end of
+    # the data is marked by an empty block, errors are passed as exceptions.
+
+    def __decompress(self, compression):
+        try:
+            with compression.open(self.name, 'rb') as readFile:
+                while not self.stopping.is_set():
+                    block = readFile.read(DECOMPRESS_BLOCK_SIZE)
+                    self.__put(block)
+                    if not block:
+                        return
+        except Exception as error:
+            self.__put(error)
+
+    def __put(self, item):
+        while not self.stopping.is_set():
+            try:
+                self.blocks.put(item, timeout = 0.1)
+                return
+            except queue.Full:
+                pass
@@ -0,0 +1,504 @@
+##############################################################################
+### Ingest service of LogProcessor [class LogService].
+### Receives $START/$END lines of license servers over a local TCP or Unix
+### socket and processes them as they arrive (asyncio). Each connection has
+### its own LogStream (open processes, buffered instances per license and
+### version); the final groups of all connections are written to one output
+### file with the output writer of the processor as soon as they are final
+### (see LogProcessor.openStreamOutput()).
+###
+### Usage:
+###    import asyncio
+###    from LogProcessor import LogProcessor
+###    from LogService import LogService
+###
+###    service = LogService(LogProcessor(), "usage.csv", port = 5140)
+###    asyncio.run(service.run())          # until service.stop() or Ctrl+C
+###
+### Or from the command line:
+###    python LogService.py serve usage.csv [--port 5140 | --unix /tmp/log.sock]
+###    python LogService.py send [--port 5140 | --unix ...] [--lines 100000]
+###                              [--connections 4] [--log file1 file2 ...]
+###    python LogService.py benchmark [--lines 1000000] [--connections 4]
+###
+### Protocol:
+### Lines of the log file format (see LogProcessor) separated by '\n' (or
+### '\r\n'). A connection is one source of lines, e.g. one license server;
+### the lines of a connection must be in order of the log. When a connection
+### is closed, its remaining groups are written and its open processes are
+### non-terminated.
+###
+### Backpressure: connections are read in blocks of READ_SIZE bytes into a
+### bounded queue (queueSize blocks), which is processed by a single task.
+### If the queue is full, no connection is read, i.e. the senders are
+### blocked by TCP flow control (StreamWriter.drain() of the sender).
+### Batched writes: the output writer is flushed when the queue is empty
+### or every flushInterval seconds, not after each row.
+### The blocks are parsed with the byte reader (LogScanner.blockRecords())
+### if NumPy is installed and the byte reader is enabled (see
+### LogProcessor.setByteReader()), otherwise as text.
+###
+### Class LogService:
+### -----------------
+###   - LogService(processor, outputFile, [opt.] host = "127.0.0.1",
+###                [opt.] port = 5140, [opt.] path = "", [opt.] queueSize = 64,
+###                [opt.] flushInterval = 1.0)
+###     path: Unix socket instead of TCP. port = 0: any free port (see
+###     address after start()).
+###   - start(), stop(): Start/stop the service (coroutines). stop() closes
+###     all connections, processes the queued lines and closes the output.
+###   - run(): start(), then serve until stop() is called (coroutine).
+###   - waitClosed([opt.] noConnections): Wait until the senders closed
+###     their connections (coroutine).
+###   - stats: Statistics of the closed connections (ProcessStats).
+###
+### Functions:
+### ----------
+###  - sendLines(lines, [opt.] host, port, path): Sends lines over one
+###    connection (coroutine).
+###  - fakeSenders(noConnections, noLines, [opt.] seed, host, port, path):
+###    Sends synthetic logs (module LogGenerator) over noConnections
+###    simultaneous connections (coroutine).
+###
+################################################################################
+
+
+import argparse
+import asyncio
+import locale
+import os
+import shutil
+import tempfile
+import time
+from contextlib import ExitStack
+
+from LogGenerator import logLines
+from LogProcessor import LogProcessor, LogScanner, lineRecords, np
+
+
+# Default TCP port of the service
+DEFAULT_PORT = 5140
+
+# Size of the blocks read from a connection (bytes)
+READ_SIZE = 1 << 16
+
+# Default maximum number of queued blocks (backpressure)
+QUEUE_SIZE = 64
+
+# Default maximum time between two flushes of the output (seconds)
+FLUSH_INTERVAL = 1.0
+
+# Number of lines sent at once by sendLines()
+SEND_BATCH = 1000
+
+
+class LogService:
+
+    # =================
+    # Constructor
+    # =================
+
+    # Input parameters:
+    #   - processor: LogProcessor instance (date format, time filter/windows,
+    #       eviction, output writer, concurrency). Not to be used for other
+    #       files while the service runs.
+    #   - outputFile: Output file (appended).
+    #   - host, port: TCP address of the service (port = 0: any free port).
+    #   - path: Unix socket of the service (instead of TCP).
+    #   - queueSize: Maximum number of queued blocks of READ_SIZE bytes.
+    #   - flushInterval: Maximum time between two flushes of the output
+    #       writer (seconds).
+
+    def __init__(self, processor, outputFile, host = "127.0.0.1", port = DEFAULT_PORT, path = "",
+                 queueSize = QUEUE_SIZE, flushInterval = FLUSH_INTERVAL):
+        self.processor = processor
+        self.outputFile = outputFile
+        self.host = host
+        self.port = port
+        self.path = path
+        self.queueSize = queueSize
+        self.flushInterval = flushInterval
+        self.encoding = locale.getpreferredencoding(False)
+
+        self.address = None          # (host, port) or path of the running service
+        self.stats = None            # Statistics of the closed connections (ProcessStats)
+        self.noConnections = 0       # Number of accepted connections
+
+        self.__stack = None          # Open output (StreamOutput)
+        self.__output = None
+        self.__server = None
+        self.__queue = None          # Queue of blocks [(stream, scanner, name, block), ...]
+        self.__worker = None         # Task processing the queue
+        self.__connections = {}      # {handler task: StreamWriter} of open connections
+        self.__stopping = None       # Task of stop()
+        self.__stopped = None        # Event set when the service is stopped
+
+    # =====================
+    # start()
+    # =====================
+
+    # Opens the output and starts listening (coroutine).
+
+    async def start(self):
+        self.__stack = ExitStack()
+        self.__output = self.__stack.enter_context(self.processor.openStreamOutput(self.outputFile))
+        self.stats = self.__output.stats
+        self.__queue = asyncio.Queue(self.queueSize)
+        self.__stopped = asyncio.Event()
+        self.__worker = asyncio.create_task(self.__process())
+
+        try:
+            if self.path:
+                self.__server = await asyncio.start_unix_server(self.__handle, path = self.path)
+                self.address = self.path
+            else:
+                self.__server = await asyncio.start_server(self.__handle, self.host, self.port)
+                self.address = self.__server.sockets[0].getsockname()[:2]
+        except OSError:
+            await self.__queue.put(None)
+            await self.__worker
+            self.__stack.close()
+            raise
+
+    # =====================
+    # run()
+    # =====================
+
+    # Starts the service and serves until stop() is called (coroutine). If
+    # run() is cancelled (e.g. Ctrl+C in asyncio.run()), the service is
+    # stopped.
+
+    async def run(self):
+        await self.start()
+        try:
+            await self.__stopped.wait()
+        finally:
+            await self.stop()
+
+    # =====================
+    # waitClosed()
+    # =====================
+
+    # Waits until noConnections connections were accepted and all open
+    # connections are closed by the senders (coroutine), e.g. before stop()
+    # when all senders are done.
+
+    async def waitClosed(self, noConnections = 0):
+        while self.__connections or self.noConnections < noConnections:
+            if self.__connections:
+                await asyncio.gather(*list(self.__connections))
+            else:
+                await asyncio.sleep(0.01)
+
+    # =====================
+    # stop()
+    # =====================
+
+    # Stops the service (coroutine): no new connections, open connections
+    # are closed, the queued blocks are processed, all streams finished and
+    # the output closed. Can be called repeatedly.
+
+    async def stop(self):
+        if self.__stopping is None:
+            self.__stopping = asyncio.ensure_future(self.__shutdown())
+        await asyncio.shield(self.__stopping)
+
+    async def __shutdown(self):
+        self.__server.close()
+        for writer in self.__connections.values():
+            writer.close()
+        await asyncio.gather(*list(self.__connections))
+        await self.__server.wait_closed()
+
+        await self.__queue.put(None)
+        await self.__worker
+        self.__stack.close()
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+        if not self.processor.quiet:
+            print("Service stopped: " + str(self.noConnections) + " connections")
+            print(self.stats.report(), end = "")
+            print("Output file: " + self.outputFile)
+        self.__stopped.set()
+
+    # =====================
+    # __handle()
+    # =====================
+
+    # Connection handler: reads blocks of complete lines into the queue
+    # (waits while the queue is full). Each connection has its own LogStream
+    # and LogScanner (interned fields). At the end of the connection, the
+    # stream of the connection is finished.
+
+    async def __handle(self, reader, writer):
+        self.__connections[asyncio.current_task()] = writer
+        self.noConnections = self.noConnections + 1
+        name = str(writer.get_extra_info('peername') or "connection " + str(self.noConnections))
+        stream = self.__output.newStream()
+        scanner = None
+        if self.processor.byteReader and np is not None:
+            scanner = LogScanner(None)
+        rest = b''
+
+        try:
+            while True:
+                block = await reader.read(READ_SIZE)
+                if not block:
+                    break
+                block = rest + block
+                cut = block.rfind(b'\n') + 1
+                rest = block[cut:]
+                if cut > 0:
+                    await self.__queue.put((stream, scanner, name, block[:cut]))
+        except ConnectionError:
+            pass
+        finally:
+            if rest:
+                await self.__queue.put((stream, scanner, name, rest))
+            await self.__queue.put((stream, scanner, name, None))
+            writer.close()
+            del self.__connections[asyncio.current_task()]
+
+    # =====================
+    # __process()
+    # =====================
+
+    # Task processing the queued blocks: the lines of a block are fed to the
+    # stream of its connection (block None: the stream is finished). Stops
+    # at the item None.
+
+    async def __process(self):
+        output = self.__output
+        queue = self.__queue
+        lastFlush = time.monotonic()
+
+        while True:
+            item = await queue.get()
+            if item is None:
+                break
+            stream, scanner, name, block = item
+            if block is None:
+                output.finish(stream)
+            else:
+                self.__feed(stream, scanner, name, block)
+
+            if queue.empty() or time.monotonic() - lastFlush >= self.flushInterval:
+                output.flushOutput()
+                lastFlush = time.monotonic()
+            # Let the connections fill the queue while processing
+            await asyncio.sleep(0)
+
+        output.flushOutput()
+
+    # =====================
+    # __feed()
+    # =====================
+
+    # Feeds the lines of a block to a stream. The block is parsed first
+    # (see __parse()); if it has invalid lines (e.g. START line with invalid
+    # time stamp), it is parsed line by line and the invalid lines are
+    # skipped. Errors are printed and counted in self.stats; the service
+    # continues.
+
+    def __feed(self, stream, scanner, name, block):
+        position = [stream.lineNumber]
+        try:
+            records = self.__parse(scanner, block, position)
+        except ValueError:
+            records = []
+            if b'\r' in block:
+                block = block.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+            lines = block.split(b'\n')
+            if not lines[-1]:
+                lines.pop()
+            for line in lines:
+                try:
+                    records.extend(self.__parse(scanner, line + b'\n', position))
+                except ValueError as error:
+                    self.__error(name, str(error) + " (line number = " + str(position[0]) + ")")
+                    position[0] = position[0] + 1
+
+        # END lines with invalid time stamp raise ValueError while feeding;
+        # the stream continues with the next record.
+        records = iter(records)
+        while True:
+            try:
+                stream.feedRecords(records, position)
+                return
+            except ValueError as error:
+                self.__error(name, str(error))
+
+    # =====================
+    # __parse()
+    # =====================
+
+    # Returns the records of the lines of a block (list, see
+    # LogScanner.blockRecords()): parsed by the LogScanner of the connection,
+    # or as text if scanner is None. position[0] is the line number of the
+    # first line; it is set to the line number after the last line (not
+    # changed if a line is invalid: ValueError).
+
+    def __parse(self, scanner, block, position):
+        if scanner is not None:
+            return list(scanner.blockRecords(block, position))
+
+        text = block.decode(self.encoding)
+        if '\r' in text:
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+        lines = text.split('\n')
+        if not lines[-1]:
+            lines.pop()
+        return list(lineRecords(lines, position))
+
+    def __error(self, name, message):
+        self.stats.errors = self.stats.errors + 1
+        print("ERROR: " + name + ": " + message)
+
+
+
+# ==========================
+# sendLines()
+# ==========================
+
+# Sends lines to a LogService over one connection (coroutine). Waits while
+# the service does not read (backpressure, StreamWriter.drain()).
+#
+# Input parameters:
+#   - lines: Iterable of lines (with '\n'), e.g. an open log file.
+#   - host, port, path: Address of the service (see LogService).
+#
+# Output parameters:
+#   - noLines: Number of lines sent.
+
+async def sendLines(lines, host = "127.0.0.1", port = DEFAULT_PORT, path = ""):
+    if path:
+        reader, writer = await asyncio.open_unix_connection(path)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+
+    encoding = locale.getpreferredencoding(False)
+    noLines = 0
+    batch = []
+    try:
+        for line in lines:
+            batch.append(line)
+            if len(batch) >= SEND_BATCH:
+                writer.write("".join(batch).encode(encoding))
+                noLines = noLines + len(batch)
+                batch = []
+                await writer.drain()
+        writer.write("".join(batch).encode(encoding))
+        noLines = noLines + len(batch)
+        await writer.drain()
+    finally:
+        writer.close()
+        await writer.wait_closed()
+    return noLines
+
+
+# ==========================
+# fakeSenders()
+# ==========================
+
+# Sends synthetic logs (LogGenerator.logLines(), seeds seed, seed + 1, ...)
+# over noConnections simultaneous connections (coroutine). Returns the total
+# number of lines sent.
+
+async def fakeSenders(noConnections, noLines, seed = 0, host = "127.0.0.1", port = DEFAULT_PORT, path = ""):
+    counts = await asyncio.gather(*[sendLines(logLines(noLines, seed = seed + cc), host, port, path)
+                                    for cc in range(noConnections)])
+    return sum(counts)
+
+
+# ==========================
+# _sendFiles()
+# ==========================
+
+# Sends log files, each over its own connection (coroutine). Returns the
+# total number of lines sent.
+
+async def _sendFiles(fileNames, host, port, path):
+    with ExitStack() as stack:
+        files = [stack.enter_context(open(fileName, 'r')) for fileName in fileNames]
+        counts = await asyncio.gather(*[sendLines(readFile, host, port, path) for readFile in files])
+    return sum(counts)
+
+
+# ==========================
+# _benchmark()
+# ==========================
+
+# Runs a service on localhost (any free port or a Unix socket in a
+# temporary directory) and sends pre-generated synthetic logs over
+# noConnections connections. Returns the number of lines and the time from
+# the first line sent until the output is closed.
+
+async def _benchmark(noLines, noConnections, unixSocket):
+    directory = tempfile.mkdtemp(prefix = "service_")
+    try:
+        processor = LogProcessor()
+        processor.setQuiet()
+        path = os.path.join(directory, "service.sock") if unixSocket else ""
+        service = LogService(processor, os.path.join(directory, "output.csv"), port = 0, path = path)
+        await service.start()
+        host, port = ("", 0) if unixSocket else service.address
+        logs = [list(logLines(noLines, seed = cc)) for cc in range(noConnections)]
+
+        startTime = time.perf_counter()
+        await asyncio.gather(*[sendLines(lines, host, port, path) for lines in logs])
+        await service.waitClosed(noConnections)
+        await service.stop()
+        return service.stats.lines, time.perf_counter() - startTime
+    finally:
+        shutil.rmtree(directory, ignore_errors = True)
+
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Ingest service of LogProcessor.")
+    commands = parser.add_subparsers(dest = "command", required = True)
+
+    serve = commands.add_parser("serve", help = "run the service (Ctrl+C to stop)")
+    serve.add_argument("outputFile")
+    serve.add_argument("--dateFormat", default = "", help = "output date format (see setDateFormat())")
+
+    send = commands.add_parser("send", help = "send log files or synthetic logs to a service")
+    send.add_argument("--log", nargs = "+", default = [], help = "log files (one connection per file)")
+    send.add_argument("--lines", type = int, default = 100000, help = "lines per connection (synthetic)")
+    send.add_argument("--connections", type = int, default = 4, help = "number of connections (synthetic)")
+    send.add_argument("--seed", type = int, default = 0)
+
+    benchmark = commands.add_parser("benchmark", help = "service and fake senders on localhost")
+    benchmark.add_argument("--lines", type = int, default = 250000, help = "lines per connection")
+    benchmark.add_argument("--connections", type = int, default = 4)
+
+    for command in (serve, send, benchmark):
+        command.add_argument("--unix", default = "", help = "Unix socket (instead of TCP)")
+    for command in (serve, send):
+        command.add_argument("--host", default = "127.0.0.1")
+        command.add_argument("--port", type = int, default = DEFAULT_PORT)
+    arguments = parser.parse_args()
+
+    if arguments.command == "serve":
+        processor = LogProcessor()
+        if arguments.dateFormat:
+            processor.setDateFormat(arguments.dateFormat)
+        service = LogService(processor, arguments.outputFile, arguments.host, arguments.port, arguments.unix)
+        try:
+            asyncio.run(service.run())
+        except KeyboardInterrupt:
+            pass
+
+    elif arguments.command == "send":
+        if arguments.log:
+            noLines = asyncio.run(_sendFiles(arguments.log, arguments.host, arguments.port, arguments.unix))
+        else:
+            noLines = asyncio.run(fakeSenders(arguments.connections, arguments.lines, arguments.seed,
+                                              arguments.host, arguments.port, arguments.unix))
+        print("Lines sent: " + str(noLines))
+
+    else:
+        noLines, seconds = asyncio.run(_benchmark(arguments.lines, arguments.connections, bool(arguments.unix)))
+        print("Lines processed: " + str(noLines) + " in " + "{:.2f}".format(seconds) + " s ("
+              + "{:.0f}".format(noLines / seconds) + " lines/s)")
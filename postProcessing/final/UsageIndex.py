@@ -0,0 +1,358 @@
+##############################################################################
+### Index of processed usage data [class UsageIndex].
+### Answers "how many hours was toolbox X of license Y used between A and B"
+### in O(log n) per query, instead of filtering the full data set.
+###
+### Usage:
+###    from UsageIndex import UsageIndex, usageHistogram
+###
+###    usageIndex = UsageIndex.fromDataFrame(dataset)    # or fromTextFiles(),
+###                                                      #    fromColumns()
+###    usageIndex.usageTime(101, "Matlab", "26.05.2020 00:00", "27.05.2020 00:00")
+###    usageIndex.usageTimes(101, "Matlab", dayStarts, dayEnds)     # batch
+###
+###    usage, licenses, toolboxes, days = usageHistogram(
+###        dataset['License Number'], dataset['Toolbox'], dataset['Start time'],
+###        dataset['End time'], 'day')
+###
+### Method:
+### The usage time of the intervals [s_k, e_k] of a license/toolbox within a
+### window [a, b) is the sum of the clipped durations
+###    sum_k max(0, min(e_k, b) - max(s_k, a)) = F(b) - F(a),
+### with F(t) = sum_{s_k < t} (t - s_k) - sum_{e_k < t} (t - e_k).
+### F(t) is evaluated with a binary search in the sorted start and end times
+### and their cumulative sums. Overlapping intervals are counted multiple
+### times (as when summing the clipped durations).
+###
+### Class UsageIndex:
+### -----------------
+### Constructors:
+###   - UsageIndex(licenses, toolboxes, startTimes, endTimes)
+###     Sequences of equal length, one entry per interval. Times: datetime,
+###     pandas Timestamp or datetime64.
+###   - UsageIndex.fromDataFrame(dataset)
+###     DataFrame with columns 'License Number', 'Toolbox', 'Start time',
+###     'End time' (see dataImport.ipynb).
+###   - UsageIndex.fromTextFiles(files, [opt.] dateFormat)
+###     Output files of LogProcessor (TextWriter).
+###   - UsageIndex.fromColumns(directory)
+###     Output directory of LogProcessor (ColumnWriter).
+###
+### Public methods:
+###   - usageTime(licenseNo, toolbox, startTime, endTime)
+###     Usage time in hours within [startTime, endTime).
+###   - usageTimes(licenseNo, toolbox, startTimes, endTimes)
+###     Usage times in hours for arrays of windows (NumPy array).
+###   - keys()
+###     List of (licenseNo, toolbox) in the index.
+###
+### Functions:
+### ----------
+###  - usageHistogram(licenses, toolboxes, startTimes, endTimes, bucketSize,
+###                   [opt.] startTime, endTime)
+###    Usage time per license, toolbox and bucket (hour, day, week, ...) as
+###    dense NumPy array [license, toolbox, bucket], computed in one
+###    vectorized pass.
+###
+### Times given as strings are parsed with dateFormat (default
+### "%d.%m.%Y %H:%M"). Requires NumPy.
+###
+################################################################################
+
+
+from datetime import datetime, timedelta
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Named bucket sizes of usageHistogram() (minutes)
+BUCKET_SIZES = {'hour': 60, 'day': 1440, 'week': 7*1440}
+
+
+class UsageIndex:
+
+    # =================
+    # Constructor
+    # =================
+
+    # Input parameters:
+    #   - licenses, toolboxes: License number and toolbox of each interval.
+    #   - startTimes, endTimes: Start and end time of each interval.
+    #   - dateFormat: Format of times given as strings.
+
+    def __init__(self, licenses, toolboxes, startTimes, endTimes, dateFormat = "%d.%m.%Y %H:%M"):
+        if np is None:
+            raise ImportError("UsageIndex requires NumPy.")
+
+        self.dateFormat = dateFormat
+
+        startTimes = _toMinutes(startTimes, self.dateFormat)
+        endTimes = _toMinutes(endTimes, self.dateFormat)
+
+        # Key codes {(licenseNo, toolbox): code}
+        self.keyCodes = {}
+        codes = np.empty(len(startTimes), dtype = np.int64)
+        for cc, key in enumerate(zip(licenses, toolboxes)):
+            code = self.keyCodes.get(key)
+            if code is None:
+                code = len(self.keyCodes)
+                self.keyCodes[key] = code
+            codes[cc] = code
+
+        # Start/end times sorted by key and time. Intervals of key code k:
+        # [offsets[k], offsets[k+1])
+        order = np.lexsort((startTimes, codes))
+        self.startTimes = startTimes[order]
+        order = np.lexsort((endTimes, codes))
+        self.endTimes = endTimes[order]
+        self.offsets = np.searchsorted(codes[order], np.arange(len(self.keyCodes) + 1))
+
+        # Cumulative sums: sumStart[i] = sum(startTimes[:i])
+        self.sumStart = np.concatenate(([0], np.cumsum(self.startTimes)))
+        self.sumEnd = np.concatenate(([0], np.cumsum(self.endTimes)))
+
+    # =====================
+    # fromDataFrame()
+    # =====================
+
+    # Creates an index from a DataFrame with columns 'License Number',
+    # 'Toolbox', 'Start time' and 'End time'.
+
+    @classmethod
+    def fromDataFrame(cls, dataset):
+        return cls(dataset['License Number'].tolist(), dataset['Toolbox'].tolist(),
+                   dataset['Start time'].to_numpy(), dataset['End time'].to_numpy())
+
+    # =====================
+    # fromTextFiles()
+    # =====================
+
+    # Creates an index from output files of LogProcessor (text rows
+    # "License, Version, Toolbox, Start timestamp, End timestamp, DeltaTime").
+    #
+    # Input parameters:
+    #   - files: Output file or list of output files.
+    #   - dateFormat: Date format of the output files.
+
+    @classmethod
+    def fromTextFiles(cls, files, dateFormat = "%d.%m.%Y %H:%M"):
+        if not isinstance(files, list):
+            files = [files]
+
+        licenses = []
+        toolboxes = []
+        startTimes = []
+        endTimes = []
+        for file in files:
+            with open(file, 'r') as readFile:
+                for line in readFile:
+                    substr = line.rstrip('\n').split(', ')
+                    if len(substr) < 6:
+                        continue
+                    licenses.append(substr[0])
+                    toolboxes.append(substr[2])
+                    startTimes.append(substr[3])
+                    endTimes.append(substr[4])
+
+        return cls(licenses, toolboxes, startTimes, endTimes, dateFormat)
+
+    # =====================
+    # fromColumns()
+    # =====================
+
+    # Creates an index from an output directory of LogProcessor written by
+    # ColumnWriter.
+
+    @classmethod
+    def fromColumns(cls, directory):
+        from ColumnWriter import loadColumns
+
+        columns, dictionaries = loadColumns(directory)
+        licenses = np.asarray(dictionaries['license'], dtype = object)[columns['license']]
+        toolboxes = np.asarray(dictionaries['toolbox'], dtype = object)[columns['toolbox']]
+
+        return cls(licenses.tolist(), toolboxes.tolist(),
+                   columns['start'].view('datetime64[m]'), columns['end'].view('datetime64[m]'))
+
+    # =====================
+    # keys()
+    # =====================
+
+    # Returns the list of (licenseNo, toolbox) in the index.
+
+    def keys(self):
+        return list(self.keyCodes)
+
+    # =====================
+    # usageTime()
+    # =====================
+
+    # Usage time (in hours) of a toolbox of a license within the time window
+    # [startTime, endTime). Returns 0 for unknown license/toolbox.
+
+    def usageTime(self, licenseNo, toolbox, startTime, endTime):
+        return float(self.usageTimes(licenseNo, toolbox, [startTime], [endTime])[0])
+
+    # =====================
+    # usageTimes()
+    # =====================
+
+    # Usage times (in hours) of a toolbox of a license for arrays of time
+    # windows [startTimes[k], endTimes[k]).
+    #
+    # Output: NumPy array of usage times (float, hours).
+
+    def usageTimes(self, licenseNo, toolbox, startTimes, endTimes):
+        startTimes = _toMinutes(startTimes, self.dateFormat)
+        endTimes = _toMinutes(endTimes, self.dateFormat)
+
+        code = self.keyCodes.get((licenseNo, toolbox))
+        if code is None:
+            return np.zeros(len(startTimes))
+
+        usage = self.__elapsed(code, endTimes) - self.__elapsed(code, startTimes)
+        return np.maximum(usage, 0) / 60
+
+    # =====================
+    # __elapsed()
+    # =====================
+
+    # F(t) (see header): Sum of the durations of the intervals of key 'code'
+    # clipped to (-inf, t), in minutes.
+
+    def __elapsed(self, code, times):
+        first = self.offsets[code]
+        last = self.offsets[code+1]
+
+        noStarted = np.searchsorted(self.startTimes[first:last], times, side = 'left')
+        noEnded = np.searchsorted(self.endTimes[first:last], times, side = 'left')
+
+        started = noStarted * times - (self.sumStart[first + noStarted] - self.sumStart[first])
+        ended = noEnded * times - (self.sumEnd[first + noEnded] - self.sumEnd[first])
+
+        return started - ended
+
+
+
+# ==========================
+# usageHistogram()
+# ==========================
+
+# Usage time per license, toolbox and time bucket (e.g. per day) as a dense
+# matrix. All intervals are processed at once (vectorized): an interval
+# [s, e] adds b_{i+1} - s to the bucket i of s, the full bucket size to
+# the buckets between, and e - b_j to the bucket j of e (difference array,
+# see below). Intervals are split exactly at bucket boundaries.
+#
+# Input parameters:
+#   - licenses, toolboxes, startTimes, endTimes: Intervals (see class
+#       UsageIndex).
+#   - bucketSize: Minutes (int), timedelta, numpy.timedelta64 or one of
+#       'hour', 'day', 'week'.
+#   - startTime: Start of the first bucket. Default: first start time,
+#       rounded down to a full day (to a full bucket for buckets shorter
+#       than a day).
+#   - endTime: End of the last bucket (rounded up to a full bucket).
+#       Default: last end time.
+#   - dateFormat: Format of times given as strings.
+#
+# Output parameters:
+#   - usage: NumPy array [license, toolbox, bucket] of usage times (hours).
+#   - licenseValues, toolboxValues: License number/toolbox of each row/column
+#       of usage (sorted).
+#   - bucketStarts: Start time of each bucket (datetime64[m]).
+
+def usageHistogram(licenses, toolboxes, startTimes, endTimes, bucketSize, startTime = None,
+                   endTime = None, dateFormat = "%d.%m.%Y %H:%M"):
+    if np is None:
+        raise ImportError("usageHistogram() requires NumPy.")
+
+    bucketSize = _toBucketSize(bucketSize)
+    startTimes = _toMinutes(startTimes, dateFormat)
+    endTimes = _toMinutes(endTimes, dateFormat)
+
+    licenseValues, licenseCodes = np.unique(np.asarray(licenses), return_inverse = True)
+    toolboxValues, toolboxCodes = np.unique(np.asarray(toolboxes), return_inverse = True)
+
+    # Time range
+    if startTime is None:
+        first = int(startTimes.min()) if len(startTimes) else 0
+        startTime = first - first % min(bucketSize, 1440)
+    else:
+        startTime = int(_toMinutes([startTime], dateFormat)[0])
+    if endTime is None:
+        endTime = int(endTimes.max()) if len(endTimes) else startTime
+    else:
+        endTime = int(_toMinutes([endTime], dateFormat)[0])
+    noBuckets = max(-(-(endTime - startTime) // bucketSize), 0)
+    endTime = startTime + noBuckets * bucketSize
+
+    # Clip intervals to the time range
+    startTimes = np.clip(startTimes, startTime, endTime)
+    endTimes = np.clip(endTimes, startTime, endTime)
+    valid = endTimes > startTimes
+    startTimes = startTimes[valid] - startTime
+    endTimes = endTimes[valid] - startTime
+    # Row of a license/toolbox: noBuckets + 2 entries (end times at endTime
+    # fall into bucket noBuckets, their full buckets end at noBuckets + 1).
+    rowSize = noBuckets + 2
+    rows = (licenseCodes[valid] * len(toolboxValues) + toolboxCodes[valid]) * rowSize
+
+    # Bucket i of the start time: partial[i] += b_{i+1} - s, full buckets
+    # from i+1 on. Bucket j of the end time: partial[j] -= b_{j+1} - e, no
+    # full buckets from j+1 on. Usage = partial + bucketSize * cumsum(full).
+    startBuckets = startTimes // bucketSize
+    endBuckets = endTimes // bucketSize
+    size = len(licenseValues) * len(toolboxValues) * rowSize
+
+    partial = np.bincount(rows + startBuckets, (startBuckets + 1) * bucketSize - startTimes, size)
+    partial -= np.bincount(rows + endBuckets, (endBuckets + 1) * bucketSize - endTimes, size)
+    full = np.bincount(rows + startBuckets + 1, None, size) - np.bincount(rows + endBuckets + 1, None, size)
+
+    shape = (len(licenseValues), len(toolboxValues), rowSize)
+    usage = partial.reshape(shape) + bucketSize * np.cumsum(full.reshape(shape), axis = 2)
+
+    bucketStarts = (startTime + bucketSize * np.arange(noBuckets)).astype('datetime64[m]')
+
+    return usage[:, :, :noBuckets] / 60, licenseValues, toolboxValues, bucketStarts
+
+
+
+# ==========================
+# _toMinutes()
+# ==========================
+
+# Converts times (strings in dateFormat, datetime, pandas Timestamp,
+# datetime64) to an int64 array of minutes since 1970-01-01.
+
+def _toMinutes(times, dateFormat):
+    if hasattr(times, 'to_numpy'):          # pandas Series/DatetimeIndex
+        times = times.to_numpy()
+    if isinstance(times, np.ndarray) and times.dtype.kind == 'M':
+        return times.astype('datetime64[m]').astype(np.int64)
+
+    times = [datetime.strptime(time, dateFormat) if isinstance(time, str) else time
+             for time in times]
+    return np.array(times, dtype = 'datetime64[m]').astype(np.int64)
+
+
+# ==========================
+# _toBucketSize()
+# ==========================
+
+# Converts a bucket size (see usageHistogram()) to minutes.
+
+def _toBucketSize(bucketSize):
+    if isinstance(bucketSize, str):
+        bucketSize = BUCKET_SIZES[bucketSize]
+    elif isinstance(bucketSize, timedelta):
+        bucketSize = int(bucketSize.total_seconds()) // 60
+    elif isinstance(bucketSize, np.timedelta64):
+        bucketSize = int(bucketSize.astype('timedelta64[m]').astype(np.int64))
+
+    if bucketSize <= 0:
+        raise ValueError("Bucket size must be at least one minute.")
+    return int(bucketSize)
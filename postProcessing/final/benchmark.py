@@ -0,0 +1,317 @@
+##############################################################################
+### Benchmark suite of LogProcessor.
+### Generates a synthetic log file (module LogGenerator) and measures the
+### processing stages, each in a new process:
+###    determineValidEntries   __determineValidEntries()   (lines/s)
+###    processData             __processData()             (lines/s)
+###    processTime             __processTime()             (instances/s)
+###    mergeTimeStamps         __mergeTimeStamps()         (intervals/s)
+###    process                 process(), single pass      (lines/s)
+###    processTwoPass          process(singlePass = False) (lines/s)
+### For each stage the wall time, the rate and the peak resident memory
+### (peak RSS of the process, incl. the setup of the stage) are reported.
+### The input is read with the byte reader (--reader bytes, default) or as
+### text (--reader text, see LogProcessor.setByteReader()).
+###
+### Usage:
+###    python benchmark.py [--lines 1000000] [--concurrency 8] [--orphanRate 0.01]
+###                        [--repeat 3] [--reader bytes|text] ...
+###    python benchmark.py --save        # save results as baseline
+###    python benchmark.py --check       # compare with baseline, exit code 1
+###                                      # on regression, 2 if there is no
+###                                      # comparable baseline
+###
+### Regression: rate below (1 - tolerance) * baseline rate, or peak RSS above
+### (1 + tolerance) * baseline peak RSS. Baselines are machine specific; the
+### baseline file (default: benchmark_baseline.json) is not part of the
+### repository. The generator parameters and the reader are saved with the
+### baseline; results of different parameters are not compared.
+###
+################################################################################
+
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import resource
+except ImportError:        # Windows
+    resource = None
+
+from LogGenerator import generateLog
+from LogProcessor import LogProcessor
+
+
+# Stages in order of execution
+STAGES = ['determineValidEntries', 'processData', 'processTime', 'mergeTimeStamps',
+          'process', 'processTwoPass']
+
+# Default baseline file
+BASELINE_FILE = "benchmark_baseline.json"
+
+
+# ==========================
+# runStage()
+# ==========================
+
+# Runs one stage (executed in a new process, see runBenchmark()).
+#
+# Input parameters:
+#   - stage: Name of the stage (see STAGES).
+#   - logFile: Synthetic log file.
+#   - workDirectory: Directory for output files.
+#   - seed: Seed of the random data of processTime/mergeTimeStamps.
+#   - reader: 'bytes' (byte reader) or 'text'.
+#
+# Output parameters:
+#   - seconds: Wall time of the stage.
+#   - noItems: Number of processed items (lines, instances or intervals).
+#   - peakRss: Peak resident memory of the process in MB (None if unknown).
+
+def runStage(stage, logFile, workDirectory, seed, reader = 'bytes'):
+    processor = LogProcessor()
+    processor.setByteReader(reader == 'bytes')
+    outputFile = os.path.join(workDirectory, stage + ".out")
+    report = io.StringIO()
+
+    with contextlib.redirect_stdout(report):
+        if stage == 'determineValidEntries':
+            startTime = time.perf_counter()
+            validLines, numberLines, licenses = processor._LogProcessor__determineValidEntries(logFile)
+            seconds = time.perf_counter() - startTime
+            noItems = numberLines
+
+        elif stage == 'processData':
+            validLines, numberLines, licenses = processor._LogProcessor__determineValidEntries(logFile)
+            startTime = time.perf_counter()
+            processor._LogProcessor__processData(logFile, outputFile, validLines, numberLines, licenses)
+            seconds = time.perf_counter() - startTime
+            noItems = numberLines
+
+        elif stage == 'processTime':
+            groups = _instanceGroups(seed, 20000)
+            startTime = time.perf_counter()
+            for timeVector, toolboxes in groups:
+                processor._LogProcessor__processTime(timeVector, toolboxes)
+            seconds = time.perf_counter() - startTime
+            noItems = sum(len(toolboxes) for timeVector, toolboxes in groups)
+
+        elif stage == 'mergeTimeStamps':
+            timeStamps = _timeStamps(seed, 20000)
+            startTime = time.perf_counter()
+            for stamps in timeStamps:
+                processor._LogProcessor__mergeTimeStamps(stamps)
+            seconds = time.perf_counter() - startTime
+            noItems = sum(len(stamps) // 2 for stamps in timeStamps)
+
+        else:
+            startTime = time.perf_counter()
+            processor.process(logFile, outputFile = outputFile, singlePass = (stage == 'process'))
+            seconds = time.perf_counter() - startTime
+            noItems = _countLines(logFile)
+
+    return seconds, noItems, _peakRss()
+
+
+# ==========================
+# runBenchmark()
+# ==========================
+
+# Generates the log file and runs the stages, each in a new process. Each
+# stage is run 'repeat' times, the fastest run is reported (less noise).
+# Returns {stage: {'seconds', 'items', 'rate', 'peakRss'}}.
+
+def runBenchmark(parameters, stages = STAGES, logFile = "", repeat = 3, reader = 'bytes'):
+    workDirectory = tempfile.mkdtemp(prefix = "benchmark_")
+    try:
+        if not logFile:
+            logFile = os.path.join(workDirectory, "synthetic.log")
+            startTime = time.perf_counter()
+            generateLog(logFile, **parameters)
+            print("Generated " + logFile + " (" + str(parameters['noLines']) + " lines) in "
+                  + "{:.1f}".format(time.perf_counter() - startTime) + " s")
+
+        results = {}
+        for stage in stages:
+            runs = []
+            for cc in range(max(repeat, 1)):
+                with ProcessPoolExecutor(max_workers = 1) as executor:
+                    runs.append(executor.submit(runStage, stage, logFile, workDirectory,
+                                                parameters.get('seed', 0), reader).result())
+            seconds, noItems, peakRss = min(runs)
+            results[stage] = {'seconds': seconds, 'items': noItems,
+                              'rate': noItems / seconds if seconds > 0 else float('inf'),
+                              'peakRss': peakRss}
+        return results
+    finally:
+        shutil.rmtree(workDirectory, ignore_errors = True)
+
+
+# ==========================
+# checkRegression()
+# ==========================
+
+# Compares results with a baseline. Returns a list of messages, one for each
+# regression (empty: no regression).
+
+def checkRegression(results, baseline, tolerance):
+    regressions = []
+    for stage, result in results.items():
+        reference = baseline.get(stage)
+        if reference is None:
+            continue
+        if result['rate'] < (1 - tolerance) * reference['rate']:
+            regressions.append(stage + ": rate " + "{:.0f}".format(result['rate']) + "/s < "
+                               + "{:.0f}".format(reference['rate']) + "/s (baseline)")
+        if (result['peakRss'] is not None and reference.get('peakRss') is not None
+                and result['peakRss'] > (1 + tolerance) * reference['peakRss']):
+            regressions.append(stage + ": peak RSS " + "{:.0f}".format(result['peakRss']) + " MB > "
+                               + "{:.0f}".format(reference['peakRss']) + " MB (baseline)")
+    return regressions
+
+
+# ==========================
+# printResults()
+# ==========================
+
+def printResults(results, baseline = None):
+    print("{:<24}{:>10}{:>14}{:>14}{:>12}{:>10}".format("Stage", "Time [s]", "Items", "Items/s",
+                                                       "Peak [MB]", "Baseline"))
+    for stage, result in results.items():
+        ratio = ""
+        if baseline and stage in baseline:
+            ratio = "{:.2f}x".format(result['rate'] / baseline[stage]['rate'])
+        peakRss = "-" if result['peakRss'] is None else "{:.0f}".format(result['peakRss'])
+        print("{:<24}{:>10.2f}{:>14}{:>14.0f}{:>12}{:>10}".format(stage, result['seconds'], result['items'],
+                                                               result['rate'], peakRss, ratio))
+
+
+
+# ==========================
+# _instanceGroups()
+# ==========================
+
+# Random groups of overlapping instances (input of __processTime()).
+
+def _instanceGroups(seed, noGroups):
+    rng = random.Random(seed)
+    toolboxes = ["matlab"] + ["toolbox" + str(cc) for cc in range(1, 8)]
+    groups = []
+    for cc in range(noGroups):
+        timeVector = []
+        tboxes = []
+        startTime = 0
+        for cy in range(rng.randint(1, 16)):
+            startTime = startTime + rng.randint(0, 30)
+            timeVector.append(startTime)
+            timeVector.append(startTime + rng.randint(0, 240))
+            tboxes.append([toolboxes[0]] + rng.sample(toolboxes[1:], rng.randint(0, 3)))
+        groups.append((timeVector, tboxes))
+    return groups
+
+
+# ==========================
+# _timeStamps()
+# ==========================
+
+# Random start/end time vectors (input of __mergeTimeStamps()).
+
+def _timeStamps(seed, noVectors):
+    rng = random.Random(seed)
+    timeStamps = []
+    for cc in range(noVectors):
+        stamps = []
+        for cy in range(rng.randint(1, 32)):
+            startTime = rng.randint(0, 2000)
+            stamps.append(startTime)
+            stamps.append(startTime + rng.randint(0, 240))
+        timeStamps.append(stamps)
+    return timeStamps
+
+
+# ==========================
+# _countLines()
+# ==========================
+
+def _countLines(fileName):
+    with open(fileName, 'rb') as readFile:
+        return sum(block.count(b'\n') for block in iter(lambda: readFile.read(1 << 20), b''))
+
+
+# ==========================
+# _peakRss()
+# ==========================
+
+# Peak resident memory of the current process in MB (None if unknown).
+
+def _peakRss():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':     # bytes on macOS, KB on Linux
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Benchmark of LogProcessor.")
+    parser.add_argument("--lines", type = int, default = 1000000, help = "number of log lines")
+    parser.add_argument("--seed", type = int, default = 0)
+    parser.add_argument("--concurrency", type = int, default = 8)
+    parser.add_argument("--noToolboxes", type = int, default = 8)
+    parser.add_argument("--orphanRate", type = float, default = 0.01)
+    parser.add_argument("--noLicenses", type = int, default = 100)
+    parser.add_argument("--stages", nargs = "+", choices = STAGES, default = STAGES)
+    parser.add_argument("--log", default = "", help = "use an existing log file (no generator)")
+    parser.add_argument("--baseline", default = BASELINE_FILE)
+    parser.add_argument("--save", action = "store_true", help = "save results as baseline")
+    parser.add_argument("--check", action = "store_true", help = "exit code 1 on regression")
+    parser.add_argument("--tolerance", type = float, default = 0.2)
+    parser.add_argument("--repeat", type = int, default = 3, help = "runs per stage (fastest is reported)")
+    parser.add_argument("--reader", choices = ['bytes', 'text'], default = 'bytes', help = "reader of the log file")
+    arguments = parser.parse_args()
+
+    parameters = {'noLines': arguments.lines, 'seed': arguments.seed,
+                  'concurrency': arguments.concurrency, 'noToolboxes': arguments.noToolboxes,
+                  'orphanRate': arguments.orphanRate, 'noLicenses': arguments.noLicenses}
+    configuration = dict(parameters, reader = arguments.reader)    # saved with the baseline
+
+    baseline = None
+    if os.path.exists(arguments.baseline) and not arguments.log:
+        with open(arguments.baseline, 'r') as readFile:
+            saved = json.load(readFile)
+        if saved['parameters'] == configuration:
+            baseline = saved['results']
+        else:
+            print("Baseline " + arguments.baseline + " was measured with different parameters (not compared).")
+
+    if arguments.check and baseline is None:
+        print("ERROR: No comparable baseline " + arguments.baseline + " (missing, different parameters "
+              + "or --log given). Save a baseline with --save first.")
+        sys.exit(2)
+
+    results = runBenchmark(parameters, arguments.stages, arguments.log, arguments.repeat, arguments.reader)
+    printResults(results, baseline)
+
+    if arguments.save:
+        with open(arguments.baseline, 'w') as writeFile:
+            json.dump({'parameters': configuration, 'results': results}, writeFile, indent = 1)
+        print("Baseline saved: " + arguments.baseline)
+
+    if arguments.check and baseline:
+        regressions = checkRegression(results, baseline, arguments.tolerance)
+        for message in regressions:
+            print("REGRESSION " + message)
+        if regressions:
+            sys.exit(1)
+        print("No regression (tolerance " + "{:.0%}".format(arguments.tolerance) + ").")
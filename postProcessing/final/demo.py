@@ -9,11 +9,18 @@ logProcessor = LogProcessor()
 
 # Public class methods:
 # - .process(fileName, [opt.] outputFile = "outFile.txt", 
-#           [opt.] outputDirectory = "./myFolder")
+#           [opt.] outputDirectory = "./myFolder",
+#           [opt.] singlePass = True, [opt.] workers = 1,
+#           [opt.] mergeFiles = False)
 #   The main method to process data files. fileName can be a single
 #   file or a list of files ["file1.csv", "file2.csv", ...]. If outputFile is
 #   given, all outputs are appended to that file; otherwise an output file
 #   p_[name] is created for each input file.
+#   workers = N > 1 processes the files in a pool of N processes.
+#   mergeFiles = True merges the files by time stamp into one input (e.g. the
+#   logs of redundant license servers), output: p_merged[.ext].
+#   Compressed files (gzip, bz2, xz) are read directly, e.g. "data1.csv.gz"
+#   -> output p_data1.csv.
 #   WARNING: The output file is always written in append mode. If a file of the
 #   same name already exists, the output is appended.
 #
@@ -26,6 +33,46 @@ logProcessor = LogProcessor()
 # - .clearTimeFilter()
 #   Delete time filter.
 #
+# - .setTimeWindows(windows, [opt.] endTime, [opt.] step, [opt.] output = "files")
+#   Several time filters applied in one pass, e.g. one window per day:
+#   setTimeWindows("01.06.2020 00:00", "01.07.2020 00:00", step = 24)
+#   or a list of windows [(startTime, endTime), ...]. Output of each
+#   window to its own file "<outputFile>_<window start>" (output = "files")
+#   or with the window start as additional column (output = "column").
+#
+# - .clearTimeWindows()
+#   Delete time windows.
+#
+# - .setResultCache(cacheDirectory, [opt.] maxSize = 1024, [opt.] contentHash = False)
+#   Save the output of each file in cacheDirectory. Unchanged files are not
+#   processed again (the cached output is appended). The output file must be
+#   new: a file processed again is appended again, with or without cache.
+#   clearResultCache() deactivates the cache.
+#
+# - .setConcurrency([opt.] bucketSize = 24, [opt.] origin)
+#   Peak and average number of seats in use per license, version, toolbox
+#   and bucket of bucketSize hours, written to "<outputFile>_concurrency"
+#   in the same pass. clearConcurrency() deactivates it.
+#
+# - .setDeduplication([opt.] window = 24, [opt.] bloomKeys = None)
+#   Overlapping log files (e.g. rotated logs that repeat the tail of the
+#   previous file): sessions already processed are counted once. Keys of the
+#   last window hours (or a Bloom filter of bloomKeys keys) are kept; the
+#   files are processed in the given order. clearDeduplication() deactivates it.
+#
+# - .setQuiet([opt.] quiet = True)
+#   No progress/line counts on stdout. process() returns the statistics
+#   (ProcessStats: line counts, peak open processes/buffered instances,
+#   times of the stages scan, parse, merge, write) in any case.
+#
+# - .setHooks([opt.] fileStart, [opt.] fileEnd)
+#   Functions fileStart(inputFile) and fileEnd(stats) called for each file,
+#   e.g. to attach a profiler or to export the statistics.
+#
+# - .setByteReader([opt.] enabled = True)
+#   Input files are memory-mapped and parsed as bytes (requires NumPy,
+#   default). enabled = False reads them as text.
+#
 # - setDateFormat( formatString )
 #   Set format for output and filter time. 
 #   Default: formatString =  "%d.%m.%Y %H:%M"
@@ -85,4 +132,86 @@ allFiles = [os.path.join(path,f) for f in os.listdir(path) if f.endswith('.csv')
 logProcessor.process(allFiles, outputDirectory = "./out_v4")
 
 # Clear time filter
-logProcessor.clearTimeFilter()
\ No newline at end of file
+logProcessor.clearTimeFilter()
+
+
+
+#####################
+# Apply time windows
+#####################
+
+# Daily reports of June: one output file per day (out_v5/p_<file>_<YmdHM>.csv),
+# the input files are read once.
+logProcessor.setTimeWindows("01.06.2020 00:00", "01.07.2020 00:00", step = 24)
+
+logProcessor.process(allFiles, outputDirectory = "./out_v5")
+
+# Clear time windows
+logProcessor.clearTimeWindows()
+
+
+
+#####################
+# Concurrency
+#####################
+
+# Daily peak/average seats: out_v7/allTogether.csv and
+# out_v7/allTogether_concurrency.csv
+logProcessor.setConcurrency(24)
+
+logProcessor.process(allFiles, outputFile = "allTogether.csv", outputDirectory = "./out_v7")
+
+logProcessor.clearConcurrency()
+
+
+
+#####################
+# Merged log files
+#####################
+
+# Logs of redundant license servers: one input in order of time stamps,
+# output: out_v8/p_merged.csv
+logProcessor.process(allFiles, outputDirectory = "./out_v8", mergeFiles = True)
+
+
+
+#####################
+# Compressed log files
+#####################
+
+# Archived logs (gzip, bz2, xz) are decompressed while reading,
+# e.g. ./archive/data1.csv.gz -> out_v9/p_data1.csv
+path = "./archive"
+if os.path.isdir(path):
+    archivedFiles = [os.path.join(path,f) for f in os.listdir(path) if f.endswith(('.gz', '.bz2', '.xz'))]
+    logProcessor.process(archivedFiles, outputDirectory = "./out_v9")
+
+
+
+#####################
+# Overlapping log files
+#####################
+
+# Rotated logs repeat the last lines of the previous file: duplicated
+# sessions (within 48 hours) are dropped, output: out_v10/allTogether.csv
+logProcessor.setDeduplication(48)
+
+logProcessor.process(sorted(allFiles), outputFile = "allTogether.csv", outputDirectory = "./out_v10")
+
+logProcessor.clearDeduplication()
+
+
+
+#####################
+# Statistics
+#####################
+
+# Quiet mode: the statistics are returned instead of printed
+logProcessor.setQuiet()
+logProcessor.setHooks(fileEnd = lambda stats: print(stats.inputFile, stats.lines, stats.times))
+
+stats = logProcessor.process(allFiles, outputDirectory = "./out_v6")
+print("Lines (total, valid) = " + str(stats.lines) + ", " + str(stats.validLines))
+
+logProcessor.setHooks()
+logProcessor.setQuiet(False)
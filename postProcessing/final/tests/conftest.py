@@ -0,0 +1,20 @@
+# Modules of postProcessing/final are imported by name (e.g. "from
+# LogProcessor import LogProcessor"), as in demo.py.
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from LogGenerator import generateLog
+
+
+# Synthetic log file (module LogGenerator), shared by the tests of a session.
+
+@pytest.fixture(scope = "session")
+def logFile(tmp_path_factory):
+    fileName = tmp_path_factory.mktemp("log") / "synthetic.log"
+    generateLog(str(fileName), 20000, seed = 3, orphanRate = 0.05, noLicenses = 20)
+    return fileName
@@ -0,0 +1,89 @@
+##############################################################################
+### Tests of ColumnWriter: the column output loaded with loadColumns() and
+### loadDataFrame() equals the text output of LogProcessor.
+##############################################################################
+
+from datetime import datetime
+
+import pytest
+
+from ColumnWriter import ColumnWriter, loadColumns, loadDataFrame
+from LogProcessor import LogProcessor, np
+
+pytestmark = pytest.mark.skipif(np is None, reason = "loadColumns() requires NumPy")
+
+
+# ==========================
+# _textRows()
+# ==========================
+
+# Rows of the text output (License, Version, Toolbox, Start, End, Usage time).
+
+def _textRows(processor, logFile, outputFile, **options):
+    processor.setQuiet()
+    processor.process(str(logFile), outputFile = str(outputFile), **options)
+    rows = []
+    with open(str(outputFile), 'r') as readFile:
+        for line in readFile:
+            fields = line.rstrip('\n').split(', ')
+            rows.append((fields[0], fields[1], fields[2],
+                         datetime.strptime(fields[3], "%d.%m.%Y %H:%M"),
+                         datetime.strptime(fields[4], "%d.%m.%Y %H:%M"), float(fields[5])))
+    return rows
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_roundTrip(logFile, tmp_path, workers):
+    expected = _textRows(LogProcessor(), logFile, tmp_path / "out.csv")
+
+    processor = LogProcessor()
+    processor.setQuiet()
+    processor.setOutputWriter(ColumnWriter)
+    directory = str(tmp_path / "out.cols")
+    processor.process([str(logFile), str(logFile)], outputFile = directory, workers = workers)
+
+    dataset = loadDataFrame(directory)
+    rows = list(zip(dataset['License Number'].astype(str), dataset['Version'].astype(str),
+                    dataset['Toolbox'].astype(str), dataset['Start time'].dt.to_pydatetime(),
+                    dataset['End time'].dt.to_pydatetime(), dataset['Usage time']))
+    assert len(rows) == 2 * len(expected)
+    for row, expectedRow in zip(rows, expected + expected):
+        assert row[:5] == expectedRow[:5]
+        assert row[5] == pytest.approx(expectedRow[5], abs = 0.01)
+
+    columns, dictionaries = loadColumns(directory, mmap = False)
+    assert sorted(columns) == ['duration', 'end', 'license', 'start', 'toolbox', 'version']
+    assert len(set(dictionaries['license'])) == len(dictionaries['license'])
+    assert all(len(column) == len(rows) for column in columns.values())
+
+
+def test_windowColumn(logFile, tmp_path):
+    processor = LogProcessor()
+    processor.setQuiet()
+    processor.setOutputWriter(ColumnWriter)
+    processor.setTimeWindows("01.06.2020 00:00", "01.08.2020 00:00", step = 24 * 7, output = "column")
+    directory = str(tmp_path / "out.cols")
+    processor.process(str(logFile), outputFile = directory)
+
+    dataset = loadDataFrame(directory)
+    assert len(dataset) > 0
+    assert (dataset['Start time'] >= dataset['Window']).all()
+
+    # Appending rows without window column to a directory with window column
+    processor.clearTimeWindows()
+    with pytest.raises(ValueError):
+        processor.process(str(logFile), outputFile = directory)
+    assert len(loadDataFrame(directory)) == len(dataset)
+
+
+def test_noWindowColumn(logFile, tmp_path):
+    processor = LogProcessor()
+    processor.setQuiet()
+    processor.setOutputWriter(ColumnWriter)
+    directory = str(tmp_path / "out.cols")
+    processor.process(str(logFile), outputFile = directory)
+
+    processor.setTimeWindows("01.06.2020 00:00", "01.08.2020 00:00", step = 24 * 7, output = "column")
+    with pytest.raises(ValueError):
+        processor.process(str(logFile), outputFile = directory)
+    assert 'Window' not in loadDataFrame(directory)
@@ -0,0 +1,99 @@
+##############################################################################
+### Tests of DataImport: importData() returns the data of the original
+### import (pd.read_csv() of each file, dataImport.ipynb), with compact
+### dtypes, also from the file cache.
+##############################################################################
+
+import os
+
+import pandas as pd
+import pytest
+
+from DataImport import DATA_COLUMNS, OUTPUT_COLUMNS, importData, readDataFile
+from LogProcessor import LogProcessor
+
+
+# ==========================
+# _readReference()
+# ==========================
+
+# Original import: all files with pd.read_csv(), concatenated, time columns
+# converted. Categorical columns are compared as strings.
+
+def _readReference(directory, fileExtension, names):
+    frames = []
+    for file in sorted(os.listdir(directory)):
+        if file.endswith(fileExtension) and os.path.getsize(os.path.join(directory, file)) > 0:
+            frames.append(pd.read_csv(os.path.join(directory, file), names = names, header = None,
+                                      skipinitialspace = True, dtype = str))
+    dataset = pd.concat(frames, ignore_index = True)
+    for name in ['Start time', 'End time']:
+        dataset[name] = pd.to_datetime(dataset[name], format = '%d.%m.%Y %H:%M')
+    if 'Usage time' in names:
+        dataset['Usage time'] = dataset['Usage time'].astype(float)
+    return dataset
+
+
+def _assertEqual(dataset, reference):
+    assert list(dataset.columns) == list(reference.columns)
+    assert len(dataset) == len(reference)
+    for name in dataset.columns:
+        if isinstance(dataset[name].dtype, pd.CategoricalDtype):
+            assert list(dataset[name].astype(str)) == list(reference[name])
+        elif name == 'Usage time':
+            assert list(dataset[name]) == pytest.approx(list(reference[name]))
+        else:
+            assert list(dataset[name]) == list(reference[name])
+
+
+@pytest.fixture(scope = "module")
+def outputDirectory(tmp_path_factory, logFile):
+    directory = tmp_path_factory.mktemp("output")
+    logFile = str(logFile)
+
+    processor = LogProcessor()
+    processor.setQuiet()
+    processor.process(logFile, outputFile = "part1.txt", outputDirectory = str(directory))
+    processor.setTimeFilter("01.06.2020 00:00", "03.06.2020 00:00")
+    processor.process(logFile, outputFile = "part2.txt", outputDirectory = str(directory))
+    processor.setTimeFilter("01.06.2019 00:00", "02.06.2019 00:00")     # no rows
+    processor.process(logFile, outputFile = "part3.txt", outputDirectory = str(directory))
+    open(str(directory / "part3.txt"), 'a').close()
+    return directory
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_importEqualsReference(outputDirectory, workers):
+    dataset = importData(str(outputDirectory), ".txt", names = OUTPUT_COLUMNS, workers = workers)
+    _assertEqual(dataset, _readReference(str(outputDirectory), ".txt", OUTPUT_COLUMNS))
+    assert all(isinstance(dataset[name].dtype, pd.CategoricalDtype)
+               for name in ['License Number', 'Version', 'Toolbox'])
+
+
+def test_cache(outputDirectory, tmp_path):
+    cacheDirectory = str(tmp_path / "cache")
+    first = importData(str(outputDirectory), ".txt", names = OUTPUT_COLUMNS, cacheDirectory = cacheDirectory)
+    cached = importData(str(outputDirectory), ".txt", names = OUTPUT_COLUMNS, cacheDirectory = cacheDirectory)
+    pd.testing.assert_frame_equal(first, cached)
+
+
+def test_emptyFile(tmp_path):
+    emptyFile = tmp_path / "empty.txt"
+    emptyFile.write_text("")
+    data = readDataFile(str(emptyFile), OUTPUT_COLUMNS)
+    assert len(data) == 0
+    assert list(data.columns) == OUTPUT_COLUMNS
+    assert data['Usage time'].dtype == float
+
+
+# License numbers are numeric in one file and text in another.
+
+def test_categoriesOfDifferentTypes(tmp_path):
+    (tmp_path / "data1.csv").write_text("101,1.0,24.05.2020 10:15,24.05.2020 10:30,Matlab\n"
+                                        "105,1.0,24.05.2020 10:08,24.05.2020 17:02,Matlab\n")
+    (tmp_path / "data2.csv").write_text("A113,1.2,21.05.2020 13:12,21.05.2020 18:17,Simulink\n")
+    (tmp_path / "data3.csv").write_text("")
+
+    dataset = importData(str(tmp_path))
+    _assertEqual(dataset, _readReference(str(tmp_path), ".csv", DATA_COLUMNS))
+    assert list(dataset['License Number'].astype(str)) == ['101', '105', 'A113']
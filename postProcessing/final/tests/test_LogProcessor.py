@@ -0,0 +1,635 @@
+##############################################################################
+### Regression tests of LogProcessor.
+###
+### Equivalence of the processing engines on synthetic logs (module
+### LogGenerator): single pass (LogStream), two-pass processing and the text
+### reader produce the same output; the sort-and-sweep merge of time stamps
+### returns the result of the original algorithm, as does the time vector
+### of each toolbox (__processTime()). Log time stamps are parsed as by
+### datetime.strptime(). A process pool (workers) writes the output of
+### serial processing, also if files are split into parts (chunkSize).
+### process() returns the line counts of each file and calls the hooks.
+### Merged files (mergeFiles) are processed as one log sorted by time,
+### compressed files as the uncompressed file, overlapping files with
+### deduplication as one file.
+###
+### Usage (in postProcessing/final):
+###    python -m pytest tests
+##############################################################################
+
+import functools
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from LogProcessor import (EPOCH, LOG_TIME_FORMAT, LogProcessor, MERGE_NUMPY_MIN, concurrencyFileName,
+                          np, parseLogTime, toDatetime, toMinutes)
+
+
+# ==========================
+# _process()
+# ==========================
+
+# Processes logFile (quiet) and returns the content of the output file.
+
+def _process(processor, logFile, outputFile, **options):
+    processor.setQuiet()
+    processor.process(str(logFile), outputFile = str(outputFile), **options)
+    with open(str(outputFile), 'r') as readFile:
+        return readFile.read()
+
+
+# ==========================
+# _mergeReference()
+# ==========================
+
+# Original __mergeTimeStamps(): an element is merged with the first
+# overlapping time stamp until no time stamp overlaps, then the next
+# unprocessed time stamp is the new element.
+
+def _mergeReference(timeStamps):
+    mergedTimeArray = []
+    noElements = len(timeStamps) // 2
+    activeElements = [True] * noElements
+
+    element = [timeStamps[0], timeStamps[1]]
+    activeElements[0] = False
+
+    while any(activeElements):
+        afterMerge = False
+        for n in [idx for idx in range(noElements) if activeElements[idx]]:
+            timePair = [timeStamps[2*n], timeStamps[2*n + 1]]
+            if not (timePair[0] > element[1] or timePair[1] < element[0]):
+                element = [min(element[0], timePair[0]), max(element[1], timePair[1])]
+                activeElements[n] = False
+                afterMerge = True
+                break
+
+        if not afterMerge:
+            mergedTimeArray = mergedTimeArray + element
+            idx = activeElements.index(True)
+            element = [timeStamps[2*idx], timeStamps[2*idx+1]]
+
+    return mergedTimeArray + element
+
+
+# ==========================
+# Engines
+# ==========================
+
+def test_twoPassEqualsSinglePass(logFile, tmp_path):
+    singlePass = _process(LogProcessor(), logFile, tmp_path / "single.csv")
+    twoPass = _process(LogProcessor(), logFile, tmp_path / "two.csv", singlePass = False)
+    assert singlePass
+    assert twoPass == singlePass
+
+
+@pytest.mark.skipif(np is None, reason = "byte reader requires NumPy")
+@pytest.mark.parametrize("singlePass", [True, False])
+def test_textReaderEqualsByteReader(logFile, tmp_path, singlePass):
+    byteProcessor = LogProcessor()
+    byteProcessor.setByteReader(True)
+    textProcessor = LogProcessor()
+    textProcessor.setByteReader(False)
+
+    byteOutput = _process(byteProcessor, logFile, tmp_path / "bytes.csv", singlePass = singlePass)
+    textOutput = _process(textProcessor, logFile, tmp_path / "text.csv", singlePass = singlePass)
+    assert textOutput == byteOutput
+
+
+def test_timeWindowsEqualTwoPass(logFile, tmp_path):
+    outputs = []
+    for singlePass in [True, False]:
+        processor = LogProcessor()
+        processor.setTimeWindows("01.06.2020 00:00", "01.07.2020 00:00", step = 24, output = "column")
+        outputs.append(_process(processor, logFile, tmp_path / (str(singlePass) + ".csv"),
+                                singlePass = singlePass))
+    assert outputs[0] == outputs[1]
+
+
+# ==========================
+# _splitLog()
+# ==========================
+
+# Splits logFile into noParts files of consecutive lines (a process may
+# start in one part and end in the next). Returns the file names.
+
+def _splitLog(logFile, directory, noParts):
+    with open(str(logFile), 'r') as readFile:
+        lines = readFile.readlines()
+    fileNames = []
+    for cc in range(noParts):
+        fileName = directory / ("part" + str(cc) + ".log")
+        fileName.write_text("".join(lines[cc * len(lines) // noParts:(cc + 1) * len(lines) // noParts]))
+        fileNames.append(str(fileName))
+    return fileNames
+
+
+# ==========================
+# Parallel processing
+# ==========================
+
+# A process pool writes the same output (in the order of the files) and
+# statistics as serial processing, also with one output file per input file.
+
+@pytest.mark.parametrize("singlePass", [True, False])
+def test_workersEqualSerial(logFile, tmp_path, singlePass):
+    files = _splitLog(logFile, tmp_path, 3)
+
+    serial = LogProcessor()
+    serial.setQuiet()
+    serialStats = serial.process(files, outputFile = "serial.csv", outputDirectory = str(tmp_path),
+                                 singlePass = singlePass)
+    parallel = LogProcessor()
+    parallel.setQuiet()
+    parallelStats = parallel.process(files, outputFile = "parallel.csv",
+                                     outputDirectory = str(tmp_path), singlePass = singlePass, workers = 2)
+
+    assert (tmp_path / "parallel.csv").read_text() == (tmp_path / "serial.csv").read_text()
+    for name in ["lines", "validLines", "nonTerminated"]:
+        assert getattr(parallelStats, name) == getattr(serialStats, name)
+    assert serialStats.nonTerminated > 0
+
+    (tmp_path / "each").mkdir()
+    parallel.process(files, outputDirectory = str(tmp_path / "each"), singlePass = singlePass,
+                     workers = 2)
+    output = "".join((tmp_path / "each" / ("p_part" + str(cc) + ".log")).read_text()
+                     for cc in range(3))
+    assert output == (tmp_path / "serial.csv").read_text()
+
+
+# A file split into parts (chunkSize) is written as without parts.
+
+@pytest.mark.parametrize("timeWindows", [False, True])
+def test_chunksEqualWholeFile(logFile, tmp_path, timeWindows):
+    outputs = []
+    for chunkSize in [0, 100000]:
+        processor = LogProcessor()
+        if timeWindows:
+            processor.setTimeWindows("01.06.2020 00:00", "01.08.2020 00:00", step = 72,
+                                     output = "column")
+        outputs.append(_process(processor, logFile, tmp_path / ("chunks" + str(chunkSize) + ".csv"),
+                                workers = 2, chunkSize = chunkSize))
+
+    parts, stats = LogProcessor()._LogProcessor__findSplitPoints(str(logFile), 100000)
+    assert len(parts) > 1
+    assert outputs[0]
+    assert outputs[1] == outputs[0]
+
+
+# ==========================
+# Statistics and hooks
+# ==========================
+
+# Line counts of a log file: START and END lines of a process are valid,
+# START lines without END line are non-terminated (END lines without START
+# line are invalid).
+
+def _lineCounts(fileName):
+    starts = set()
+    ends = set()
+    noLines = 0
+    with open(fileName, 'r') as readFile:
+        for line in readFile:
+            noLines += 1
+            substr = line.split(',')
+            (starts if substr[0] == "$START" else ends).add(substr[1])
+    return noLines, 2 * len(starts & ends), len(starts - ends)
+
+
+# process() returns the line counts of each file and their sum, calls the
+# hooks for each file and prints nothing in quiet mode.
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_statsAndHooks(logFile, tmp_path, capsys, workers):
+    files = _splitLog(logFile, tmp_path, 2)
+    started = []
+    finished = []
+
+    processor = LogProcessor()
+    processor.setQuiet()
+    processor.setHooks(fileStart = started.append, fileEnd = finished.append)
+    stats = processor.process(files, outputFile = "out.csv", outputDirectory = str(tmp_path),
+                              workers = workers)
+
+    assert capsys.readouterr().out == ""
+    assert started == files
+    assert finished == stats.files
+    assert [fileStats.inputFile for fileStats in stats.files] == files
+    assert all(fileStats.outputFile == str(tmp_path / "out.csv") for fileStats in stats.files)
+
+    counts = [_lineCounts(file) for file in files]
+    assert [(fileStats.lines, fileStats.validLines, fileStats.nonTerminated)
+            for fileStats in stats.files] == counts
+    assert (stats.lines, stats.validLines, stats.nonTerminated) == tuple(map(sum, zip(*counts)))
+    assert stats.errors == 0
+    assert stats.wallTime > 0
+
+    processor.setQuiet(False)
+    processor.setHooks()
+    processor.process(files[0], outputFile = "out.csv", outputDirectory = str(tmp_path))
+    assert stats.files[0].report() in capsys.readouterr().out
+
+
+# ==========================
+# Merged files
+# ==========================
+
+# Consecutive parts of a log (a process may start in one part and end in the
+# next) are processed as the log.
+
+def test_mergedPartsEqualWholeFile(logFile, tmp_path):
+    expected = _process(LogProcessor(), logFile, tmp_path / "whole.csv")
+    files = _splitLog(logFile, tmp_path, 3)
+    processor = LogProcessor()
+    processor.setQuiet()
+    stats = processor.process(files, outputFile = "merged.csv", outputDirectory = str(tmp_path),
+                              mergeFiles = True)
+    assert (tmp_path / "merged.csv").read_text() == expected
+    assert stats.nonTerminated == _lineCounts(str(logFile))[2]
+
+
+# Interleaved logs (line k in file k % 3) are processed as one log of the
+# lines in order of time: the next line is the first line of all files with
+# the smallest time stamp (START before END lines, then by file).
+
+@pytest.mark.parametrize("byteReader", [True, False])
+def test_mergedFilesEqualSortedLog(logFile, tmp_path, byteReader):
+    with open(str(logFile), 'r') as readFile:
+        lines = readFile.readlines()
+    files = []
+    for cc in range(3):
+        fileName = tmp_path / ("server" + str(cc) + ".log")
+        fileName.write_text("".join(lines[cc::3]))
+        files.append(str(fileName))
+
+    def sortKey(line, fileIndex):
+        substr = line.rstrip('\n').split(',')
+        isEnd = substr[0] == "$END"
+        return (datetime.strptime(substr[4] if isEnd else substr[2], LOG_TIME_FORMAT), isEnd, fileIndex)
+
+    serverLines = [lines[cc::3] for cc in range(3)]
+    positions = [0, 0, 0]
+    sortedLines = []
+    while len(sortedLines) < len(lines):
+        first = min((cc for cc in range(3) if positions[cc] < len(serverLines[cc])),
+                    key = lambda cc: sortKey(serverLines[cc][positions[cc]], cc))
+        sortedLines.append(serverLines[first][positions[first]])
+        positions[first] += 1
+
+    sortedLog = tmp_path / "sorted.log"
+    sortedLog.write_text("".join(sortedLines))
+    expected = _process(LogProcessor(), sortedLog, tmp_path / "sorted.csv")
+
+    processor = LogProcessor()
+    processor.setByteReader(byteReader)
+    processor.setQuiet()
+    processor.process(files, outputDirectory = str(tmp_path), mergeFiles = True)
+    assert (tmp_path / "p_merged.log").read_text() == expected
+
+
+# ==========================
+# Compressed files
+# ==========================
+
+# Compressed logs are processed as the uncompressed log; the output file is
+# named without the extension of the compression.
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_compressedEqualsPlain(logFile, tmp_path, workers):
+    import bz2, gzip, lzma
+
+    expected = _process(LogProcessor(), logFile, tmp_path / "plain.csv")
+    data = logFile.read_bytes()
+    files = []
+    for module, extension in [(gzip, ".gz"), (bz2, ".bz2"), (lzma, ".xz")]:
+        fileName = tmp_path / (logFile.name + extension)
+        with module.open(str(fileName), 'wb') as writeFile:
+            writeFile.write(data)
+        files.append(str(fileName))
+
+    processor = LogProcessor()
+    processor.setQuiet()
+    stats = processor.process(files, outputDirectory = str(tmp_path), workers = workers)
+    assert (tmp_path / ("p_" + logFile.name)).read_text() == 3 * expected
+    assert stats.lines == 3 * len(data.splitlines())
+
+
+# ==========================
+# Deduplication
+# ==========================
+
+# Overlapping logs (e.g. a rotated log and its copy) with deduplication are
+# processed as the log: merged by time stamp (default window) or one after
+# the other (window longer than the overlap). Without deduplication the
+# sessions of the overlap are counted twice.
+
+@pytest.mark.parametrize("bloomKeys", [None, 100000])
+@pytest.mark.parametrize("mergeFiles, window", [(True, 24), (False, 24 * 30)])
+def test_deduplicationEqualsWholeFile(logFile, tmp_path, bloomKeys, mergeFiles, window):
+    expected = _process(LogProcessor(), logFile, tmp_path / "whole.csv")
+    with open(str(logFile), 'r') as readFile:
+        lines = readFile.readlines()
+    files = [str(tmp_path / "old.log"), str(tmp_path / "new.log")]
+    (tmp_path / "old.log").write_text("".join(lines[:12000]))
+    (tmp_path / "new.log").write_text("".join(lines[8000:]))
+
+    processor = LogProcessor()
+    processor.setQuiet()
+    processor.process(files, outputFile = str(tmp_path / "duplicated.csv"), mergeFiles = mergeFiles)
+    assert (tmp_path / "duplicated.csv").read_text() != expected
+
+    processor.setDeduplication(window = window, bloomKeys = bloomKeys)
+    stats = processor.process(files, outputFile = str(tmp_path / "deduplicated.csv"),
+                              mergeFiles = mergeFiles)
+    assert (tmp_path / "deduplicated.csv").read_text() == expected
+    assert stats.lines == 24000
+    assert stats.duplicates > 0
+
+
+# ==========================
+# Merge of time stamps
+# ==========================
+
+@pytest.mark.parametrize("noElements", [1, 2, 5, 16, MERGE_NUMPY_MIN + 50])
+def test_mergeTimeStampsEqualsReference(noElements):
+    merge = LogProcessor()._LogProcessor__mergeTimeStamps
+    rng = random.Random(noElements)
+    for cc in range(200):
+        timeStamps = []
+        for cy in range(noElements):
+            startTime = rng.randint(0, 20 * noElements)
+            timeStamps.append(startTime)
+            timeStamps.append(startTime + rng.randint(0, 30))
+        assert merge(timeStamps) == _mergeReference(timeStamps)
+
+
+def test_mergeTimeStampsExample():
+    merge = LogProcessor()._LogProcessor__mergeTimeStamps
+    assert merge([0, 4, 6, 9, 3, 7, 10, 11]) == [0, 9, 10, 11]
+
+
+# ==========================
+# Log time stamps
+# ==========================
+
+# parseLogTime() returns the minutes of datetime.strptime(), also for time
+# stamps without leading zeros (not sliced) and across days/years.
+
+def test_parseLogTimeEqualsStrptime():
+    rng = random.Random(4)
+    timeStamps = ["2020-06-16 16:22", "2020-02-29 00:00", "2019-12-31 23:59", "2020-6-1 8:05",
+                  "1999-01-01 00:00", "2024-03-10 07:30"]
+    for cc in range(2000):
+        time = datetime(2015, 1, 1) + timedelta(minutes = rng.randrange(10 * 366 * 1440))
+        timeStamps.append(time.strftime(LOG_TIME_FORMAT))
+
+    for timeStamp in timeStamps:
+        expected = datetime.strptime(timeStamp, LOG_TIME_FORMAT)
+        assert parseLogTime(timeStamp) == toMinutes(expected)
+        assert toDatetime(parseLogTime(timeStamp)) == expected
+
+
+@pytest.mark.parametrize("timeStamp", ["2020-06-16 24:00", "2020-06-16 16:60", "2020-02-30 10:00",
+                                       "2020-06-16 1a:22", "2020-06-16"])
+def test_parseLogTimeInvalid(timeStamp):
+    with pytest.raises(ValueError):
+        parseLogTime(timeStamp)
+
+
+# ==========================
+# Time stamps of toolboxes
+# ==========================
+
+# Original __processTime(): for each toolbox (in order of first occurrence)
+# all instances are scanned for the toolbox, the time stamps are merged.
+
+def _processTimeReference(timeVector, toolboxes):
+    uniqueToolboxes = []
+    for tbxList in toolboxes:
+        for toolbox in tbxList:
+            if toolbox not in uniqueToolboxes:
+                uniqueToolboxes.append(toolbox)
+
+    time_list = []
+    for toolbox in uniqueToolboxes:
+        timeTbx = []
+        for cc, tbxList in enumerate(toolboxes):
+            if toolbox in tbxList:
+                timeTbx += [timeVector[2*cc], timeVector[2*cc + 1]]
+        time_list.append(_mergeReference(timeTbx))
+
+    return uniqueToolboxes, time_list
+
+
+def test_processTimeEqualsReference():
+    processTime = LogProcessor()._LogProcessor__processTime
+    rng = random.Random(3)
+    names = ["matlab", "simulink", "coder", "toolbox1", "toolbox2"]
+    for cc in range(300):
+        noInstances = rng.randint(1, 12)
+        timeVector = []
+        toolboxes = []
+        for cy in range(noInstances):
+            startTime = rng.randint(0, 200)
+            timeVector += [startTime, startTime + rng.randint(0, 40)]
+            toolboxes.append(rng.sample(names, rng.randint(0, 3)))
+        if not any(toolboxes):
+            continue
+        assert processTime(timeVector, toolboxes) == _processTimeReference(timeVector, toolboxes)
+
+
+# ==========================
+# Incremental processing
+# ==========================
+
+# A log rotated between two calls is read by a new stream: the process open
+# in the old file is non-terminated and is not paired with an END line of
+# the new file.
+
+def test_rotationStartsNewStream(tmp_path):
+    logFile = tmp_path / "license.log"
+    checkpointDirectory = tmp_path / "checkpoints"
+    checkpointDirectory.mkdir()
+    outputFile = tmp_path / "out.csv"
+    orphanFile = tmp_path / "orphans.csv"
+
+    processor = LogProcessor()
+    processor.setQuiet()
+    processor.setOrphanEviction(orphanFile = str(orphanFile))
+
+    logFile.write_text("$START,100,2020-06-16 08:00\n"
+                       "$START,101,2020-06-16 09:00\n"
+                       "$END,101,40913431,27 (R2020) Update 1,2020-06-16 10:00,[matlab]\n")
+    processor.process(str(logFile), outputFile = str(outputFile),
+                      checkpointDirectory = str(checkpointDirectory))
+
+    logFile.unlink()
+    logFile.write_text("$START,200,2020-06-17 11:00\n"
+                       "$END,200,40913431,27 (R2020) Update 1,2020-06-17 11:30,[matlab]\n"
+                       "$END,100,40913431,27 (R2020) Update 1,2020-06-17 12:00,[coder]\n")
+    stats = processor.process(str(logFile), outputFile = str(outputFile),
+                              checkpointDirectory = str(checkpointDirectory))
+
+    assert stats.lines == 3
+    assert stats.validLines == 2
+    assert stats.nonTerminated == 1
+    assert stats.openProcesses == 0
+
+    output = outputFile.read_text()
+    assert "coder" not in output
+    assert "16.06.2020 09:00, 16.06.2020 10:00" in output
+    assert "17.06.2020 11:00, 17.06.2020 11:30" in output
+    assert orphanFile.read_text() == "100, 16.06.2020 08:00, log rotated\n"
+
+
+# An open process older than CHECKPOINT_BLOCKING_AGE hours that blocks the
+# output is reported, unless a maximum session age is set.
+
+@pytest.mark.parametrize("maxSessionAge", [None, 48])
+def test_blockingProcessWarning(tmp_path, capsys, maxSessionAge):
+    logFile = tmp_path / "license.log"
+    checkpointDirectory = tmp_path / "checkpoints"
+    checkpointDirectory.mkdir()
+    lines = ["$START,100,2020-06-16 08:00\n"]
+    for day in range(17, 20):
+        lines.append("$START," + str(day) + ",2020-06-" + str(day) + " 09:00\n")
+        lines.append("$END," + str(day) + ",40913431,27 (R2020) Update 1,2020-06-" + str(day) + " 10:00,[matlab]\n")
+    logFile.write_text("".join(lines))
+
+    processor = LogProcessor()
+    processor.setQuiet()
+    processor.setOrphanEviction(maxSessionAge = maxSessionAge)
+    stats = processor.process(str(logFile), outputFile = str(tmp_path / "out.csv"),
+                              checkpointDirectory = str(checkpointDirectory))
+
+    output = capsys.readouterr().out
+    if maxSessionAge is None:
+        assert stats.openProcesses == 1
+        assert "WARNING: Process 100 (START 16.06.2020 08:00) is open and blocks the output of 3 instances" in output
+    else:
+        assert stats.evicted == 1
+        assert "WARNING" not in output
+
+
+# ==========================
+# Eviction
+# ==========================
+
+# Eviction limits apply with singlePass = False (processed in a single pass).
+
+def test_evictionWithTwoPass(logFile, tmp_path):
+    outputs = []
+    for singlePass in [True, False]:
+        orphanFile = tmp_path / ("orphans_" + str(singlePass))
+        processor = LogProcessor()
+        processor.setQuiet()
+        processor.setOrphanEviction(maxOpenProcesses = 4, orphanFile = str(orphanFile))
+        stats = processor.process(str(logFile), outputFile = str(tmp_path / (str(singlePass) + ".csv")),
+                                  singlePass = singlePass)
+        assert stats.evicted > 0
+        outputs.append(((tmp_path / (str(singlePass) + ".csv")).read_text(), orphanFile.read_text()))
+    assert outputs[0] == outputs[1]
+
+
+# ==========================
+# Concurrency
+# ==========================
+
+# Per-minute brute force of the concurrency output of one log file: the
+# sessions (paired START/END lines) are counted in each minute [start, end)
+# of each toolbox. Returns the rows in the order of the output.
+
+@functools.lru_cache(maxsize = None)
+def _concurrencyReference(fileName, bucketSize, origin):
+    openStarts = {}
+    seats = {}       # {(licenseNo, version, toolbox, minute): seats}
+    with open(str(fileName), 'r') as readFile:
+        for line in readFile:
+            fields = line.rstrip('\n').split(',')
+            if fields[0] == '$START':
+                openStarts[fields[1]] = datetime.strptime(fields[2], "%Y-%m-%d %H:%M")
+            elif fields[0] == '$END' and fields[1] in openStarts:
+                startTime = openStarts.pop(fields[1])
+                endTime = datetime.strptime(fields[4], "%Y-%m-%d %H:%M")
+                for toolbox in set(fields[5].strip('][').split(':')):
+                    for minute in range(int((startTime - EPOCH).total_seconds()) // 60,
+                                        int((endTime - EPOCH).total_seconds()) // 60):
+                        key = (fields[2], fields[3], toolbox, minute)
+                        seats[key] = seats.get(key, 0) + 1
+
+    buckets = {}     # {(licenseNo, version, toolbox, bucket): [peak, seat minutes]}
+    origin = int((origin - EPOCH).total_seconds()) // 60
+    for (licenseNo, version, toolbox, minute), count in seats.items():
+        key = (licenseNo, version, toolbox, (minute - origin) // bucketSize)
+        bucket = buckets.setdefault(key, [0, 0])
+        bucket[0] = max(bucket[0], count)
+        bucket[1] = bucket[1] + count
+
+    rows = []
+    for key in sorted(buckets):
+        licenseNo, version, toolbox, bucket = key
+        bucketStart = EPOCH + timedelta(minutes = origin + bucket * bucketSize)
+        rows.append(licenseNo + ", " + version + ", " + toolbox + ", " + bucketStart.strftime("%d.%m.%Y %H:%M")
+                    + ", " + str(buckets[key][0]) + ", " + '{:.4f}'.format(buckets[key][1] / bucketSize) + "\n")
+    return rows
+
+
+# Two input files (one row per file and bucket), buckets of 6 hours starting
+# at 06:30, sessions that end when another one starts (half-open: no
+# overlap) and sessions of length 0.
+
+@pytest.mark.parametrize("singlePass", [True, False])
+def test_concurrencyEqualsBruteForce(logFile, tmp_path, singlePass):
+    touchingFile = tmp_path / "touching.log"
+    touchingFile.write_text("$START,1,2021-01-01 10:00\n"
+                            "$START,2,2021-01-01 10:30\n"
+                            "$END,1,40913431,27 (R2020) Update 1,2021-01-01 11:00,[matlab:coder]\n"
+                            "$START,3,2021-01-01 11:00\n"
+                            "$END,2,40913431,27 (R2020) Update 1,2021-01-01 12:30,[matlab]\n"
+                            "$START,4,2021-01-01 12:30\n"
+                            "$END,4,40913431,27 (R2020) Update 1,2021-01-01 12:30,[matlab]\n"
+                            "$END,3,40913431,27 (R2020) Update 1,2021-01-01 13:00,[matlab:coder]\n")
+
+    processor = LogProcessor()
+    processor.setQuiet()
+    processor.setConcurrency(6, origin = "01.06.2020 06:30")
+    outputFile = tmp_path / "out.csv"
+    processor.process([str(logFile), str(touchingFile)], outputFile = str(outputFile),
+                      singlePass = singlePass)
+
+    origin = datetime(2020, 6, 1, 6, 30)
+    expected = (_concurrencyReference(str(logFile), 360, origin)
+                + _concurrencyReference(str(touchingFile), 360, origin))
+    with open(concurrencyFileName(str(outputFile)), 'r') as readFile:
+        assert readFile.readlines() == expected
+    assert "40913431, 27 (R2020) Update 1, matlab, 01.01.2021 06:30, 2, 0.7500\n" in expected
+    assert "40913431, 27 (R2020) Update 1, coder, 01.01.2021 06:30, 1, 0.4167\n" in expected
+
+
+# ==========================
+# Result cache
+# ==========================
+
+# A cache hit appends the same output as processing the file and is counted
+# as cached; a change of the configuration is a cache miss.
+
+def test_resultCache(logFile, tmp_path):
+    expected = _process(LogProcessor(), logFile, tmp_path / "reference.csv")
+
+    processor = LogProcessor()
+    processor.setQuiet()
+    processor.setResultCache(str(tmp_path / "cache"))
+    outputs = []
+    for cc in range(2):
+        outputFile = tmp_path / ("cached" + str(cc) + ".csv")
+        stats = processor.process(str(logFile), outputFile = str(outputFile))
+        assert stats.cached == cc
+        outputs.append(outputFile.read_text())
+    assert outputs == [expected, expected]
+
+    processor.setTimeFilter("01.06.2020 00:00", "03.06.2020 00:00")
+    stats = processor.process(str(logFile), outputFile = str(tmp_path / "filtered.csv"))
+    assert stats.cached == 0
+    assert (tmp_path / "filtered.csv").read_text() != expected
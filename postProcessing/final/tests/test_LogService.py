@@ -0,0 +1,58 @@
+##############################################################################
+### Tests of LogService: lines sent over a connection are processed as by
+### LogProcessor.process().
+##############################################################################
+
+import asyncio
+
+from LogProcessor import LogProcessor
+from LogService import LogService, sendLines
+
+
+# ==========================
+# _serve()
+# ==========================
+
+# Sends 'lines' over one connection to a service on a free port and returns
+# the statistics of the service.
+
+def _serve(processor, outputFile, lines):
+
+    async def run():
+        service = LogService(processor, str(outputFile), port = 0)
+        await service.start()
+        try:
+            await sendLines(lines, port = service.address[1])
+            await service.waitClosed(1)
+        finally:
+            await service.stop()
+        return service.stats
+
+    return asyncio.run(run())
+
+
+# An END line with invalid time stamp is an error; its process stays open
+# (non-terminated, reported as orphan) and is not counted as valid.
+
+def test_invalidEndTimeStamp(tmp_path, capsys):
+    orphanFile = tmp_path / "orphans.csv"
+    processor = LogProcessor()
+    processor.setQuiet()
+    processor.setOrphanEviction(orphanFile = str(orphanFile))
+
+    lines = ["$START,100,2020-06-16 08:00\n",
+             "$START,101,2020-06-16 09:00\n",
+             "$END,100,40913431,27 (R2020) Update 1,2020-06-16 99:99,[coder]\n",
+             "$END,101,40913431,27 (R2020) Update 1,2020-06-16 10:00,[matlab]\n"]
+    stats = _serve(processor, tmp_path / "out.csv", lines)
+
+    assert "ERROR" in capsys.readouterr().out
+    assert stats.errors == 1
+    assert stats.lines == 4
+    assert stats.validLines == 2
+    assert stats.nonTerminated == 1
+    assert orphanFile.read_text() == "100, 16.06.2020 08:00, end of input\n"
+
+    output = (tmp_path / "out.csv").read_text()
+    assert "coder" not in output
+    assert "16.06.2020 09:00, 16.06.2020 10:00" in output
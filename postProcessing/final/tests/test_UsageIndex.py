@@ -0,0 +1,120 @@
+##############################################################################
+### Tests of UsageIndex: usageTime() equals the sum of the clipped usage
+### times of the intervals of a license and toolbox (brute force), as do
+### the buckets of usageHistogram().
+##############################################################################
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from LogProcessor import LogProcessor
+from UsageIndex import UsageIndex, np, usageHistogram
+
+
+# ==========================
+# _randomIntervals()
+# ==========================
+
+# Random, partly overlapping intervals of a few licenses and toolboxes.
+# Returns lists licenses, toolboxes, startTimes, endTimes (datetime).
+
+def _randomIntervals(noIntervals, seed):
+    rng = random.Random(seed)
+    startTime = datetime(2020, 6, 1)
+    licenses, toolboxes, startTimes, endTimes = [], [], [], []
+    for _ in range(noIntervals):
+        start = startTime + timedelta(minutes = rng.randrange(3 * 24 * 60))
+        licenses.append(str(rng.randrange(3)))
+        toolboxes.append(rng.choice(["MATLAB", "Simulink"]))
+        startTimes.append(start)
+        endTimes.append(start + timedelta(minutes = rng.randrange(8 * 60)))
+    return licenses, toolboxes, startTimes, endTimes
+
+
+# ==========================
+# _usageReference()
+# ==========================
+
+# Usage time (hours) of the intervals of a license and toolbox clipped to
+# [startTime, endTime).
+
+def _usageReference(intervals, licenseNo, toolbox, startTime, endTime):
+    usage = timedelta()
+    for lic, tb, start, end in zip(*intervals):
+        if lic == licenseNo and tb == toolbox:
+            usage += max(timedelta(), min(end, endTime) - max(start, startTime))
+    return usage.total_seconds() / 3600
+
+
+def test_usageTimeEqualsBruteForce():
+    intervals = _randomIntervals(400, seed = 1)
+    index = UsageIndex(*intervals)
+
+    rng = random.Random(2)
+    windowStarts, windowEnds = [], []
+    for _ in range(200):
+        start = datetime(2020, 5, 31) + timedelta(minutes = rng.randrange(5 * 24 * 60))
+        windowStarts.append(start)
+        windowEnds.append(start + timedelta(minutes = rng.randrange(2 * 24 * 60)))
+
+    for licenseNo, toolbox in [("0", "MATLAB"), ("2", "Simulink"), ("5", "MATLAB")]:
+        reference = [_usageReference(intervals, licenseNo, toolbox, start, end)
+                     for start, end in zip(windowStarts, windowEnds)]
+        for start, end, expected in zip(windowStarts, windowEnds, reference):
+            assert index.usageTime(licenseNo, toolbox, start, end) == pytest.approx(expected)
+        assert index.usageTimes(licenseNo, toolbox, windowStarts, windowEnds) == pytest.approx(reference)
+
+
+def test_usageTimeOfProcessedLog(logFile, tmp_path):
+    processor = LogProcessor()
+    processor.setQuiet(True)
+    processor.process(str(logFile), "out.txt", str(tmp_path))
+    outputFile = str(tmp_path / "out.txt")
+
+    intervals = ([], [], [], [])
+    with open(outputFile) as readFile:
+        for line in readFile:
+            substr = line.rstrip('\n').split(', ')
+            intervals[0].append(substr[0])
+            intervals[1].append(substr[2])
+            intervals[2].append(datetime.strptime(substr[3], "%d.%m.%Y %H:%M"))
+            intervals[3].append(datetime.strptime(substr[4], "%d.%m.%Y %H:%M"))
+
+    index = UsageIndex.fromTextFiles(outputFile)
+    startTime = min(intervals[2])
+    for licenseNo, toolbox in sorted(index.keys())[:10]:
+        for day in range(0, 20, 3):
+            start = startTime + timedelta(days = day, hours = 9)
+            end = start + timedelta(days = 2)
+            assert index.usageTime(licenseNo, toolbox, start, end) == \
+                pytest.approx(_usageReference(intervals, licenseNo, toolbox, start, end))
+
+
+@pytest.mark.parametrize("bucketSize, startTime, endTime", [
+    ('hour', None, None),
+    ('day', None, None),
+    (90, datetime(2020, 6, 1, 7, 15), datetime(2020, 6, 3, 22)),
+    (timedelta(hours = 5), datetime(2020, 6, 2, 12), None),
+])
+def test_usageHistogramEqualsBruteForce(bucketSize, startTime, endTime):
+    intervals = _randomIntervals(300, seed = 4)
+    usage, licenseValues, toolboxValues, bucketStarts = usageHistogram(
+        *intervals, bucketSize, startTime = startTime, endTime = endTime)
+
+    size = {'hour': timedelta(hours = 1), 'day': timedelta(days = 1)}.get(bucketSize, bucketSize)
+    if isinstance(size, int):
+        size = timedelta(minutes = size)
+    first = startTime if startTime is not None else datetime.combine(min(intervals[2]).date(), datetime.min.time())
+    last = endTime if endTime is not None else max(intervals[3])
+    noBuckets = -(-(last - first) // size)
+
+    assert usage.shape == (3, 2, noBuckets)
+    assert list(bucketStarts) == [np.datetime64(first + bb * size, 'm') for bb in range(noBuckets)]
+    for ll, licenseNo in enumerate(licenseValues):
+        for tt, toolbox in enumerate(toolboxValues):
+            for bb in range(noBuckets):
+                start = first + bb * size
+                assert usage[ll, tt, bb] == pytest.approx(
+                    _usageReference(intervals, licenseNo, toolbox, start, start + size))